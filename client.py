@@ -0,0 +1,60 @@
+"""
+A thin client for the daemon of `src.interpreter.daemon`: it sends a Lox program to a running
+daemon and prints its output, without importing the interpreter.
+
+    python client.py SOCKET script.lox [arguments...]
+    python client.py SOCKET -e 'print 1 + 2;'
+"""
+import json
+import os
+import socket
+import sys
+from typing import Optional, Sequence, TextIO
+
+EX_SOFTWARE = 70
+EX_UNAVAILABLE = 69
+
+
+def run_remote(
+    socket_path: str,
+    path: Optional[str] = None,
+    source: Optional[str] = None,
+    arguments: Sequence[str] = (),
+    stdout: TextIO = sys.stdout
+) -> int:
+    """
+    Run a Lox program, given by path or as source text, on a daemon and stream its output.
+
+    :return: The exit status of the program.
+    """
+    request = {"arguments": list(arguments)}
+    if path is not None:
+        request["path"] = os.path.abspath(path)
+    else:
+        request["source"] = source
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        with connection.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "status" in reply:
+                    return reply["status"]
+                stdout.write(reply["stdout"])
+                stdout.flush()
+    # The daemon dropped the connection: the interpreter crashed on this program.
+    return EX_SOFTWARE
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or (sys.argv[2] == "-e" and len(sys.argv) < 4):
+        sys.exit(__doc__)
+    if sys.argv[2] == "-e":
+        arguments = dict(source=sys.argv[3], arguments=sys.argv[4:])
+    else:
+        arguments = dict(path=sys.argv[2], arguments=sys.argv[3:])
+    try:
+        sys.exit(run_remote(sys.argv[1], **arguments))
+    except OSError as error:
+        print(f"Can't reach the daemon at '{sys.argv[1]}': {error.strerror or error}", file=sys.stderr)
+        sys.exit(EX_UNAVAILABLE)
@@ -1,7 +1,9 @@
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, List
 
-from ..interpreter import Interpreter
-from utils.callable import PyNoxCallable
+from ..utils.callable import PyNoxCallable
+
+if TYPE_CHECKING:
+    from ..interpreter import Interpreter
 
 
 class BuiltInCallable(PyNoxCallable):
@@ -18,3 +20,8 @@ class BuiltInCallable(PyNoxCallable):
     @property
     def arity(self):
         raise NotImplementedError
+
+
+from .registry import NativeFunction, Registry, default_registry, native  # noqa: E402
+
+__all__ = ["BuiltInCallable", "NativeFunction", "Registry", "default_registry", "native"]
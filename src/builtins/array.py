@@ -0,0 +1,159 @@
+import operator
+from array import array
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Iterable
+
+from .hashmap import PyNoxMap
+from .registry import native
+from ..exceptions import PyNoxRuntimeError
+from ..utils.callable import PyNoxCallable, PyNoxFunction
+from ..utils.rope import is_string
+
+if TYPE_CHECKING:
+    from ..interpreter import Interpreter
+
+__all__ = ["PyNoxArray"]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_array(name: str, value: Any) -> "PyNoxArray":
+    if not isinstance(value, PyNoxArray):
+        raise PyNoxRuntimeError(f"'{name}' expects an array.")
+    return value
+
+
+def _check_number(name: str, value: Any) -> Any:
+    if not _is_number(value):
+        raise PyNoxRuntimeError(f"'{name}' expects a number.")
+    return value
+
+
+class PyNoxArray:
+    """
+    A fixed-length array of numbers stored unboxed in an ``array('d')``.
+    """
+
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data: array) -> None:
+        self.data = data
+
+    @classmethod
+    def of(cls, values: Iterable[Any]) -> "PyNoxArray":
+        """
+        Build an array from Lox values, rejecting anything that is not a number.
+
+        :param values: The element values.
+        :return: A new array holding the values.
+        """
+        values = list(values)
+        for value in values:
+            _check_number("array", value)
+        return cls(array("d", values))
+
+    @classmethod
+    def zeros(cls, length: int) -> "PyNoxArray":
+        return cls(array("d", bytes(8 * length)))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __str__(self) -> str:
+        return "[" + ", ".join(map(str, self.data)) + "]"
+
+    def __repr__(self) -> str:
+        return f"<PyNoxArray len={len(self.data)} at {hex(id(self))}>"
+
+    def index(self, index: Any) -> int:
+        """
+        Validate a Lox index value against the bounds of the array.
+
+        :param index: The index value evaluated by the interpreter.
+        :return: The index as a Python ``int``.
+        """
+        if not _is_number(index) or index != int(index):
+            raise PyNoxRuntimeError("Array index must be an integer.")
+        index = int(index)
+        if not 0 <= index < len(self.data):
+            raise PyNoxRuntimeError(f"Array index {index} out of range for length {len(self.data)}.")
+        return index
+
+    def get(self, index: Any) -> float:
+        return self.data[self.index(index)]
+
+    def set(self, index: Any, value: Any) -> Any:
+        self.data[self.index(index)] = _check_number("array", value)
+        return value
+
+
+@native("array")
+def array_(length: Any) -> PyNoxArray:
+    _check_number("array", length)
+    if length < 0 or length != int(length):
+        raise PyNoxRuntimeError("'array' expects a non-negative integer length.")
+    return PyNoxArray.zeros(int(length))
+
+
+@native("len")
+def len_(value: Any) -> int:
+    if isinstance(value, (PyNoxArray, PyNoxMap)) or is_string(value):
+        return len(value)
+    raise PyNoxRuntimeError("'len' expects an array, a map or a string.")
+
+
+@native("slice")
+def slice_(values: Any, start: Any, end: Any) -> PyNoxArray:
+    values = _check_array("slice", values)
+    for bound in (start, end):
+        if not _is_number(bound) or bound != int(bound):
+            raise PyNoxRuntimeError("'slice' bounds must be integers.")
+    start, end = int(start), int(end)
+    if not 0 <= start <= end <= len(values):
+        raise PyNoxRuntimeError(f"'slice' bounds [{start}, {end}) out of range for length {len(values)}.")
+    return PyNoxArray(values.data[start:end])
+
+
+@native("map", pass_interpreter=True)
+def map_(interpreter: "Interpreter", values: Any, fn: Any) -> PyNoxArray:
+    values = _check_array("map", values)
+    if not isinstance(fn, PyNoxCallable) or fn.arity != 1:
+        raise PyNoxRuntimeError("'map' expects a function of one argument.")
+    result = array("d")
+    append = result.append
+    for value in values.data:
+        append(_check_number("map", fn(interpreter, [value])))
+    return PyNoxArray(result)
+
+
+@native("pmap", pass_interpreter=True)
+def pmap(interpreter: "Interpreter", values: Any, fn: Any) -> PyNoxArray:
+    from ..interpreter.parallel import parallel_map
+
+    values = _check_array("pmap", values)
+    if not isinstance(fn, PyNoxFunction) or fn.arity != 1:
+        raise PyNoxRuntimeError("'pmap' expects a Lox function of one argument.")
+    results = parallel_map(interpreter, fn, values.data.tolist())
+    return PyNoxArray(array("d", [_check_number("pmap", result) for result in results]))
+
+
+@native("sum")
+def sum_(values: Any) -> float:
+    return sum(_check_array("sum", values).data)
+
+
+@native("dot")
+def dot(left: Any, right: Any) -> float:
+    left, right = _check_array("dot", left), _check_array("dot", right)
+    if len(left) != len(right):
+        raise PyNoxRuntimeError("'dot' expects arrays of equal length.")
+    return sum(map(operator.mul, left.data, right.data))
+
+
+@native("scale")
+def scale(values: Any, factor: Any) -> PyNoxArray:
+    values = _check_array("scale", values)
+    _check_number("scale", factor)
+    return PyNoxArray(array("d", map(operator.mul, values.data, repeat(factor))))
@@ -1,8 +1,23 @@
+import statistics
 import time
-from typing import List, Any
+from typing import TYPE_CHECKING, List, Any
 
 from . import BuiltInCallable
-from ..interpreter import Interpreter
+from .hashmap import PyNoxMap
+from .registry import native
+from ..exceptions import PyNoxRuntimeError
+from ..utils.callable import PyNoxCallable
+
+if TYPE_CHECKING:
+    from ..interpreter import Interpreter
+
+__all__ = ["Clock"]
+
+# Timed runs of `bench`, each of the requested number of calls.
+BENCH_REPEATS = 7
+# Fewest warm up calls, enough for a Lox function to tier up before it is timed.
+BENCH_WARMUP = 100
+
 
 class Clock(BuiltInCallable):
 
@@ -15,3 +30,50 @@ class Clock(BuiltInCallable):
     @property
     def arity(self):
         return 0
+
+
+@native("clockNs")
+def clock_ns() -> int:
+    """A monotonic timestamp in nanoseconds, from the highest resolution clock; only differences mean anything."""
+    return time.perf_counter_ns()
+
+
+def _idle(interpreter: "Interpreter", arguments: List[Any]) -> None:
+    return None
+
+
+def _time_calls(interpreter: "Interpreter", fn: Any, iterations: int) -> int:
+    arguments: List[Any] = []
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn(interpreter, arguments)
+    return time.perf_counter_ns() - start
+
+
+@native("bench", pass_interpreter=True)
+def bench(interpreter: "Interpreter", fn: Any, iterations: Any) -> PyNoxMap:
+    """
+    Time a function of no arguments: warm it up, then time `BENCH_REPEATS` runs of `iterations`
+    calls each. The cost of the timing loop, measured on a call that does nothing, is taken off.
+
+    :return: A map of the nanoseconds per call, ``min``, ``median``, ``mean`` and ``stddev``
+        over the runs, with the ``iterations`` and ``repeats`` they came from.
+    """
+    if not isinstance(fn, PyNoxCallable) or fn.arity != 0:
+        raise PyNoxRuntimeError("'bench' expects a function of no arguments.")
+    if isinstance(iterations, bool) or not isinstance(iterations, (int, float)) or iterations != int(iterations) \
+            or iterations <= 0:
+        raise PyNoxRuntimeError("'bench' expects a positive integer number of iterations.")
+    iterations = int(iterations)
+
+    _time_calls(interpreter, fn, max(iterations, BENCH_WARMUP))
+    overhead = min(_time_calls(interpreter, _idle, iterations) for _ in range(BENCH_REPEATS))
+    runs = [max(_time_calls(interpreter, fn, iterations) - overhead, 0) / iterations for _ in range(BENCH_REPEATS)]
+    return PyNoxMap.of((
+        ("min", min(runs)),
+        ("median", statistics.median(runs)),
+        ("mean", statistics.fmean(runs)),
+        ("stddev", statistics.stdev(runs)),
+        ("iterations", iterations),
+        ("repeats", BENCH_REPEATS),
+    ))
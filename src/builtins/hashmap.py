@@ -0,0 +1,144 @@
+import reprlib
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple
+
+from .registry import native
+from ..exceptions import PyNoxRuntimeError
+from ..utils.rope import Rope, stringify
+
+__all__ = ["PyNoxMap"]
+
+
+def _key(value: Any) -> Any:
+    """
+    The dictionary key of a Lox value.
+
+    Lox equality never holds across types, while Python's does between ``1``, ``1.0`` and
+    ``True``: integers and booleans are tagged with their type so they can't collide with floats.
+    Ropes key as the string they spell, like they compare.
+    """
+    kind = type(value)
+    if kind is Rope:
+        return value.flatten()
+    if kind is int or kind is bool:
+        return kind, value
+    return value
+
+
+def _value(key: Any) -> Any:
+    return key[1] if type(key) is tuple else key
+
+
+def _check_map(name: str, value: Any) -> "PyNoxMap":
+    if not isinstance(value, PyNoxMap):
+        raise PyNoxRuntimeError(f"'{name}' expects a map.")
+    return value
+
+
+class PyNoxMap:
+    """
+    A hash map from Lox values to Lox values, in insertion order.
+
+    Keys follow Lox equality: strings and ropes by content, numbers and booleans by value and
+    type, so ``1`` and ``1.0`` are different keys, and every other value by identity.
+    """
+
+    __slots__ = ("data", "__weakref__")
+
+    def __init__(self, data: Dict[Any, Any] | None = None) -> None:
+        self.data = data if data is not None else {}
+
+    @classmethod
+    def of(cls, entries: Iterable[Tuple[Any, Any]]) -> "PyNoxMap":
+        """
+        Build a map from Lox key and value pairs; later pairs win over earlier ones with an equal key.
+        """
+        return cls({_key(key): value for key, value in entries})
+
+    @classmethod
+    def from_host(cls, value: Any) -> Any:
+        """
+        Convert host data to Lox values: dicts become maps and lists or tuples become maps from
+        their indices, recursively, while strings, numbers, booleans and None are kept.
+
+        :param value: A Python value, typically decoded from JSON or a configuration file.
+        :return: The equivalent Lox value.
+        """
+        if isinstance(value, Mapping):
+            return cls.of((key, cls.from_host(item)) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return cls.of(enumerate(map(cls.from_host, value)))
+        return value
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(_value, self.data)
+
+    @reprlib.recursive_repr(fillvalue="{...}")
+    def __str__(self) -> str:
+        entries = (f"{stringify(_value(key))}: {stringify(value)}" for key, value in self.data.items())
+        return "{" + ", ".join(entries) + "}"
+
+    def __repr__(self) -> str:
+        return f"<PyNoxMap len={len(self.data)} at {hex(id(self))}>"
+
+    def get(self, key: Any) -> Any:
+        """
+        Look up the value of a key, as ``map[key]`` does.
+
+        :raises PyNoxRuntimeError: If the map has no such key.
+        """
+        try:
+            return self.data[_key(key)]
+        except KeyError:
+            raise PyNoxRuntimeError(f"Undefined key '{stringify(key)}'.")
+
+    def set(self, key: Any, value: Any) -> Any:
+        self.data[_key(key)] = value
+        return value
+
+    def has(self, key: Any) -> bool:
+        return _key(key) in self.data
+
+    def delete(self, key: Any) -> bool:
+        return self.data.pop(_key(key), self) is not self
+
+    def keys(self) -> "PyNoxMap":
+        """The keys in insertion order, as a map from their indices so Lox loops can walk them."""
+        return PyNoxMap({(int, index): _value(key) for index, key in enumerate(self.data)})
+
+
+@native("hashMap")
+def hash_map() -> PyNoxMap:
+    return PyNoxMap()
+
+
+@native("get")
+def get(values: Any, key: Any) -> Any:
+    return _check_map("get", values).data.get(_key(key))
+
+
+@native("set")
+def set_(values: Any, key: Any, value: Any) -> Any:
+    return _check_map("set", values).set(key, value)
+
+
+@native("has")
+def has(values: Any, key: Any) -> bool:
+    return _check_map("has", values).has(key)
+
+
+@native("delete")
+def delete(values: Any, key: Any) -> bool:
+    return _check_map("delete", values).delete(key)
+
+
+@native("keys")
+def keys(values: Any) -> PyNoxMap:
+    return _check_map("keys", values).keys()
+
+
+@native("size")
+def size(values: Any) -> int:
+    return len(_check_map("size", values))
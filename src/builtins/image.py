@@ -0,0 +1,11 @@
+from .registry import native
+
+__all__ = []
+
+
+@native("checkpoint")
+def checkpoint() -> None:
+    """
+    Mark where the prelude stored by `PyNox.save_image` ends. Running normally, it does nothing.
+    """
+    return None
@@ -0,0 +1,159 @@
+import codecs
+import mmap
+import os
+from typing import Any, BinaryIO, Optional, TextIO
+
+from .registry import native
+from ..exceptions import PyNoxRuntimeError
+from ..utils.rope import flatten, is_string, stringify
+
+__all__ = ["PyNoxFile"]
+
+# Size of the buffer behind a file opened for writing; `flush` empties it early.
+WRITE_BUFFER = 1 << 16
+# Files at least this large are read through a memory map instead of read calls.
+MMAP_THRESHOLD = 1 << 20
+
+_MODES = {"r": "rb", "w": "w", "a": "a"}
+
+
+def _check_file(name: str, value: Any, reading: bool) -> "PyNoxFile":
+    if not isinstance(value, PyNoxFile):
+        raise PyNoxRuntimeError(f"'{name}' expects a file.")
+    if value.closed:
+        raise PyNoxRuntimeError(f"'{name}' can't use the closed file '{value.path}'.")
+    if reading != (value.mode == "r"):
+        raise PyNoxRuntimeError(f"'{name}' expects a file opened for {'reading' if reading else 'writing'}.")
+    return value
+
+
+class PyNoxFile:
+    """
+    A file opened by a Lox program, streamed so only the current line or chunk is held in memory.
+
+    Files opened for reading are decoded as UTF-8 incrementally, so a chunk boundary may fall
+    inside a character; large regular files are read through a memory map. Files opened for
+    writing buffer their output until `flush`, `close` or a full buffer.
+    """
+
+    __slots__ = ("path", "mode", "__file", "__source", "__decoder")
+
+    def __init__(self, path: str, mode: str) -> None:
+        self.path = path
+        self.mode = mode
+        self.__file: BinaryIO | TextIO = open(path, _MODES[mode], **(
+            {} if mode == "r" else {"encoding": "utf-8", "buffering": WRITE_BUFFER}
+        ))
+        self.__source: Optional[Any] = None
+        self.__decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        if mode == "r":
+            self.__source = self.__file
+            try:
+                if os.fstat(self.__file.fileno()).st_size >= MMAP_THRESHOLD:
+                    self.__source = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Not a regular file, or one the platform can't map: plain buffered reads work on anything.
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def __str__(self) -> str:
+        return f"<file '{self.path}'>"
+
+    def __repr__(self) -> str:
+        return f"<PyNoxFile {self.path!r} mode={self.mode!r} at {hex(id(self))}>"
+
+    def read_line(self) -> Optional[str]:
+        """
+        Read the next line without its line ending.
+
+        :return: The line, or None at the end of the file.
+        """
+        data = self.__source.readline()
+        if not data:
+            tail = self.__decoder.decode(b"", final=True)
+            return tail or None
+        line = self.__decoder.decode(data)
+        if line.endswith("\n"):
+            line = line[:-2] if line.endswith("\r\n") else line[:-1]
+        return line
+
+    def read(self, size: int) -> Optional[str]:
+        """
+        Read the next chunk of at most `size` bytes, ending on a character boundary.
+
+        :return: The chunk, or None at the end of the file.
+        """
+        data = self.__source.read(size)
+        text = self.__decoder.decode(data, final=not data)
+        if not data and not text:
+            return None
+        return text
+
+    def write(self, text: str) -> None:
+        self.__file.write(text)
+
+    def flush(self) -> None:
+        self.__file.flush()
+
+    def close(self) -> None:
+        if self.__source is not self.__file and self.__source is not None:
+            self.__source.close()
+        self.__file.close()
+
+
+@native("open")
+def open_(path: Any, mode: Any) -> PyNoxFile:
+    if not is_string(path):
+        raise PyNoxRuntimeError("'open' expects a path string.")
+    mode = flatten(mode)
+    if mode not in _MODES:
+        raise PyNoxRuntimeError("'open' mode must be \"r\", \"w\" or \"a\".")
+    path = flatten(path)
+    try:
+        return PyNoxFile(path, mode)
+    except OSError as error:
+        raise PyNoxRuntimeError(f"'open' can't open '{path}': {error.strerror or error}.")
+
+
+@native("readLine")
+def read_line(file: Any) -> Optional[str]:
+    return _check_file("readLine", file, reading=True).read_line()
+
+
+@native("read")
+def read(file: Any, size: Any) -> Optional[str]:
+    file = _check_file("read", file, reading=True)
+    if isinstance(size, bool) or not isinstance(size, (int, float)) or size != int(size) or size <= 0:
+        raise PyNoxRuntimeError("'read' expects a positive integer size.")
+    return file.read(int(size))
+
+
+@native("write")
+def write(file: Any, value: Any) -> None:
+    file = _check_file("write", file, reading=False)
+    file.write(stringify(value))
+    return None
+
+
+@native("writeLine")
+def write_line(file: Any, value: Any) -> None:
+    file = _check_file("writeLine", file, reading=False)
+    file.write(stringify(value) + "\n")
+    return None
+
+
+@native("flush")
+def flush(file: Any) -> None:
+    _check_file("flush", file, reading=False).flush()
+    return None
+
+
+@native("close")
+def close(file: Any) -> None:
+    if not isinstance(file, PyNoxFile):
+        raise PyNoxRuntimeError("'close' expects a file.")
+    file.close()
+    return None
@@ -0,0 +1,168 @@
+import inspect
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+from . import BuiltInCallable
+from ..exceptions import PyNoxRuntimeError
+
+if TYPE_CHECKING:
+    from ..environment import Environment
+    from ..interpreter import Interpreter
+
+__all__ = ["NativeFunction", "Registry", "native", "default_registry"]
+
+_NATIVE_MARKER = "__pynox_native__"
+
+
+class NativeFunction(BuiltInCallable):
+    """
+    A host Python function exposed to Lox with a fixed, declared arity.
+
+    Natives that do not take the interpreter are called directly with their positional
+    arguments by the interpreter's fast call path. Natives that suspend return a request for the
+    task scheduler instead of a value, see `utils.coroutines`, and only run in the stackless evaluator.
+    """
+
+    def __init__(self, name: str, function: Callable[..., Any], arity: int, pass_interpreter: bool = False,
+                 suspends: bool = False) -> None:
+        super().__init__(name)
+        self.function = function
+        self.declared_arity = arity
+        self.pass_interpreter = pass_interpreter
+        self.suspends = suspends
+
+    def __call__(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
+        if self.suspends:
+            raise PyNoxRuntimeError(f"'{self.name}' can only suspend a task run by the stackless evaluator.")
+        if self.pass_interpreter:
+            return self.function(interpreter, *arguments)
+        return self.function(*arguments)
+
+    @property
+    def arity(self):
+        return self.declared_arity
+
+
+def _infer_arity(function: Callable[..., Any], pass_interpreter: bool) -> int:
+    parameters = [
+        param for param in inspect.signature(function).parameters.values()
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD) and param.default is param.empty
+    ]
+    return len(parameters) - 1 if pass_interpreter else len(parameters)
+
+
+def native(name: Optional[str] = None, arity: Optional[int] = None, pass_interpreter: bool = False,
+           suspends: bool = False):
+    """
+    Mark a module-level Python function as a Lox native so `Registry.register_module` picks it up.
+
+    :param name: The Lox name, defaults to the function name without trailing underscores.
+    :param arity: The declared arity, inferred from the signature when omitted.
+    :param pass_interpreter: Whether the function takes the running interpreter as first argument.
+    :param suspends: Whether the function returns a request that suspends the calling task.
+    """
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        setattr(function, _NATIVE_MARKER, (name, arity, pass_interpreter, suspends))
+        return function
+    return decorator
+
+
+class Registry:
+    """
+    A table of host functions exposed to Lox programs as globals.
+    """
+
+    def __init__(self) -> None:
+        self.__natives: Dict[str, BuiltInCallable] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__natives
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__natives)
+
+    def __len__(self) -> int:
+        return len(self.__natives)
+
+    def get(self, name: str) -> Optional[BuiltInCallable]:
+        return self.__natives.get(name)
+
+    def copy(self) -> "Registry":
+        registry = Registry()
+        registry.__natives.update(self.__natives)
+        return registry
+
+    def register(
+        self,
+        function: Callable[..., Any],
+        *,
+        name: Optional[str] = None,
+        arity: Optional[int] = None,
+        pass_interpreter: bool = False,
+        suspends: bool = False
+    ) -> NativeFunction:
+        """
+        Expose a Python function to Lox.
+
+        :param function: The host function.
+        :param name: The Lox name, defaults to the function name without trailing underscores.
+        :param arity: The declared arity, inferred from the signature when omitted.
+        :param pass_interpreter: Whether the function takes the running interpreter as first argument.
+        :param suspends: Whether the function returns a request that suspends the calling task.
+        :return: The registered native.
+        """
+        name = name or function.__name__.rstrip("_")
+        if arity is None:
+            arity = _infer_arity(function, pass_interpreter)
+        fn = NativeFunction(name, function, arity, pass_interpreter, suspends)
+        self.__natives[name] = fn
+        return fn
+
+    def register_callable(self, callable_: BuiltInCallable) -> BuiltInCallable:
+        """
+        Expose an already constructed `BuiltInCallable` such as `Clock` under its own name.
+        """
+        self.__natives[callable_.name] = callable_
+        return callable_
+
+    def register_module(self, module: ModuleType, prefix: str = "") -> List[str]:
+        """
+        Register every function of a module decorated with `native`.
+
+        :param module: The module holding the host functions.
+        :param prefix: An optional prefix prepended to every Lox name.
+        :return: The Lox names that were registered.
+        """
+        names = []
+        for attribute in vars(module).values():
+            marker = getattr(attribute, _NATIVE_MARKER, None)
+            if marker is None or not callable(attribute):
+                continue
+            name, arity, pass_interpreter, suspends = marker
+            name = prefix + (name or attribute.__name__.rstrip("_"))
+            self.register(attribute, name=name, arity=arity, pass_interpreter=pass_interpreter, suspends=suspends)
+            names.append(name)
+        return names
+
+    def install(self, env: "Environment") -> None:
+        """
+        Define every registered native in the given (global) environment.
+        """
+        env.values.update(self.__natives)
+
+
+def default_registry() -> Registry:
+    """
+    Build a registry holding the standard Lox library.
+    """
+    from . import array, clock, hashmap, image, io, tasks
+
+    registry = Registry()
+    registry.register_callable(clock.Clock())
+    registry.register_module(array)
+    registry.register_module(clock)
+    registry.register_module(hashmap)
+    registry.register_module(image)
+    registry.register_module(io)
+    registry.register_module(tasks)
+    return registry
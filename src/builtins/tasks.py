@@ -0,0 +1,35 @@
+from typing import TYPE_CHECKING, Any
+
+from .registry import native
+from ..exceptions import PyNoxRuntimeError
+from ..utils.callable import PyNoxFunction
+from ..utils.coroutines import YIELD, Await, Sleep, Task
+
+if TYPE_CHECKING:
+    from ..interpreter import Interpreter
+
+
+@native("spawn", pass_interpreter=True)
+def spawn(interpreter: "Interpreter", fn: Any) -> Task:
+    if not isinstance(fn, PyNoxFunction) or fn.arity != 0:
+        raise PyNoxRuntimeError("'spawn' expects a Lox function of no arguments.")
+    return interpreter.spawn(fn)
+
+
+@native("yield", pass_interpreter=True, suspends=True)
+def yield_(interpreter: "Interpreter") -> Any:
+    return YIELD
+
+
+@native("sleep", pass_interpreter=True, suspends=True)
+def sleep(interpreter: "Interpreter", seconds: Any) -> Sleep:
+    if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or seconds < 0:
+        raise PyNoxRuntimeError("'sleep' expects a number of seconds.")
+    return Sleep(seconds)
+
+
+@native("await", pass_interpreter=True, suspends=True)
+def await_(interpreter: "Interpreter", task: Any) -> Await:
+    if not isinstance(task, Task):
+        raise PyNoxRuntimeError("'await' expects a task.")
+    return Await(task)
@@ -1,44 +1,62 @@
+import enum
 from typing import Any, Dict, Optional
 from .exceptions import PyNoxRuntimeError
 
 from .lexer.tokens import Token
 
 
+class Binding(enum.Enum):
+    """
+    Where the `Resolver` decided a variable lives.
+    """
+    GLOBAL = enum.auto()
+    LOCAL = enum.auto()
+    CELL = enum.auto()
+    UPVALUE = enum.auto()
+
+
+class Cell:
+    """
+    A heap box for a local variable that is captured by a closure.
+
+    Only captured locals are boxed; every other local is stored directly in the slot list of
+    its function call frame.
+    """
+
+    __slots__ = ("value", "__weakref__")
+
+    def __init__(self, value: Any = None) -> None:
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"<Cell {self.value!r}>"
+
+
 class Environment:
 
     def __init__(
         self,
         enclosing: Optional["Environment"] = None,
-        values: Dict[str, Any] = {}
+        values: Optional[Dict[str, Any]] = None
     ) -> None:
         self.enclosing: Optional[Environment] = enclosing
-        self.values = values
-
-    def ancestor(self, distance: int) -> "Environment":
-        env: "Environment" = self
-        for _ in range(distance):
-            if env.enclosing is not None:
-                env = env.enclosing
-
-        return env
+        self.values = values if values is not None else {}
 
     def define(self, name: Token, value: Any) -> None:
         self.values[name.lexeme] = value 
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self.values.keys():
-            return self.values.get(name.lexeme)
+        values = self.values
+        if name.lexeme in values:
+            return values[name.lexeme]
 
         if self.enclosing is not None:
             return self.enclosing.get(name=name)
 
-        raise PyNoxRuntimeError(f"{name} Undefined variable '{name.lexeme}'.")
-
-    def get_at(self, distance: int, name: str):
-        return  self.ancestor(distance).values.get(name)
+        raise PyNoxRuntimeError(f"RuntimeError at line {name.line}: Undefined variable '{name.lexeme}'.")
 
     def assign(self, name: Token, value: Any) -> None:
-        if name.lexeme in self.values.keys():
+        if name.lexeme in self.values:
             self.values[name.lexeme] = value
             return None
 
@@ -46,7 +64,4 @@ class Environment:
             self.enclosing.assign(name=name, value=value)
             return None
 
-        raise PyNoxRuntimeError(f"{name} Undefined variable '{name.lexeme}'")
-
-    def assign_at(self, distance: int, name: Token, value: Any) -> None:
-        self.ancestor(distance=distance).values.get(name.lexeme, value)
+        raise PyNoxRuntimeError(f"RuntimeError at line {name.line}: Undefined variable '{name.lexeme}'.")
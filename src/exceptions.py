@@ -66,3 +66,15 @@ class PyNoxResolutionError(PyNoxException):
 
     def __init__(self, message: str, error_type: ErrorTypes = ErrorTypes.EX_SOFTWARE):
         super().__init__(message, error_type)
+
+
+class PyNoxImportError(PyNoxException):
+
+    def __init__(self, message: str, error_type: ErrorTypes = ErrorTypes.EX_NOINPUT):
+        super().__init__(message, error_type)
+
+
+class PyNoxImageError(PyNoxException):
+
+    def __init__(self, message: str, error_type: ErrorTypes = ErrorTypes.EX_DATAERR):
+        super().__init__(message, error_type)
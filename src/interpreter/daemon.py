@@ -0,0 +1,163 @@
+import argparse
+import errno
+import io
+import json
+import os
+import pathlib
+import signal
+import socket
+import socketserver
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+from .pyNox import PyNox
+from ..builtins import Registry, default_registry
+from ..exceptions import ErrorTypes
+
+__all__ = ["Daemon"]
+
+DEFAULT_WORKERS = 4
+
+
+class _Output(io.TextIOBase):
+    """
+    The stdout of one request: every flush sends what the program printed since the last one
+    to the client as a ``{"stdout": ...}`` line.
+    """
+
+    def __init__(self, wfile: Any) -> None:
+        self.__wfile = wfile
+        self.__pending: list[str] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self.__pending.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if self.__pending:
+            text, self.__pending = "".join(self.__pending), []
+            self.__wfile.write(json.dumps({"stdout": text}).encode() + b"\n")
+            self.__wfile.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    server: "_Server"
+
+    def handle(self) -> None:
+        output = _Output(self.wfile)
+        try:
+            request = json.loads(self.rfile.readline())
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as error:
+            output.write(f"Bad request: {error}.\n")
+            status = ErrorTypes.EX_PROTOCOL
+        else:
+            status = self.server.daemon.run(request, output)
+        output.flush()
+        self.wfile.write(json.dumps({"status": int(status)}).encode() + b"\n")
+
+
+class _Server(socketserver.UnixStreamServer):
+    """A Unix socket server handing each connection to a fixed pool of worker threads."""
+
+    def __init__(self, path: str, daemon: "Daemon", workers: int) -> None:
+        self.daemon = daemon
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="PyNox:daemon")
+        super().__init__(path, _Handler)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self.pool.submit(self.__process, request, client_address)
+
+    def __process(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+
+
+class Daemon:
+    """
+    A long-lived process that runs Lox programs sent over a Unix socket, so they skip the start up
+    of Python and of the interpreter, and programs and modules it already compiled aren't lexed,
+    parsed or resolved again until their file changes.
+
+    A client sends one JSON line, ``{"path": ..., "arguments": [...]}`` or ``{"source": ...,
+    "arguments": [...]}``, and reads back ``{"stdout": ...}`` lines as the program prints,
+    then ``{"status": ...}`` with its exit status. Each request runs in its own interpreter on
+    one of `workers` threads; they share the compiled programs but not their globals.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        workers: int = DEFAULT_WORKERS,
+        natives: Optional[Registry] = None,
+        search_path: Optional[Sequence[str | pathlib.Path]] = None,
+        stackless: bool = False
+    ) -> None:
+        self.path = pathlib.Path(path)
+        self.natives = natives if natives is not None else default_registry()
+        self.search_path = search_path
+        self.stackless = stackless
+        if self.path.is_socket():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(str(self.path)) == 0:
+                    raise OSError(errno.EADDRINUSE, "Another daemon serves this socket", str(self.path))
+            # Left behind by a daemon that didn't shut down cleanly.
+            self.path.unlink()
+        self.__server = _Server(str(self.path), self, workers)
+        # Whoever can connect runs code as this process.
+        os.chmod(self.path, 0o600)
+
+    def run(self, request: Dict[str, Any], stdout: io.TextIOBase) -> ErrorTypes:
+        """
+        Run one request, printing to the given stream.
+
+        :return: The exit status of the program.
+        """
+        source, path = request.get("source"), request.get("path")
+        if (source is None) == (path is None):
+            stdout.write("Bad request: expected one of 'path' and 'source'.\n")
+            return ErrorTypes.EX_PROTOCOL
+        arguments = [str(argument) for argument in request.get("arguments") or ()]
+        try:
+            runtime = PyNox(source=path or "", text=source, natives=self.natives.copy(), search_path=self.search_path,
+                            stackless=self.stackless, arguments=arguments, stdout=stdout, cache=True)
+        except OSError as error:
+            stdout.write(f"Can't read '{path}': {error.strerror}\n")
+            return ErrorTypes.EX_NOINPUT
+        return runtime.run_file()
+
+    def serve_forever(self) -> None:
+        try:
+            self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            self.path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        """Stop serving, from another thread; requests already running finish first."""
+        self.__server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Lox programs over a Unix socket.")
+    parser.add_argument("socket", help="Path of the socket to listen on.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Requests served at once.")
+    parser.add_argument("--stackless", action="store_true", help="Run programs on the stackless evaluator.")
+    options = parser.parse_args()
+    # Unwind through `serve_forever` so the socket is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    Daemon(options.socket, workers=options.workers, stackless=options.stackless).serve_forever()
@@ -1,5 +1,6 @@
-from typing import Any, List, Protocol
+from typing import Any, List, Protocol, Tuple
 
+from ..environment import Binding
 from ..lexer.tokens import Token
 
 class ExprVisitor(Protocol):
@@ -28,6 +29,33 @@ class ExprVisitor(Protocol):
     def visit_call_expr(self, expression) -> Any:
         pass
 
+    def visit_inline_expr(self, expression) -> Any:
+        pass
+
+    def visit_array_expr(self, expression) -> Any:
+        pass
+
+    def visit_map_expr(self, expression) -> Any:
+        pass
+
+    def visit_index_expr(self, expression) -> Any:
+        pass
+
+    def visit_set_index_expr(self, expression) -> Any:
+        pass
+
+    def visit_get_expr(self, expression) -> Any:
+        pass
+
+    def visit_set_expr(self, expression) -> Any:
+        pass
+
+    def visit_this_expr(self, expression) -> Any:
+        pass
+
+    def visit_super_expr(self, expression) -> Any:
+        pass
+
 
 class Expr(Protocol):
 
@@ -41,6 +69,13 @@ class Binary(Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        # Quickening state, see `quickening.quicken`.
+        self.specialized = None
+        self.observed = None
+        self.warmup = 0
+        self.hits = 0
+        self.generic_runs = 0
+        self.deopts = 0
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_binary(expression=self)
@@ -74,6 +109,8 @@ class Variable(Expr):
 
     def __init__(self, name: Token):
         self.name = name
+        self.binding = Binding.GLOBAL
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_variable_expr(self)
@@ -93,6 +130,8 @@ class Assign(Expr):
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        self.binding = Binding.GLOBAL
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_assign_expr(self)
@@ -103,6 +142,111 @@ class Call(Expr):
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        self.native = None
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_call_expr(self)
+
+class Inline(Expr):
+    """
+    A call to a global function whose body was copied in place, see `inlining.Inliner`: the
+    arguments go to `slots` of the caller's frame and `body` reads them from there, as long as
+    the callee is still a function of `declaration`.
+    """
+
+    def __init__(self, call: Call, declaration: Any, slots: Tuple[int, ...], body: Expr) -> None:
+        self.call = call
+        self.declaration = declaration
+        self.slots = slots
+        self.body = body
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_inline_expr(self)
+
+class Array(Expr):
+
+    def __init__(self, bracket: Token, elements: List[Expr]) -> None:
+        self.bracket = bracket
+        self.elements = elements
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_array_expr(self)
+
+class Map(Expr):
+
+    def __init__(self, brace: Token, keys: List[Expr], values: List[Expr]) -> None:
+        self.brace = brace
+        self.keys = keys
+        self.values = values
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_map_expr(self)
+
+class Index(Expr):
+
+    def __init__(self, obj: Expr, bracket: Token, index: Expr) -> None:
+        self.obj = obj
+        self.bracket = bracket
+        self.index = index
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_index_expr(self)
+
+class SetIndex(Expr):
+
+    def __init__(self, obj: Expr, bracket: Token, index: Expr, value: Expr) -> None:
+        self.obj = obj
+        self.bracket = bracket
+        self.index = index
+        self.value = value
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_set_index_expr(self)
+
+class Get(Expr):
+
+    def __init__(self, obj: Expr, name: Token) -> None:
+        self.obj = obj
+        self.name = name
+        # Monomorphic inline cache: (shape, slot, method), swapped as a whole.
+        self.cache = None
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_get_expr(self)
+
+class Set(Expr):
+
+    def __init__(self, obj: Expr, name: Token, value: Expr) -> None:
+        self.obj = obj
+        self.name = name
+        self.value = value
+        # Monomorphic inline cache: (shape, slot, shape after the store), swapped as a whole.
+        self.cache = None
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_set_expr(self)
+
+class This(Expr):
+
+    def __init__(self, keyword: Token) -> None:
+        self.keyword = keyword
+        self.binding = Binding.GLOBAL
+        self.slot = -1
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_this_expr(self)
+
+class Super(Expr):
+
+    def __init__(self, keyword: Token, method: Token) -> None:
+        self.keyword = keyword
+        self.method = method
+        self.binding = Binding.GLOBAL
+        self.slot = -1
+        self.this_binding = Binding.GLOBAL
+        self.this_slot = -1
+        # Inline cache: (superclass, method).
+        self.cache = None
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_super_expr(self)
@@ -0,0 +1,395 @@
+import array
+import enum
+import gc
+import importlib
+import marshal
+import operator
+import pathlib
+import sys
+import types
+from typing import Any, Dict, FrozenSet, List, Sequence, Tuple
+
+from .expression import Call, Variable
+from .statements import Expression, Function, Stmt
+from ..builtins import BuiltInCallable, Registry
+from ..builtins.io import PyNoxFile
+from ..exceptions import PyNoxImageError
+from ..utils.callable import PyNoxFunction
+
+__all__ = ["CHECKPOINT", "HeapImage", "dump_heap", "load_heap", "read_image", "split_at_checkpoint", "write_image"]
+
+# The native whose top-level call ends the prelude stored in an image.
+CHECKPOINT = "checkpoint"
+
+IMAGE_FORMAT = ("pynox-image", 4, sys.version_info[:2])
+
+# Entry tags of the object table.
+PRIMITIVE, LIST, TUPLE, DICT, OBJECT, GLOBAL, MEMBER, NATIVE, ARRAY, PATH, FROZENSET, SET = range(12)
+
+_PRIMITIVES = (type(None), bool, int, float, str, bytes)
+
+# Attributes that only make sense in the process that set them, and what they are restored as.
+_TRANSIENT: Dict[type, Dict[str, Any]] = {
+    Function: {"tier": None},
+    PyNoxFunction: {"entry": None},
+}
+
+
+class HeapImage:
+    """
+    The state of a program stopped at its checkpoint: the global variables, the modules that
+    already ran, the size of the top-level frame and the resolved statements left to run.
+    """
+
+    __slots__ = ("globals", "modules", "frame_size", "statements")
+
+    def __init__(self, globals_: Dict[str, Any], modules: FrozenSet[pathlib.Path], frame_size: int,
+                 statements: List[Stmt]) -> None:
+        self.globals = globals_
+        self.modules = modules
+        self.frame_size = frame_size
+        self.statements = statements
+
+
+def split_at_checkpoint(statements: Sequence[Stmt]) -> Tuple[List[Stmt], List[Stmt]]:
+    """
+    Split a program at its first top-level `checkpoint();` statement.
+
+    :param statements: The program's top-level statements.
+    :return: The prelude and the statements after the checkpoint, empty if there is none.
+    """
+    for index, stmt in enumerate(statements):
+        if isinstance(stmt, Expression) and isinstance(stmt.expression, Call):
+            callee = stmt.expression.callee
+            if isinstance(callee, Variable) and callee.name.lexeme == CHECKPOINT and not stmt.expression.arguments:
+                return list(statements[:index]), list(statements[index + 1:])
+    return list(statements), []
+
+
+def _slot_names(cls: type) -> Tuple[str, ...]:
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name in ("__weakref__", "__dict__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                # Private slots are stored under their mangled names.
+                name = f"_{klass.__name__.lstrip('_')}{name}"
+            if name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+# The package whose classes and functions images may refer to.
+_PACKAGE = __name__.split(".")[0]
+# Host globals an image may refer to besides the package's: the operand types and operator
+# functions kept by quickened sites.
+_HOST_GLOBALS = frozenset({
+    *(("builtins", kind.__qualname__) for kind in (bool, float, int, str)),
+    *((operator.add.__module__, name) for name in ("add", "sub", "mul", "truediv", "lt", "le", "gt", "ge", "eq", "ne")),
+})
+
+
+def _lookup(module: str, qualname: str) -> Any:
+    """
+    Find a class or function by module and qualified name, as long as an image may refer to it.
+
+    Images refer to nothing outside this package but the host globals in `_HOST_GLOBALS`, so
+    loading one never imports or reaches other host code.
+
+    :raises PyNoxImageError: If the name is one an image may not refer to.
+    """
+    outside = PyNoxImageError(f"The image refers to '{module}.{qualname}', which is outside PyNox.")
+    inside = module == _PACKAGE or module.startswith(f"{_PACKAGE}.")
+    if not (inside and not any(part.startswith("__") for part in qualname.split("."))) \
+            and (module, qualname) not in _HOST_GLOBALS:
+        raise outside
+    value: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        value = getattr(value, part)
+        if isinstance(value, types.ModuleType):
+            # A module imported by one of the package's would lead anywhere.
+            raise outside
+    # Only the class or function defined under that very name, not one merely bound to it.
+    if getattr(value, "__module__", None) != module or getattr(value, "__qualname__", None) != qualname:
+        raise outside
+    return value
+
+
+class _Writer:
+    """
+    Flattens an object graph into a table of marshal-able entries that refer to each other by index.
+
+    The graph is walked with an explicit stack, so a deep chain of instances or closures costs
+    table entries and never Python recursion.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[Any] = []
+        # One (class, field names, slotted) per distinct object layout, shared by its objects' entries.
+        self.layouts: List[Tuple[int, Tuple[str, ...], bool]] = []
+        self.__layout_ids: Dict[Tuple[type, Tuple[str, ...]], int] = {}
+        self.__ids: Dict[int, int] = {}
+        self.__primitives: Dict[Tuple[type, Any], int] = {}
+        self.__pending: List[Any] = []
+        # Keeps every encoded object alive so the ids used as keys can't be reused mid-walk.
+        self.__kept: List[Any] = []
+        self.__slots: Dict[type, Tuple[str, ...]] = {}
+
+    def write(self, root: Any) -> int:
+        index = self.__ref(root)
+        pending = self.__pending
+        while pending:
+            value = pending.pop()
+            self.entries[self.__ids[id(value)]] = self.__encode(value)
+        return index
+
+    def __ref(self, value: Any) -> int:
+        kind = type(value)
+        if kind in _PRIMITIVES:
+            # Floats compare equal across signs of zero, so they are never shared.
+            key = (kind, value)
+            index = self.__primitives.get(key) if kind is not float else None
+            if index is None:
+                index = len(self.entries)
+                self.entries.append((PRIMITIVE, value))
+                if kind is not float:
+                    self.__primitives[key] = index
+            return index
+
+        index = self.__ids.get(id(value))
+        if index is None:
+            index = self.__ids[id(value)] = len(self.entries)
+            self.entries.append(None)
+            self.__kept.append(value)
+            self.__pending.append(value)
+        return index
+
+    def __refs(self, values: Any) -> List[int]:
+        return [self.__ref(value) for value in values]
+
+    def __encode(self, value: Any) -> Tuple[Any, ...]:
+        kind = type(value)
+        if kind is list:
+            return LIST, self.__refs(value)
+        if kind is tuple:
+            return TUPLE, self.__refs(value)
+        if kind is dict:
+            return DICT, self.__refs(value.keys()), self.__refs(value.values())
+        if kind is frozenset:
+            return FROZENSET, self.__refs(value)
+        if kind is set:
+            return SET, self.__refs(value)
+        if kind is array.array:
+            return ARRAY, value.typecode, value.tobytes()
+        if isinstance(value, pathlib.PurePath):
+            return PATH, str(value)
+        if isinstance(value, BuiltInCallable):
+            return NATIVE, value.name
+        if isinstance(value, PyNoxFile):
+            raise PyNoxImageError(f"Can't store the open file '{value.path}' in an image.")
+        if isinstance(value, enum.Enum):
+            return MEMBER, self.__ref(kind), value.name
+        if isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)):
+            return GLOBAL, *self.__global(value)
+        return self.__object(value)
+
+    def __global(self, value: Any) -> Tuple[str, str]:
+        module, qualname = getattr(value, "__module__", None), getattr(value, "__qualname__", "")
+        try:
+            found = _lookup(module, qualname) if module else None
+        except (ImportError, AttributeError, PyNoxImageError):
+            found = None
+        if found is not value:
+            raise PyNoxImageError(f"Can't store {value!r} in an image.")
+        return module, qualname
+
+    def __object(self, value: Any) -> Tuple[Any, ...]:
+        cls = type(value)
+        if cls.__module__ == "builtins" or isinstance(value, (types.MethodType, types.GeneratorType)):
+            raise PyNoxImageError(f"Can't store {value!r} in an image.")
+
+        slots = self.__slots.get(cls)
+        if slots is None:
+            slots = self.__slots[cls] = _slot_names(cls)
+        fields = dict(getattr(value, "__dict__", ()))
+        for name in slots:
+            if hasattr(value, name):
+                fields[name] = getattr(value, name)
+        for klass in cls.__mro__:
+            fields.update((name, replacement) for name, replacement in _TRANSIENT.get(klass, {}).items()
+                          if name in fields)
+        key = (cls, tuple(fields))
+        layout = self.__layout_ids.get(key)
+        if layout is None:
+            layout = self.__layout_ids[key] = len(self.layouts)
+            self.layouts.append((self.__ref(cls), key[1], bool(slots)))
+        return OBJECT, layout, self.__refs(fields.values())
+
+
+class _Reader:
+    """
+    Rebuilds the object graph of a table written by `_Writer`.
+
+    Every object is created empty first and filled in once all of them exist, so cycles through
+    closures, cells and instances need no recursion. Tuples, being immutable, are built after
+    the tuples they contain.
+    """
+
+    def __init__(self, entries: List[Any], layouts: List[Any], natives: Registry) -> None:
+        self.entries = entries
+        self.layouts = layouts
+        self.natives = natives
+        self.objects: List[Any] = [None] * len(entries)
+
+    def read(self, root: int) -> Any:
+        entries, layouts, objects = self.entries, self.layouts, self.objects
+        tuples = []
+        for index, entry in enumerate(entries):
+            tag = entry[0]
+            if tag == PRIMITIVE:
+                objects[index] = entry[1]
+            elif tag == LIST:
+                objects[index] = []
+            elif tag == DICT:
+                objects[index] = {}
+            elif tag == SET:
+                objects[index] = set()
+            elif tag == TUPLE or tag == FROZENSET:
+                tuples.append(index)
+            elif tag == GLOBAL:
+                objects[index] = self.__global(entry[1], entry[2])
+            elif tag == NATIVE:
+                native = self.natives.get(entry[1])
+                if native is None:
+                    raise PyNoxImageError(f"The image uses the native '{entry[1]}', which isn't registered.")
+                objects[index] = native
+            elif tag == ARRAY:
+                objects[index] = array.array(entry[1], entry[2])
+            elif tag == PATH:
+                objects[index] = pathlib.Path(entry[1])
+
+        # Classes precede their members and instances in the table only by discovery order,
+        # so create objects once every global is known.
+        for index, entry in enumerate(entries):
+            tag = entry[0]
+            if tag == MEMBER:
+                objects[index] = objects[entry[1]][entry[2]]
+            elif tag == OBJECT:
+                cls = objects[layouts[entry[1]][0]]
+                objects[index] = cls.__new__(cls)
+
+        for index in tuples:
+            self.__build(index)
+
+        for index, entry in enumerate(entries):
+            tag = entry[0]
+            if tag == LIST:
+                objects[index].extend([objects[ref] for ref in entry[1]])
+            elif tag == DICT:
+                objects[index].update(zip([objects[ref] for ref in entry[1]], [objects[ref] for ref in entry[2]]))
+            elif tag == SET:
+                objects[index].update(objects[ref] for ref in entry[1])
+            elif tag == OBJECT:
+                obj = objects[index]
+                _, names, slotted = layouts[entry[1]]
+                values = [objects[ref] for ref in entry[2]]
+                if slotted:
+                    for name, value in zip(names, values):
+                        object.__setattr__(obj, name, value)
+                else:
+                    # Straight into the instance dictionary: frozen dataclasses such as `Token` refuse setattr.
+                    obj.__dict__.update(zip(names, values))
+        return objects[root]
+
+    def __global(self, module: str, qualname: str) -> Any:
+        try:
+            return _lookup(module, qualname)
+        except (ImportError, AttributeError):
+            raise PyNoxImageError(f"The image refers to '{module}.{qualname}', which no longer exists.")
+
+    def __build(self, index: int) -> None:
+        entries, objects = self.entries, self.objects
+        stack = [index]
+        while stack:
+            current = stack[-1]
+            if objects[current] is not None:
+                stack.pop()
+                continue
+            missing = [ref for ref in entries[current][1]
+                       if entries[ref][0] in (TUPLE, FROZENSET) and objects[ref] is None]
+            if missing:
+                stack.extend(missing)
+                continue
+            items = [objects[ref] for ref in entries[current][1]]
+            objects[current] = tuple(items) if entries[current][0] == TUPLE else frozenset(items)
+            stack.pop()
+
+
+def dump_heap(root: Any) -> bytes:
+    """
+    Serialize the object graph reachable from a value. Natives are stored by name.
+
+    :raises PyNoxImageError: If the graph holds a value that can't outlive the process, such as a
+                             host object a native returned.
+    """
+    writer = _Writer()
+    index = writer.write(root)
+    return marshal.dumps((IMAGE_FORMAT, writer.entries, writer.layouts, index))
+
+
+def load_heap(data: bytes, natives: Registry) -> Any:
+    """
+    Rebuild an object graph serialized by `dump_heap`.
+
+    :param data: The serialized graph.
+    :param natives: The registry natives are looked up in by name.
+    :raises PyNoxImageError: If the data was not written by this version of PyNox and Python, or
+                             refers to a host class or function outside PyNox.
+    """
+    try:
+        header, entries, layouts, root = marshal.loads(data)
+    except (EOFError, ValueError, TypeError) as error:
+        raise PyNoxImageError(f"Not a PyNox heap: {error}.")
+    if header != IMAGE_FORMAT:
+        raise PyNoxImageError("The heap was written by another PyNox or Python version.")
+
+    # Every object is created before any is filled in, so collections during the rebuild find no garbage.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _Reader(entries, layouts, natives).read(root)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def write_image(path: str | pathlib.Path, image: HeapImage) -> None:
+    """
+    Write a heap image to a file.
+
+    :raises PyNoxImageError: If the heap holds a value that can't outlive the process.
+    """
+    data = dump_heap((image.globals, frozenset(image.modules), image.frame_size, image.statements))
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read_image(path: str | pathlib.Path, natives: Registry) -> HeapImage:
+    """
+    Load a heap image written by `write_image`.
+
+    :param path: The image file.
+    :param natives: The registry the image's natives are looked up in by name.
+    :raises PyNoxImageError: If the file is not an image of this version of PyNox and Python.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        globals_, modules, frame_size, statements = load_heap(data, natives)
+    except OSError as error:
+        raise PyNoxImageError(f"Can't read image '{path}': {error}.")
+    except PyNoxImageError as error:
+        raise PyNoxImageError(f"Can't read image '{path}': {error.message}")
+    return HeapImage(globals_, modules, frame_size, statements)
@@ -0,0 +1,223 @@
+import copy
+import json
+import pathlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .expression import Assign, Call, Expr, Inline, Variable
+from .statements import Class, Function, Return
+from ..environment import Binding
+
+__all__ = ["CallProfile", "InlineDecision", "Inliner", "site_key"]
+
+# Calls a site must have received in the profiling run to be inlined.
+HOT_CALLS = 100
+# Largest callee body, in expression nodes, inlined at a hot site of a profile.
+MAX_INLINE_NODES = 16
+# Largest callee body inlined at every site when there is no profile.
+MAX_STATIC_NODES = 8
+
+
+def site_key(call: Call) -> Optional[str]:
+    """The name of a call site in a `CallProfile`: its line and the global it calls."""
+    if not isinstance(call.callee, Variable):
+        return None
+    return f"{call.paren.line}:{call.callee.name.lexeme}"
+
+
+def _children(node: Any) -> Iterable[Any]:
+    for value in vars(node).values():
+        if hasattr(value, "accept"):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if hasattr(item, "accept"):
+                    yield item
+
+
+def _size(node: Any) -> int:
+    return 1 + sum(_size(child) for child in _children(node))
+
+
+def _calls_itself(node: Any, name: str) -> bool:
+    if isinstance(node, Call) and isinstance(node.callee, Variable) and node.callee.name.lexeme == name:
+        return True
+    return any(_calls_itself(child, name) for child in _children(node))
+
+
+def _rebase(node: Any, slots: Sequence[int]) -> Any:
+    """Copy an expression, moving the locals of the callee's frame to their slots in the caller's."""
+    node = copy.copy(node)
+    for attribute, value in vars(node).items():
+        if hasattr(value, "accept"):
+            setattr(node, attribute, _rebase(value, slots))
+        elif isinstance(value, list):
+            setattr(node, attribute, [_rebase(item, slots) if hasattr(item, "accept") else item for item in value])
+    if isinstance(node, (Variable, Assign)) and node.binding is Binding.LOCAL:
+        node.slot = slots[node.slot]
+    return node
+
+
+@dataclass(kw_only=True, frozen=True)
+class InlineDecision:
+    line: int
+    caller: str
+    callee: str
+    inlined: bool
+    reason: str
+
+    def __str__(self) -> str:
+        verdict = "inlined" if self.inlined else "kept"
+        return f"line {self.line} in {self.caller}: call to {self.callee} {verdict} ({self.reason})"
+
+
+@dataclass(kw_only=True)
+class CallProfile:
+    """
+    How many calls each call site of a program received in a profiling run, by `site_key`.
+    """
+
+    counts: Dict[str, int]
+
+    def record(self, counts: Dict[Call, int]) -> None:
+        """Add the counts a run collected per call node."""
+        for call, calls in counts.items():
+            key = site_key(call)
+            if key is not None:
+                self.counts[key] = self.counts.get(key, 0) + calls
+
+    def dump(self, path: str | pathlib.Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.counts, f, indent=1, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "CallProfile":
+        with open(path, "r") as f:
+            return cls(counts=json.load(f))
+
+
+class _Candidate:
+    """A top-level function that may be inlined, or why it may not."""
+
+    __slots__ = ("declaration", "body", "size", "reason")
+
+    def __init__(self, declaration: Function) -> None:
+        self.declaration = declaration
+        self.body: Optional[Expr] = None
+        self.size = 0
+        code = declaration.code
+        if len(code) != 1 or not isinstance(code[0], Return) or code[0].value is None:
+            self.reason = "body is not a single return"
+        elif declaration.upvalues or declaration.boxed_params:
+            self.reason = "captures variables"
+        elif _calls_itself(code[0].value, declaration.name.lexeme):
+            self.reason = "recursive"
+        else:
+            self.reason = ""
+            # Copied before the inliner walks the callee's own body, which it may rewrite.
+            self.body = _rebase(code[0].value, range(len(declaration.params)))
+            self.size = _size(self.body)
+
+
+class Inliner:
+    """
+    Replaces calls to small global functions with a copy of their body, guarded on the global.
+
+    A function is a candidate if it is declared once at the top level of the program, is a
+    single ``return`` of an expression, captures nothing and doesn't call itself. With a
+    `CallProfile`, only the sites that received `HOT_CALLS` calls in the profiling run are
+    inlined; without one, the callee body must be smaller still.
+
+    Each inlined site gets its own slots past the end of the caller's frame for the callee's
+    parameters, so copies never clash with the caller's locals or with each other. The copy
+    runs once the caller is compiled, where it saves the call; the site checks that the global
+    still holds a function of the inlined declaration and makes the original call otherwise.
+    The tree walker always makes the call, since a hot callee runs compiled.
+    """
+
+    def __init__(self, profile: Optional[CallProfile] = None) -> None:
+        self.profile = profile
+        self.decisions: List[InlineDecision] = []
+        self.__candidates: Dict[str, _Candidate] = {}
+
+    def run(self, statements: List[Any], script_frame_size: int) -> int:
+        """
+        Inline the calls of a resolved program.
+
+        :param statements: The top-level statements.
+        :param script_frame_size: The size of the top-level frame.
+        :return: The size of the top-level frame with the slots of the sites inlined there.
+        """
+        declared: Dict[str, List[Function]] = {}
+        for stmt in statements:
+            if isinstance(stmt, Function) and stmt.binding is Binding.GLOBAL:
+                declared.setdefault(stmt.name.lexeme, []).append(stmt)
+        self.__candidates = {name: _Candidate(functions[0]) for name, functions in declared.items()
+                             if len(functions) == 1}
+
+        script = [script_frame_size]
+        for stmt in statements:
+            self.__walk(stmt, "<script>", script)
+        return script[0]
+
+    def __walk(self, node: Any, caller: str, frame: List[int]) -> None:
+        if isinstance(node, Inline):
+            # Inlined by an earlier run over the same cached program.
+            return None
+        if isinstance(node, Function):
+            size = [node.frame_size]
+            for stmt in node.body:
+                self.__walk(stmt, node.name.lexeme, size)
+            node.frame_size = size[0]
+            return None
+        if isinstance(node, Class):
+            for method in node.methods:
+                self.__walk(method, caller, frame)
+            return None
+
+        for attribute, value in vars(node).items():
+            if hasattr(value, "accept"):
+                self.__walk(value, caller, frame)
+                setattr(node, attribute, self.__site(value, caller, frame))
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    if hasattr(item, "accept"):
+                        self.__walk(item, caller, frame)
+                        value[index] = self.__site(item, caller, frame)
+
+    def __site(self, node: Any, caller: str, frame: List[int]) -> Any:
+        if not isinstance(node, Call) or not isinstance(node.callee, Variable):
+            return node
+        if node.callee.binding is not Binding.GLOBAL:
+            return node
+        candidate = self.__candidates.get(node.callee.name.lexeme)
+        if candidate is None:
+            return node
+
+        declaration = candidate.declaration
+        inlined, reason = False, candidate.reason
+        if reason:
+            pass
+        elif len(node.arguments) != len(declaration.params):
+            reason = "wrong number of arguments"
+        elif self.profile is not None:
+            calls = self.profile.counts.get(site_key(node), 0)
+            if calls < HOT_CALLS:
+                reason = f"cold, {calls} calls"
+            elif candidate.size > MAX_INLINE_NODES:
+                reason = f"too large, {candidate.size} nodes"
+            else:
+                inlined, reason = True, f"hot, {calls} calls"
+        elif candidate.size > MAX_STATIC_NODES:
+            reason = f"too large, {candidate.size} nodes"
+        else:
+            inlined, reason = True, f"small, {candidate.size} nodes"
+
+        self.decisions.append(InlineDecision(line=node.paren.line, caller=caller, callee=declaration.name.lexeme,
+                                             inlined=inlined, reason=reason))
+        if not inlined:
+            return node
+
+        slots = tuple(range(frame[0], frame[0] + len(declaration.params)))
+        frame[0] += len(slots)
+        return Inline(call=node, declaration=declaration, slots=slots, body=_rebase(candidate.body, slots))
@@ -1,73 +1,323 @@
-from typing import Any, Dict, List
+import pathlib
+from dataclasses import dataclass
+from types import ModuleType
+from types import GeneratorType
+from typing import Any, Callable, Dict, FrozenSet, Generator, List, Optional, Sequence, Tuple
 
-from ..environment import Environment
+from ..environment import Binding, Cell, Environment
 
-from .expression import Assign, Binary, Call, Expr, ExprVisitor, Grouping, Literal, Logical, Unary, Variable
-from .statements import Block, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
-from ..exceptions import PyNoxException, PyNoxReturnError, PyNoxRuntimeError
+from .expression import (Array, Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Index, Inline, Literal,
+                         Logical, Map, Set, SetIndex, Super, This, Unary, Variable)
+from .memory import MemoryProfiler
+from .quickening import SiteCounters, deoptimize, quicken, site_counters
+from .stackless import MAX_DEPTH, mark_suspending
+from .tiering import compile_function
+from .statements import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+from ..exceptions import PyNoxException, PyNoxRuntimeError
 from ..logger import Logger
-from ..lexer.tokens import KeywordTokens, OperatorTokenType, SingleCharTokenType, Token
-from ..utils.callable import PyNoxCallable, PyNoxFunction
+from ..lexer.tokens import KeywordTokens, OperatorTokenType, SingleCharTokenType, Token, TOKEN_CODES, code_table
+from ..utils.callable import PyNoxCallable, PyNoxClass, PyNoxFunction
+from ..utils.coroutines import Scheduler, Task
+from ..utils.instance import PyNoxInstance
+from ..builtins import NativeFunction, Registry, default_registry
+from ..builtins.array import PyNoxArray
+from ..builtins.hashmap import PyNoxMap
+from ..utils.rope import Rope, concat, is_string, stringify
+
+LOCAL, CELL, UPVALUE = Binding.LOCAL, Binding.CELL, Binding.UPVALUE
+# Token codes of the operators the interpreter tests for directly.
+_OR = TOKEN_CODES[KeywordTokens.OR]
+_BANG = TOKEN_CODES[OperatorTokenType.BANG]
+_MINUS = TOKEN_CODES[SingleCharTokenType.MINUS]
+
+
+@dataclass(kw_only=True, frozen=True)
+class AllocationCounters:
+    frames: int
+    argument_lists: int
 
 
 class Interpreter(ExprVisitor, StmtVisitor):
 
-    def __init__(self, logger: Logger) -> None:
+    def __init__(
+        self,
+        logger: Logger,
+        natives: Optional[Registry] = None,
+        stackless: bool = False,
+        max_depth: int = MAX_DEPTH,
+        profiler: Optional[MemoryProfiler] = None
+    ) -> None:
         self.__globals = Environment()
-        self.__locals: Dict[Expr, int] = {}
-        self.__env = self.__globals
+        self.__frame: List[Any] = []
+        self.__upvalues: Tuple[Cell, ...] = ()
+        self.__script_frame_size = 0
         self.__logger = logger
+        self.__binary_sites: List[Binary] = []
+        # Paths of the modules whose top-level code already ran in this interpreter.
+        self.__modules: set[pathlib.Path] = set()
+        self.__entries: Dict[Function, Optional[Callable[..., Any]]] = {}
+        self.__runtime: Optional[Dict[str, Any]] = None
+        self.stackless = stackless
+        self.max_depth = max_depth
+        self.__depth = 0
+        self.__frames_allocated = 0
+        self.__argument_lists = 0
+        self.__call_counts: Optional[Dict[Call, int]] = None
+        self.__scheduler: Optional[Scheduler] = None
+        # The value of the top-level `return` that ended the last program, see `Resolver.script_returns`.
+        self.result: Any = None
+        self.natives = natives if natives is not None else default_registry()
+        self.natives.install(self.__globals)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self.__globals.values)
+            self.register_native(profiler.mark, name="memorySnapshot", arity=1)
 
-    def interpret(self, statements: List[Stmt]):
+    def interpret(self, statements: List[Stmt]) -> bool:
+        """
+        Run a resolved program, logging the runtime error that stops it, if any.
+
+        :return: Whether the program ran to its end.
+        """
+        self.__frame = [None] * self.__script_frame_size
+        self.__upvalues = ()
+        self.result = None
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start()
+            profiler.enter("<script>", 0, self.__frame)
         try:
-            for stmt in statements:
-                self.__execute(stmt)
+            if self.stackless:
+                mark_suspending(statements)
+                completion = self.__run_tasks(self.__run_suspending(statements))
+            else:
+                for stmt in statements:
+                    completion = self.__execute(stmt)
+                    if completion is not None:
+                        break
+                else:
+                    completion = None
+            if completion is not None:
+                self.result = completion[0]
+            return True
         except PyNoxRuntimeError as error:
             self.__logger.error(str(error))
+        except RecursionError:
+            self.__logger.error(str(PyNoxRuntimeError("Stack overflow.")))
+        finally:
+            if profiler is not None:
+                profiler.snapshot("exit")
+                profiler.leave()
+                profiler.stop()
+        return False
+
+    def register_native(
+        self,
+        function: Callable[..., Any],
+        *,
+        name: Optional[str] = None,
+        arity: Optional[int] = None,
+        pass_interpreter: bool = False,
+        suspends: bool = False
+    ) -> NativeFunction:
+        """Expose a host function to Lox as a global."""
+        fn = self.natives.register(function, name=name, arity=arity, pass_interpreter=pass_interpreter,
+                                   suspends=suspends)
+        self.__globals.values[fn.name] = fn
+        return fn
+
+    def register_module(self, module: ModuleType, prefix: str = "") -> List[str]:
+        """Expose every `native`-decorated function of a module to Lox as globals."""
+        names = self.natives.register_module(module, prefix=prefix)
+        for name in names:
+            self.__globals.values[name] = self.natives.get(name)
+        return names
+
+    def spawn(self, function: PyNoxFunction) -> Task:
+        """
+        Start calling a Lox function of no arguments as a task, which runs once the calling task
+        suspends.
+
+        :raises PyNoxRuntimeError: If the interpreter isn't running a stackless program.
+        """
+        if self.__scheduler is None:
+            raise PyNoxRuntimeError("'spawn' needs the stackless evaluator.")
+        return self.__scheduler.spawn(self.__suspend_function(function, []), [], ())
+
+    def record_calls(self, counts: Dict[Call, int]) -> None:
+        """
+        Count the calls made at every call site into `counts` from now on. Functions stay in the
+        tree walker instead of tiering up, so no call bypasses the count.
+        """
+        self.__call_counts = counts
+        # Shadow the visitor method on this interpreter only, so uncounted runs pay nothing.
+        self.visit_call_expr = self.__counted_call
+
+    def __counted_call(self, expression: Call) -> Any:
+        counts = self.__call_counts
+        counts[expression] = counts.get(expression, 0) + 1
+        return Interpreter.visit_call_expr(self, expression)
+
+    def allocation_counters(self) -> AllocationCounters:
+        """Report how many call frames and argument lists the interpreter allocated."""
+        return AllocationCounters(frames=self.__frames_allocated, argument_lists=self.__argument_lists)
+
+    def specialization_counters(self) -> List[SiteCounters]:
+        """Report the quickening state and counters of every binary operator site executed so far."""
+        return [site_counters(site) for site in self.__binary_sites]
 
     def error(self, token: "Token", message: str) -> str:
         """Raise a runtime error."""
         error_ = f"{str(message)}"
         return f"RuntimeError at line {token.line}: {error_}"
 
-    def look_up_variable(self, name: Token, expression: Expr) -> Any:
-        distance = self.__locals.get(expression)
-        if distance is not None:
-            return self.__env.get_at(distance=distance, lexeme=name.lexeme)
+    def look_up_variable(self, name: Token, binding: Binding, slot: int) -> Any:
+        if binding is LOCAL:
+            return self.__frame[slot]
+        if binding is CELL:
+            return self.__frame[slot].value
+        if binding is UPVALUE:
+            return self.__upvalues[slot].value
         return self.__globals.get(name=name)
 
-    def _resolve(self, expression: Expr, depth: int) -> None:
-        self.__locals[expression] = depth
+    def _tier_up(self, declaration: Function, method: bool) -> Optional[Callable[..., Any]]:
+        """
+        Return the Python function a hot declaration was compiled to, bound to this interpreter.
+
+        :param declaration: The function declaration that crossed the call threshold.
+        :param method: Whether the function is called with its receiver in slot 0.
+        :return: The compiled function, or None if the body stays interpreted.
+        """
+        if self.profiler is not None or self.__call_counts is not None:
+            return None
+        if declaration in self.__entries:
+            return self.__entries[declaration]
+
+        tier = compile_function(declaration, method)
+        entry = tier.instantiate(self.__tier_runtime()) if tier is not None else None
+        self.__entries[declaration] = entry
+        return entry
+
+    def __tier_runtime(self) -> Dict[str, Any]:
+        if self.__runtime is None:
+            globals_ = self.__globals
+
+            def assign_global(name: Token, value: Any) -> Any:
+                globals_.assign(name=name, value=value)
+                return value
+
+            def store_cell(cell: Cell, value: Any) -> Any:
+                cell.value = value
+                return value
+
+            self.__runtime = {
+                "G": globals_.values,
+                "NUM": (int, float),
+                "PyNoxFunction": PyNoxFunction,
+                "PyNoxInstance": PyNoxInstance,
+                "load_global": globals_.get,
+                "assign_global": assign_global,
+                "store_cell": store_cell,
+                "emit": self.__print,
+                "negate": self.__negate,
+                "binary": self.__binary_generic,
+                "call": self.__call_value,
+                "get_property": self.__get_property,
+                "index": self.__index,
+                "set_index": self.__set_index,
+            }
+        return self.__runtime
 
-    def __stringfy(self, obj: Any) -> str:
-        if not obj:
-            return str(KeywordTokens.NIL)
-        if isinstance(obj, bool):
-            return str(obj).lower()
-        return str(obj)
+    @property
+    def script_frame_size(self) -> int:
+        return self.__script_frame_size
+
+    def _image_state(self) -> Tuple[Dict[str, Any], FrozenSet[pathlib.Path], int]:
+        """Return what a heap image stores: the globals, the modules that ran and the top-level frame size."""
+        return dict(self.__globals.values), frozenset(self.__modules), self.__script_frame_size
+
+    def _boot(self, globals_: Dict[str, Any], modules: FrozenSet[pathlib.Path], frame_size: int) -> None:
+        """Restore the state of a heap image in place of running its prelude."""
+        self.__globals.values.update(globals_)
+        self.__modules.update(modules)
+        self._resolve_script(frame_size=frame_size)
+
+    def _reset(self, inputs: Dict[str, Any]) -> None:
+        """Forget the globals and modules of earlier runs, defining the natives and the given inputs instead."""
+        values = self.__globals.values
+        values.clear()
+        self.natives.install(self.__globals)
+        values.update(inputs)
+        self.__modules.clear()
+
+    def _resolve_script(self, frame_size: int) -> None:
+        self.__script_frame_size = max(self.__script_frame_size, frame_size)
+        if len(self.__frame) < frame_size:
+            self.__frame.extend([None] * (frame_size - len(self.__frame)))
+
+    def __store(self, name: Token, binding: Binding, slot: int, value: Any) -> None:
+        if binding is LOCAL:
+            self.__frame[slot] = value
+        elif binding is CELL:
+            cell = self.__frame[slot] = Cell(value)
+            if self.profiler is not None:
+                self.profiler.allocated(cell, name.line)
+        else:
+            self.__globals.define(name=name, value=value)
+
+    def __capture(self, upvalues: Sequence[Tuple[bool, int]]) -> Tuple[Cell, ...]:
+        frame, enclosing = self.__frame, self.__upvalues
+        return tuple(frame[index] if is_local else enclosing[index] for is_local, index in upvalues)
 
     def __evaluate(self, expression: Expr):
         return expression.accept(self)
 
-    def __execute(self, stmt: Stmt) -> None:
-        stmt.accept(self)
+    def __execute(self, stmt: Stmt) -> Optional[Tuple[Any]]:
+        return stmt.accept(self)
+
+    def _execute_body(self, stmts: Sequence[Stmt], frame: List[Any], upvalues: Tuple[Cell, ...]) -> Any:
+        """
+        Run a function body or a module in its own frame.
+
+        Statements return None, or a one-element tuple holding the value of the `return` that ended
+        the body, so returning unwinds through plain Python returns instead of an exception.
 
-    def _execute_block(self, stmts: List[Stmt], env: Environment) -> None:
-        previous: Environment = self.__env
+        :return: The returned value, or None if the body ran to its end.
+        """
+        previous_frame, previous_upvalues = self.__frame, self.__upvalues
         try:
-            self.__env = env
+            self.__frame, self.__upvalues = frame, upvalues
             for stmt in stmts:
-                self.__execute(stmt)
+                completion = stmt.accept(self)
+                if completion is not None:
+                    return completion[0]
+            return None
         finally:
-            self.__env = previous
-    def visit_block_stmt(self, stmt: Block) -> None:
-        self._execute_block(stmt.statements, Environment(self.__env))
+            self.__frame, self.__upvalues = previous_frame, previous_upvalues
+
+    def _new_frame(self, size: int) -> List[Any]:
+        self.__frames_allocated += 1
+        return [None] * size
+
+    def visit_block_stmt(self, stmt: Block) -> Optional[Tuple[Any]]:
+        for statement in stmt.code:
+            completion = statement.accept(self)
+            if completion is not None:
+                return completion
+        if stmt.slots:
+            frame = self.__frame
+            for slot in stmt.slots:
+                frame[slot] = None
         return None
 
     def __is_truthy(self, obj: Any):
         return bool(obj)
 
     def __is_equal(self, left: Any, right: Any):
+        if type(left) is Rope:
+            left = left.flatten()
+        if type(right) is Rope:
+            right = right.flatten()
         if type(left) != type(right):
             return False
         return left == right
@@ -83,51 +333,129 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return None
 
     def visit_function_stmt(self, stmt: Function) -> None:
-        fn: PyNoxFunction = PyNoxFunction(declaration=stmt, closure=self.__env, is_initializer=False)
-        self.__env.define(name=stmt.name, value=fn)
+        if stmt.binding is CELL:
+            # Create the cell first so a recursive local function can capture its own name.
+            cell = self.__frame[stmt.slot] = Cell()
+            cell.value = PyNoxFunction(declaration=stmt, upvalues=self.__capture(stmt.upvalues))
+            if self.profiler is not None:
+                self.profiler.allocated(cell, stmt.name.line)
+                self.profiler.allocated(cell.value, stmt.name.line)
+            return None
+
+        fn: PyNoxFunction = PyNoxFunction(declaration=stmt, upvalues=self.__capture(stmt.upvalues))
+        if self.profiler is not None:
+            self.profiler.allocated(fn, stmt.name.line)
+        self.__store(stmt.name, stmt.binding, stmt.slot, fn)
+
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        superclass = None
+        if stmt.superclass is not None:
+            superclass = self.__evaluate(stmt.superclass)
+            if not isinstance(superclass, PyNoxClass):
+                raise PyNoxRuntimeError(self.error(stmt.superclass.name, "Superclass must be a class."))
 
+        self.__store(stmt.name, stmt.binding, stmt.slot, None)
+        if superclass is not None:
+            self.__store(stmt.name, stmt.super_binding, stmt.super_slot, superclass)
 
-    def visit_if_stmt(self, stmt: If) -> None:
+        methods: Dict[str, PyNoxFunction] = {
+            method.name.lexeme: PyNoxFunction(declaration=method, upvalues=self.__capture(method.upvalues),
+                                              is_initializer=method.name.lexeme == "init")
+            for method in stmt.methods
+        }
+        klass = PyNoxClass(name=stmt.name.lexeme, superclass=superclass, methods=methods)
+        if self.profiler is not None:
+            for method in stmt.methods:
+                self.profiler.allocated(methods[method.name.lexeme], method.name.line)
+            self.profiler.allocated(klass, stmt.name.line)
+        if stmt.binding is LOCAL:
+            self.__frame[stmt.slot] = klass
+        elif stmt.binding is CELL:
+            self.__frame[stmt.slot].value = klass
+        else:
+            self.__globals.assign(name=stmt.name, value=klass)
+        return None
+
+    def visit_if_stmt(self, stmt: If) -> Optional[Tuple[Any]]:
         if self.__is_truthy(self.__evaluate(stmt.condition)):
-            self.__execute(stmt.then_branch)
+            return self.__execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self.__execute(stmt.else_branch)
+            return self.__execute(stmt.else_branch)
+        return None
+
+    def visit_import_stmt(self, stmt: Import) -> None:
+        module = stmt.module
+        if module.path in self.__modules:
+            return None
+        self.__modules.add(module.path)
+        frame = [None] * module.frame_size
+        if self.profiler is None:
+            self._execute_body(module.statements, frame, ())
+            return None
+
+        self.profiler.enter(f"<module {module.path.name}>", stmt.keyword.line, frame)
+        try:
+            self._execute_body(module.statements, frame, ())
+        finally:
+            self.profiler.leave()
         return None
 
     def visit_print_stmt(self, stmt: Print) -> None:
-        value = self.__evaluate(stmt.expression)
-        self.__logger.info(self.__stringfy(value))
+        self.__print(self.__evaluate(stmt.expression))
         return None
 
-    def visit_return_stmt(self, stmt: Return) -> None:
+    def __print(self, value: Any) -> None:
+        self.__logger.info(stringify(value))
+
+    def visit_return_stmt(self, stmt: Return) -> Tuple[Any]:
         value = None
 
         if stmt.value is not None:
             value = self.__evaluate(stmt.value)
 
-        raise PyNoxReturnError(self.error(stmt.keyword, f"{stmt.keyword} Return {self.__stringfy(value)}"), value=value)
+        return (value,)
 
     def visit_var_stmt(self, stmt: Var) -> None:
         value = None
         if stmt.initializer is not None:
             value = self.__evaluate(stmt.initializer)
-        self.__env.define(name=stmt.name, value=value)
+        self.__store(stmt.name, stmt.binding, stmt.slot, value)
         return None
 
-    def visit_while_stmt(self, stmt: While) -> None:
-        while self.__is_truthy(self.__evaluate(stmt.condition)):
-            self.__execute(stmt.body)
+    def visit_while_stmt(self, stmt: While) -> Optional[Tuple[Any]]:
+        condition, code = stmt.condition, stmt.code
+        while condition.accept(self):
+            for statement in code:
+                completion = statement.accept(self)
+                if completion is not None:
+                    return completion
+        if stmt.slots:
+            frame = self.__frame
+            for slot in stmt.slots:
+                frame[slot] = None
         return None
 
     def visit_variable_expr(self, expression: Variable) -> Any:
-        return self.look_up_variable(expression.name, expression)
+        binding = expression.binding
+        if binding is LOCAL:
+            return self.__frame[expression.slot]
+        if binding is CELL:
+            return self.__frame[expression.slot].value
+        if binding is UPVALUE:
+            return self.__upvalues[expression.slot].value
+        return self.__globals.get(name=expression.name)
 
     def visit_assign_expr(self, expression: Assign) -> Any:
         value = self.__evaluate(expression.value)
-        distance: int = self.__locals.get(expression)
+        binding = expression.binding
 
-        if distance is not None:
-            self.__env.assign_at(distance=distance, name=expression.name, value=value)
+        if binding is LOCAL:
+            self.__frame[expression.slot] = value
+        elif binding is CELL:
+            self.__frame[expression.slot].value = value
+        elif binding is UPVALUE:
+            self.__upvalues[expression.slot].value = value
         else:
             self.__globals.assign(name=expression.name, value=value)
         return value
@@ -138,7 +466,7 @@ class Interpreter(ExprVisitor, StmtVisitor):
     def visit_logical_expr(self, expression: Logical) -> Any:
         left = self.__evaluate(expression.left)
 
-        if expression.operator.token_type == KeywordTokens.OR:
+        if expression.operator.code == _OR:
             if self.__is_truthy(left):
                 return left
         else:
@@ -153,68 +481,645 @@ class Interpreter(ExprVisitor, StmtVisitor):
     def visit_unary(self, expression: Unary) -> Any:
         right = self.__evaluate(expression.right)
 
-        match expression.operator.token_type:
-            case OperatorTokenType.BANG:
-                return not self.__is_truthy(right)
-            case SingleCharTokenType.MINUS:
-                self.__check_number_operand(expression.operator, right)
-                return -right
+        code = expression.operator.code
+        if code == _BANG:
+            return not self.__is_truthy(right)
+        if code == _MINUS:
+            return self.__negate(expression, right)
         return None
 
+    def __negate(self, expression: Unary, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right)
+        return -right
+
     def visit_binary(self, expression: Binary) -> Any:
         left = self.__evaluate(expression.left)
         right = self.__evaluate(expression.right)
 
-        match expression.operator.token_type:
-            case OperatorTokenType.GREATER:
-                self.__check_number_operand(expression.operator, right, left)
-                return left > right
-            case OperatorTokenType.GREATER_EQUAL:
-                self.__check_number_operand(expression.operator, right, left)
-                return left >= right
-            case OperatorTokenType.LESS:
-                self.__check_number_operand(expression.operator, right, left)
-                return left < right
-            case OperatorTokenType.LESS_EQUAL:
-                self.__check_number_operand(expression.operator, right, left)
-                return left <= right
-            case OperatorTokenType.BANG_EQUAL:
-                return not self.__is_equal(left, right)
-            case OperatorTokenType.EQUAL_EQUAL:
-                return self.__is_equal(left, right)
-            case SingleCharTokenType.MINUS:
-                self.__check_number_operand(expression.operator, right, left)
-                return left - right
-            case SingleCharTokenType.PLUS:
-                if type(left) in (int, float) and type(right) in (int, float):
-                    return left + right
-
-                if isinstance(left, str) and isinstance(right, str):
-                    return str(left) + str(right)
-
-                raise RuntimeError(f"{expression.operator}. Operands must be two numbers or two strings.")
-            case SingleCharTokenType.SLASH:
-                self.__check_number_operand(expression.operator, right, left)
-                return left / right
-            case SingleCharTokenType.STAR:
-                return left * right
+        specialized = expression.specialized
+        if specialized is not None:
+            if type(left) is specialized.left and type(right) is specialized.right:
+                expression.hits += 1
+                return specialized.operation(left, right)
+            deoptimize(expression)
+        elif expression.generic_runs == 0:
+            self.__binary_sites.append(expression)
+
+        result = self.__binary_generic(expression, left, right)
+        quicken(expression, left, right)
+        return result
+
+    def __binary_generic(self, expression: Binary, left: Any, right: Any) -> Any:
+        return self.__binary_operations[expression.operator.code](self, expression, left, right)
+
+    def __greater(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left > right
+
+    def __greater_equal(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left >= right
+
+    def __less(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left < right
+
+    def __less_equal(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left <= right
+
+    def __not_equal(self, expression: Binary, left: Any, right: Any) -> Any:
+        return not self.__is_equal(left, right)
+
+    def __equal(self, expression: Binary, left: Any, right: Any) -> Any:
+        return self.__is_equal(left, right)
+
+    def __subtract(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left - right
+
+    def __add(self, expression: Binary, left: Any, right: Any) -> Any:
+        if type(left) in (int, float) and type(right) in (int, float):
+            return left + right
+
+        if is_string(left) and is_string(right):
+            return concat(left, right)
+
+        raise PyNoxRuntimeError(
+            self.error(expression.operator, "Operands must be two numbers or two strings.")
+        )
+
+    def __divide(self, expression: Binary, left: Any, right: Any) -> Any:
+        self.__check_number_operand(expression.operator, right, left)
+        return left / right
 
+    def __multiply(self, expression: Binary, left: Any, right: Any) -> Any:
+        return left * right
+
+    def __no_operation(self, expression: Binary, left: Any, right: Any) -> Any:
         return None
 
     def visit_call_expr(self, expression: Call) -> Any:
         callee = self.__evaluate(expression.callee)
+
+        if type(callee) is PyNoxFunction and callee.entry is None and len(expression.arguments) == callee.param_count:
+            # Evaluate the arguments straight into the callee's frame.
+            self.__frames_allocated += 1
+            frame = [None] * callee.declaration.frame_size
+            slot = 0
+            if callee.receiver is not None:
+                frame[0] = callee.receiver
+                slot = 1
+            for argument in expression.arguments:
+                frame[slot] = argument.accept(self)
+                slot += 1
+            return callee.invoke(self, frame)
+
+        self.__argument_lists += 1
         arguments = [self.__evaluate(arg) for arg in expression.arguments]
 
+        native = expression.native
+        if native is not None and callee is native:
+            return native.function(*arguments)
+        return self.__call_value(expression, callee, arguments)
+
+    def visit_inline_expr(self, expression: Inline) -> Any:
+        # The tree walker keeps the call: it runs the callee compiled once it is hot, which beats
+        # walking the copy. The copy pays off in compiled callers, where it removes the call.
+        return self.visit_call_expr(expression.call)
+
+    def __call_value(self, expression: Call, callee: Any, arguments: List[Any]) -> Any:
         if not isinstance(callee, PyNoxCallable):
-            raise PyNoxRuntimeError(f"{expression.paren}, Can only call function and classes")
+            raise PyNoxRuntimeError(self.error(expression.paren, "Can only call functions and classes."))
 
         if len(arguments) != callee.arity:
-            raise PyNoxRuntimeError(f"Expected {callee.arity} arguments but got {len(arguments)}")
+            raise PyNoxRuntimeError(
+                self.error(expression.paren, f"Expected {callee.arity} arguments but got {len(arguments)}.")
+            )
+
+        if self.profiler is not None and type(callee) is PyNoxClass:
+            instance = callee(self, arguments)
+            self.profiler.allocated(instance, expression.paren.line)
+            return instance
+        return callee(self, arguments)
+
+    def visit_array_expr(self, expression: Array) -> Any:
+        try:
+            array = PyNoxArray.of(self.__evaluate(element) for element in expression.elements)
+        except PyNoxRuntimeError as error:
+            raise PyNoxRuntimeError(self.error(expression.bracket, error.message))
+        if self.profiler is not None:
+            self.profiler.allocated(array, expression.bracket.line)
+        return array
+
+    def visit_map_expr(self, expression: Map) -> Any:
+        values = PyNoxMap.of(
+            (self.__evaluate(key), self.__evaluate(value)) for key, value in zip(expression.keys, expression.values)
+        )
+        if self.profiler is not None:
+            self.profiler.allocated(values, expression.brace.line)
+        return values
+
+    def visit_index_expr(self, expression: Index) -> Any:
+        return self.__index(expression, self.__evaluate(expression.obj), self.__evaluate(expression.index))
+
+    def __index(self, expression: Index, obj: Any, index: Any) -> Any:
+        if not isinstance(obj, (PyNoxArray, PyNoxMap)):
+            raise PyNoxRuntimeError(self.error(expression.bracket, "Only arrays and maps can be indexed."))
+        try:
+            return obj.get(index)
+        except PyNoxRuntimeError as error:
+            raise PyNoxRuntimeError(self.error(expression.bracket, error.message))
+
+    def visit_set_index_expr(self, expression: SetIndex) -> Any:
+        obj = self.__evaluate(expression.obj)
+        index = self.__evaluate(expression.index)
+        return self.__set_index(expression, obj, index, self.__evaluate(expression.value))
+
+    def __set_index(self, expression: SetIndex, obj: Any, index: Any, value: Any) -> Any:
+        if not isinstance(obj, (PyNoxArray, PyNoxMap)):
+            raise PyNoxRuntimeError(self.error(expression.bracket, "Only arrays and maps can be indexed."))
+        try:
+            return obj.set(index, value)
+        except PyNoxRuntimeError as error:
+            raise PyNoxRuntimeError(self.error(expression.bracket, error.message))
 
+    def visit_get_expr(self, expression: Get) -> Any:
+        obj = self.__evaluate(expression.obj)
+
+        if type(obj) is PyNoxInstance:
+            cache = expression.cache
+            if cache is not None and cache[0] is obj.shape:
+                if cache[2] is None:
+                    return obj.slots[cache[1]]
+                return cache[2].bind(obj)
+        return self.__get_property(expression, obj)
+
+    def __get_property(self, expression: Get, obj: Any) -> Any:
+        if type(obj) is not PyNoxInstance:
+            raise PyNoxRuntimeError(self.error(expression.name, "Only instances have properties."))
+
+        shape = obj.shape
+        name = expression.name.lexeme
+
+        slot = shape.fields.get(name)
+        if slot is not None:
+            expression.cache = (shape, slot, None)
+            return obj.slots[slot]
+
+        method = shape.klass.find_method(name)
+        if method is not None:
+            expression.cache = (shape, -1, method)
+            return method.bind(obj)
+
+        raise PyNoxRuntimeError(self.error(expression.name, f"Undefined property '{name}'."))
+
+    def visit_set_expr(self, expression: Set) -> Any:
+        obj = self.__evaluate(expression.obj)
+
+        if type(obj) is not PyNoxInstance:
+            raise PyNoxRuntimeError(self.error(expression.name, "Only instances have fields."))
+
+        return self.__set_field(expression, obj, self.__evaluate(expression.value))
+
+    def __set_field(self, expression: Set, obj: PyNoxInstance, value: Any) -> Any:
+        shape = obj.shape
+        cache = expression.cache
+        if cache is None or cache[0] is not shape:
+            slot = shape.fields.get(expression.name.lexeme)
+            if slot is not None:
+                cache = (shape, slot, shape)
+            else:
+                cache = (shape, len(shape.fields), shape.with_field(expression.name.lexeme))
+            expression.cache = cache
+
+        slot = cache[1]
+        if cache[2] is shape:
+            obj.slots[slot] = value
+        else:
+            obj.slots.append(value)
+            obj.shape = cache[2]
+        return value
+
+    def visit_this_expr(self, expression: This) -> Any:
+        return self.look_up_variable(expression.keyword, expression.binding, expression.slot)
+
+    def visit_super_expr(self, expression: Super) -> Any:
+        superclass: PyNoxClass = self.look_up_variable(expression.keyword, expression.binding, expression.slot)
+        obj = self.look_up_variable(expression.keyword, expression.this_binding, expression.this_slot)
+
+        cache = expression.cache
+        if cache is None or cache[0] is not superclass:
+            method = superclass.find_method(expression.method.lexeme)
+            if method is None:
+                raise PyNoxRuntimeError(
+                    self.error(expression.method, f"Undefined property '{expression.method.lexeme}'.")
+                )
+            cache = (superclass, method)
+            expression.cache = cache
+
+        return cache[1].bind(obj)
+
+    # Stackless evaluation. Nodes flagged by `mark_suspending` run as generators that yield the
+    # body of every Lox function they call; `__trampoline` drives those bodies from an explicit
+    # stack, so the Lox call depth never turns into Python recursion. Everything else still goes
+    # through the recursive visitors above. A program runs as the first of its tasks: each task
+    # has a stack of its own, and yields a scheduler request instead of a body to suspend.
+
+    def __run_tasks(self, body: Generator[Any, Any, Any]) -> Any:
+        scheduler = self.__scheduler = Scheduler()
+        main = scheduler.spawn(body, self.__frame, self.__upvalues)
+        try:
+            while (task := scheduler.next()) is not None:
+                scheduler.current = task
+                self.__frame, self.__upvalues, self.__depth = task.frame, task.upvalues, task.depth
+                request = self.__trampoline(task)
+                task.frame, task.upvalues, task.depth = self.__frame, self.__upvalues, self.__depth
+                if request is not None:
+                    request.park(scheduler, task)
+        finally:
+            self.__scheduler = None
+            # Unwinding the calls of unfinished tasks restores frames on the way out.
+            scheduler.close()
+            self.__frame, self.__upvalues, self.__depth = main.frame, main.upvalues, 0
+        return main.result
+
+    def __trampoline(self, task: Task) -> Any:
+        """
+        Run a task until it finishes or suspends.
+
+        :return: The request the task suspended on, or None once it finished.
+        """
+        stack = task.stack
+        value, error = task.value, task.error
+        while True:
+            try:
+                if error is None:
+                    request = stack[-1].send(value)
+                else:
+                    request, error = stack[-1].throw(error), None
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    self.__scheduler.finish(task, stop.value)
+                    return None
+                value = stop.value
+                continue
+            except Exception as exception:
+                stack.pop()
+                if not stack:
+                    raise
+                if isinstance(exception, PyNoxException):
+                    # Lox errors carry their own location; dropping the Python traceback keeps
+                    # unwinding a deep stack linear.
+                    exception = exception.with_traceback(None)
+                error = exception
+                continue
+            if type(request) is not GeneratorType:
+                return request
+            stack.append(request)
+            value = None
+
+    def __run_suspending(self, stmts: Sequence[Stmt]) -> Generator[Any, Any, Optional[Tuple[Any]]]:
+        for stmt in stmts:
+            if stmt.suspends:
+                completion = yield from self.__suspend_stmt[type(stmt)](self, stmt)
+            else:
+                completion = stmt.accept(self)
+            if completion is not None:
+                return completion
+        return None
+
+    def __suspend_function(self, function: PyNoxFunction, arguments: List[Any],
+                           frame: Optional[List[Any]] = None) -> Generator[Any, Any, Any]:
+        declaration = function.declaration
+        if frame is None:
+            self.__frames_allocated += 1
+            frame = [None] * declaration.frame_size
+            if function.receiver is None:
+                frame[:len(arguments)] = arguments
+            else:
+                frame[0] = function.receiver
+                frame[1:len(arguments) + 1] = arguments
+        for slot in declaration.boxed_params:
+            frame[slot] = Cell(frame[slot])
+
+        previous_frame, previous_upvalues = self.__frame, self.__upvalues
+        self.__frame, self.__upvalues = frame, function.upvalues
+        self.__depth += 1
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enter(declaration.name.lexeme, declaration.name.line, frame)
+        try:
+            completion = None
+            for stmt in declaration.code:
+                if stmt.suspends:
+                    completion = yield from self.__suspend_stmt[type(stmt)](self, stmt)
+                else:
+                    completion = stmt.accept(self)
+                if completion is not None:
+                    break
+        finally:
+            self.__frame, self.__upvalues = previous_frame, previous_upvalues
+            self.__depth -= 1
+            if profiler is not None:
+                profiler.leave()
+        if function.is_initializer:
+            return function.receiver
+        return completion[0] if completion is not None else None
+
+    def __suspend_call(self, expression: Call) -> Generator[Any, Any, Any]:
+        if self.__call_counts is not None:
+            self.__call_counts[expression] = self.__call_counts.get(expression, 0) + 1
+        callee = expression.callee
+        if callee.suspends:
+            callee = yield from self.__suspend_expr[type(callee)](self, callee)
+        else:
+            callee = callee.accept(self)
+
+        if type(callee) is PyNoxFunction and callee.declaration.body_suspends \
+                and len(expression.arguments) == callee.param_count:
+            # Evaluate the arguments straight into the callee's frame, as the tree walker does.
+            self.__frames_allocated += 1
+            frame = [None] * callee.declaration.frame_size
+            slot = 0
+            if callee.receiver is not None:
+                frame[0] = callee.receiver
+                slot = 1
+            for argument in expression.arguments:
+                if argument.suspends:
+                    frame[slot] = yield from self.__suspend_expr[type(argument)](self, argument)
+                else:
+                    frame[slot] = argument.accept(self)
+                slot += 1
+            if self.__depth >= self.max_depth:
+                raise PyNoxRuntimeError(self.error(expression.paren, "Stack overflow."))
+            return (yield self.__suspend_function(callee, (), frame))
+
+        arguments = []
+        for argument in expression.arguments:
+            if argument.suspends:
+                argument = yield from self.__suspend_expr[type(argument)](self, argument)
+            else:
+                argument = argument.accept(self)
+            arguments.append(argument)
+
+        native = expression.native
+        if native is not None and callee is native:
+            return native.function(*arguments)
+
+        if type(callee) is NativeFunction and callee.suspends and len(arguments) == callee.arity:
+            return (yield callee.function(self, *arguments) if callee.pass_interpreter else callee.function(*arguments))
+
+        if type(callee) is PyNoxFunction and len(arguments) == callee.param_count:
+            # A body that calls nothing can neither suspend nor nest: run it like the tree walker.
+            return callee(self, arguments)
+
+        if type(callee) is PyNoxClass and len(arguments) == callee.arity:
+            instance = PyNoxInstance(callee.root_shape)
+            initializer = callee.find_method("init")
+            if initializer is not None and not initializer.declaration.body_suspends:
+                initializer.bind(instance)(self, arguments)
+            elif initializer is not None:
+                if self.__depth >= self.max_depth:
+                    raise PyNoxRuntimeError(self.error(expression.paren, "Stack overflow."))
+                yield self.__suspend_function(initializer.bind(instance), arguments)
+            if self.profiler is not None:
+                self.profiler.allocated(instance, expression.paren.line)
+            return instance
+
+        return self.__call_value(expression, callee, arguments)
+
+    def __suspend_inline(self, expression: Inline) -> Generator[Any, Any, Any]:
+        return (yield from self.__suspend_call(expression.call))
+
+    def __suspend_binary(self, expression: Binary) -> Generator[Any, Any, Any]:
+        left = expression.left
+        left = (yield from self.__suspend_expr[type(left)](self, left)) if left.suspends else left.accept(self)
+        right = expression.right
+        right = (yield from self.__suspend_expr[type(right)](self, right)) if right.suspends else right.accept(self)
+
+        specialized = expression.specialized
+        if specialized is not None:
+            if type(left) is specialized.left and type(right) is specialized.right:
+                expression.hits += 1
+                return specialized.operation(left, right)
+            deoptimize(expression)
+        elif expression.generic_runs == 0:
+            self.__binary_sites.append(expression)
+
+        result = self.__binary_generic(expression, left, right)
+        quicken(expression, left, right)
+        return result
+
+    def __suspend_logical(self, expression: Logical) -> Generator[Any, Any, Any]:
+        left = expression.left
+        left = (yield from self.__suspend_expr[type(left)](self, left)) if left.suspends else left.accept(self)
+        if expression.operator.code == _OR:
+            if self.__is_truthy(left):
+                return left
+        elif not self.__is_truthy(left):
+            return left
+        right = expression.right
+        return (yield from self.__suspend_expr[type(right)](self, right)) if right.suspends else right.accept(self)
+
+    def __suspend_unary(self, expression: Unary) -> Generator[Any, Any, Any]:
+        right = expression.right
+        right = (yield from self.__suspend_expr[type(right)](self, right)) if right.suspends else right.accept(self)
+        if expression.operator.code == _BANG:
+            return not self.__is_truthy(right)
+        return self.__negate(expression, right)
+
+    def __suspend_grouping(self, expression: Grouping) -> Generator[Any, Any, Any]:
+        inner = expression.expression
+        return (yield from self.__suspend_expr[type(inner)](self, inner)) if inner.suspends else inner.accept(self)
+
+    def __suspend_assign(self, expression: Assign) -> Generator[Any, Any, Any]:
+        value = expression.value
+        value = (yield from self.__suspend_expr[type(value)](self, value)) if value.suspends else value.accept(self)
+        binding = expression.binding
+        if binding is LOCAL:
+            self.__frame[expression.slot] = value
+        elif binding is CELL:
+            self.__frame[expression.slot].value = value
+        elif binding is UPVALUE:
+            self.__upvalues[expression.slot].value = value
+        else:
+            self.__globals.assign(name=expression.name, value=value)
+        return value
+
+    def __suspend_array(self, expression: Array) -> Generator[Any, Any, Any]:
         try:
-            return callee(interpreter=self, arguments=arguments)
-        except PyNoxException as e:
-            print(e)
-            self.__logger.error(f"Error calling function")
-            raise PyNoxRuntimeError(f"{expression.paren}, Can only call function and classes")
+            elements = []
+            for element in expression.elements:
+                if element.suspends:
+                    element = yield from self.__suspend_expr[type(element)](self, element)
+                else:
+                    element = element.accept(self)
+                elements.append(element)
+            array = PyNoxArray.of(elements)
+        except PyNoxRuntimeError as error:
+            raise PyNoxRuntimeError(self.error(expression.bracket, error.message))
+        if self.profiler is not None:
+            self.profiler.allocated(array, expression.bracket.line)
+        return array
+
+    def __suspend_map(self, expression: Map) -> Generator[Any, Any, Any]:
+        entries = []
+        for key, value in zip(expression.keys, expression.values):
+            if key.suspends:
+                key = yield from self.__suspend_expr[type(key)](self, key)
+            else:
+                key = key.accept(self)
+            if value.suspends:
+                value = yield from self.__suspend_expr[type(value)](self, value)
+            else:
+                value = value.accept(self)
+            entries.append((key, value))
+        values = PyNoxMap.of(entries)
+        if self.profiler is not None:
+            self.profiler.allocated(values, expression.brace.line)
+        return values
+
+    def __suspend_index(self, expression: Index) -> Generator[Any, Any, Any]:
+        obj = expression.obj
+        obj = (yield from self.__suspend_expr[type(obj)](self, obj)) if obj.suspends else obj.accept(self)
+        index = expression.index
+        index = (yield from self.__suspend_expr[type(index)](self, index)) if index.suspends else index.accept(self)
+        return self.__index(expression, obj, index)
+
+    def __suspend_set_index(self, expression: SetIndex) -> Generator[Any, Any, Any]:
+        obj = expression.obj
+        obj = (yield from self.__suspend_expr[type(obj)](self, obj)) if obj.suspends else obj.accept(self)
+        index = expression.index
+        index = (yield from self.__suspend_expr[type(index)](self, index)) if index.suspends else index.accept(self)
+        value = expression.value
+        value = (yield from self.__suspend_expr[type(value)](self, value)) if value.suspends else value.accept(self)
+        return self.__set_index(expression, obj, index, value)
+
+    def __suspend_get(self, expression: Get) -> Generator[Any, Any, Any]:
+        obj = expression.obj
+        obj = (yield from self.__suspend_expr[type(obj)](self, obj)) if obj.suspends else obj.accept(self)
+        return self.__get_property(expression, obj)
+
+    def __suspend_set(self, expression: Set) -> Generator[Any, Any, Any]:
+        obj = expression.obj
+        obj = (yield from self.__suspend_expr[type(obj)](self, obj)) if obj.suspends else obj.accept(self)
+        if type(obj) is not PyNoxInstance:
+            raise PyNoxRuntimeError(self.error(expression.name, "Only instances have fields."))
+        value = expression.value
+        value = (yield from self.__suspend_expr[type(value)](self, value)) if value.suspends else value.accept(self)
+        return self.__set_field(expression, obj, value)
+
+    def __suspend_expression_stmt(self, stmt: Expression) -> Generator[Any, Any, None]:
+        yield from self.__suspend_expr[type(stmt.expression)](self, stmt.expression)
+
+    def __suspend_print(self, stmt: Print) -> Generator[Any, Any, None]:
+        self.__print((yield from self.__suspend_expr[type(stmt.expression)](self, stmt.expression)))
+
+    def __suspend_var(self, stmt: Var) -> Generator[Any, Any, None]:
+        value = stmt.initializer
+        value = (yield from self.__suspend_expr[type(value)](self, value)) if value.suspends else value.accept(self)
+        self.__store(stmt.name, stmt.binding, stmt.slot, value)
+
+    def __suspend_return(self, stmt: Return) -> Generator[Any, Any, Tuple[Any]]:
+        value = stmt.value
+        value = (yield from self.__suspend_expr[type(value)](self, value)) if value.suspends else value.accept(self)
+        return (value,)
+
+    def __suspend_block(self, stmt: Block) -> Generator[Any, Any, Optional[Tuple[Any]]]:
+        completion = yield from self.__run_suspending(stmt.code)
+        if completion is not None:
+            return completion
+        if stmt.slots:
+            frame = self.__frame
+            for slot in stmt.slots:
+                frame[slot] = None
+        return None
+
+    def __suspend_if(self, stmt: If) -> Generator[Any, Any, Optional[Tuple[Any]]]:
+        condition = stmt.condition
+        if condition.suspends:
+            condition = yield from self.__suspend_expr[type(condition)](self, condition)
+        else:
+            condition = condition.accept(self)
+
+        if self.__is_truthy(condition):
+            return (yield from self.__run_suspending((stmt.then_branch,)))
+        elif stmt.else_branch is not None:
+            return (yield from self.__run_suspending((stmt.else_branch,)))
+        return None
+
+    def __suspend_while(self, stmt: While) -> Generator[Any, Any, Optional[Tuple[Any]]]:
+        condition, code = stmt.condition, stmt.code
+        while True:
+            if condition.suspends:
+                value = yield from self.__suspend_expr[type(condition)](self, condition)
+            else:
+                value = condition.accept(self)
+            if not value:
+                break
+            completion = yield from self.__run_suspending(code)
+            if completion is not None:
+                return completion
+        if stmt.slots:
+            frame = self.__frame
+            for slot in stmt.slots:
+                frame[slot] = None
+
+    def __suspend_import(self, stmt: Import) -> Generator[Any, Any, None]:
+        module = stmt.module
+        if module.path in self.__modules:
+            return None
+        self.__modules.add(module.path)
+        mark_suspending(module.statements)
+
+        previous_frame, previous_upvalues = self.__frame, self.__upvalues
+        self.__frame, self.__upvalues = [None] * module.frame_size, ()
+        if self.profiler is not None:
+            self.profiler.enter(f"<module {module.path.name}>", stmt.keyword.line, self.__frame)
+        try:
+            yield from self.__run_suspending(module.statements)
+        finally:
+            self.__frame, self.__upvalues = previous_frame, previous_upvalues
+            if self.profiler is not None:
+                self.profiler.leave()
 
+    __suspend_expr = {
+        Call: __suspend_call,
+        Inline: __suspend_inline,
+        Binary: __suspend_binary,
+        Logical: __suspend_logical,
+        Unary: __suspend_unary,
+        Grouping: __suspend_grouping,
+        Assign: __suspend_assign,
+        Array: __suspend_array,
+        Map: __suspend_map,
+        Index: __suspend_index,
+        SetIndex: __suspend_set_index,
+        Get: __suspend_get,
+        Set: __suspend_set,
+    }
+    __suspend_stmt = {
+        Expression: __suspend_expression_stmt,
+        Print: __suspend_print,
+        Var: __suspend_var,
+        Return: __suspend_return,
+        Block: __suspend_block,
+        If: __suspend_if,
+        While: __suspend_while,
+        Import: __suspend_import,
+    }
+    # What each binary operator does, indexed by the operator's token code.
+    __binary_operations = code_table({
+        OperatorTokenType.GREATER: __greater,
+        OperatorTokenType.GREATER_EQUAL: __greater_equal,
+        OperatorTokenType.LESS: __less,
+        OperatorTokenType.LESS_EQUAL: __less_equal,
+        OperatorTokenType.BANG_EQUAL: __not_equal,
+        OperatorTokenType.EQUAL_EQUAL: __equal,
+        SingleCharTokenType.MINUS: __subtract,
+        SingleCharTokenType.PLUS: __add,
+        SingleCharTokenType.SLASH: __divide,
+        SingleCharTokenType.STAR: __multiply,
+    }, default=__no_operation)
@@ -0,0 +1,325 @@
+import json
+import pathlib
+import sys
+import tracemalloc
+import weakref
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..builtins import BuiltInCallable
+from ..builtins.array import PyNoxArray
+from ..builtins.hashmap import PyNoxMap
+from ..environment import Cell
+from ..utils.callable import PyNoxClass, PyNoxFunction
+from ..utils.instance import PyNoxInstance
+from ..utils.rope import Rope
+
+__all__ = ["ClosureMemory", "MemoryProfiler", "MemorySnapshot", "SiteDelta", "SiteMemory"]
+
+# Where an object was allocated: the Lox line and the function running it.
+Site = Tuple[int, str]
+
+GLOBALS_SITE: Site = (0, "<globals>")
+SCRIPT = "<script>"
+
+# Objects the interpreter reports when it creates them; anything else is charged to whatever holds it.
+_TRACKED = (PyNoxInstance, PyNoxFunction, PyNoxClass, PyNoxArray, PyNoxMap, Cell)
+
+
+@dataclass(kw_only=True, frozen=True)
+class SiteMemory:
+    line: int
+    function: str
+    objects: int
+    size: int
+
+    def __str__(self) -> str:
+        return f"line {self.line} in {self.function}: {self.objects} objects, {self.size} bytes"
+
+
+@dataclass(kw_only=True, frozen=True)
+class ClosureMemory:
+    function: str
+    line: int
+    closures: int
+    captures: Tuple[str, ...]
+    size: int
+
+    def __str__(self) -> str:
+        return (f"{self.closures} closures of {self.function} (line {self.line}) keep "
+                f"{', '.join(self.captures)} alive: {self.size} bytes")
+
+
+@dataclass(kw_only=True, frozen=True)
+class SiteDelta:
+    line: int
+    function: str
+    objects: int
+    size: int
+
+    def __str__(self) -> str:
+        return f"line {self.line} in {self.function}: {self.objects:+d} objects, {self.size:+d} bytes"
+
+
+@dataclass(kw_only=True, frozen=True)
+class MemorySnapshot:
+    """
+    The Lox heap at one point of a run: live frames and objects by kind, the memory retained per
+    allocation site and per closure declaration, and the Python heap as traced by ``tracemalloc``.
+    """
+
+    label: str
+    frames: int
+    closures: int
+    cells: int
+    instances: int
+    arrays: int
+    traced: int
+    peak: int
+    sites: Tuple[SiteMemory, ...]
+    retainers: Tuple[ClosureMemory, ...]
+
+    def compare_to(self, older: "MemorySnapshot") -> List[SiteDelta]:
+        """
+        Diff the sites of this snapshot against an earlier one.
+
+        :param older: The snapshot taken first.
+        :return: The sites whose retained memory changed, largest change first.
+        """
+        before = {(site.line, site.function): site for site in older.sites}
+        after = {(site.line, site.function): site for site in self.sites}
+        deltas = []
+        for key in after.keys() | before.keys():
+            new, old = after.get(key), before.get(key)
+            objects = (new.objects if new else 0) - (old.objects if old else 0)
+            size = (new.size if new else 0) - (old.size if old else 0)
+            if objects or size:
+                deltas.append(SiteDelta(line=key[0], function=key[1], objects=objects, size=size))
+        deltas.sort(key=lambda delta: (-abs(delta.size), delta.line, delta.function))
+        return deltas
+
+    def dump(self, path: str | pathlib.Path) -> None:
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "MemorySnapshot":
+        with open(path, "r") as f:
+            data = json.load(f)
+        data["sites"] = tuple(SiteMemory(**site) for site in data["sites"])
+        data["retainers"] = tuple(
+            ClosureMemory(**{**retainer, "captures": tuple(retainer["captures"])}) for retainer in data["retainers"]
+        )
+        return cls(**data)
+
+    def __str__(self) -> str:
+        lines = [
+            f"Snapshot '{self.label}': {self.frames} frames, {self.closures} closures, {self.cells} cells, "
+            f"{self.instances} instances, {self.arrays} arrays; {self.traced} bytes traced ({self.peak} peak)",
+            *(f"  {site}" for site in self.sites[:10]),
+            *(f"  {retainer}" for retainer in self.retainers[:10]),
+        ]
+        return "\n".join(lines)
+
+
+def _references(value: Any) -> Iterable[Any]:
+    kind = type(value)
+    if kind is PyNoxInstance:
+        # The shape is layout shared by every instance built the same way, not data of this one.
+        return (value.slots,)
+    if kind is PyNoxFunction:
+        return (value.upvalues, value.receiver)
+    if kind is Cell:
+        return (value.value,)
+    if kind is PyNoxArray:
+        return (value.data,)
+    if kind is PyNoxMap:
+        return (*value.data, *value.data.values())
+    if kind is PyNoxClass:
+        return (value.methods, value.superclass)
+    if kind is Rope:
+        return (value._front, value._parts, value._flat)
+    if kind is list or kind is tuple:
+        return value
+    if kind is dict:
+        return value.values()
+    return ()
+
+
+def _is_sized(value: Any) -> bool:
+    return value is not None and type(value) is not bool and not isinstance(value, BuiltInCallable)
+
+
+def _deep_size(values: Iterable[Any]) -> int:
+    size, seen, pending = 0, set(), list(values)
+    while pending:
+        value = pending.pop()
+        if not _is_sized(value) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        pending.extend(_references(value))
+    return size
+
+
+class _Census:
+    """
+    One walk over the heap. Every object is sized once and charged to the first site that reaches it:
+    its own allocation site if the interpreter reported one, otherwise the site of its holder.
+    """
+
+    def __init__(self, sites: "weakref.WeakKeyDictionary[Any, Site]") -> None:
+        self.sites = sites
+        self.seen: set[int] = set()
+        self.objects: Dict[Site, int] = {}
+        self.sizes: Dict[Site, int] = {}
+        self.kinds: Dict[type, int] = dict.fromkeys(_TRACKED, 0)
+        self.retainers: Dict[int, Tuple[PyNoxFunction, List[int]]] = {}
+
+    def charge(self, values: Iterable[Any], site: Site) -> None:
+        pending = [(value, site) for value in values]
+        while pending:
+            value, owner = pending.pop()
+            if not _is_sized(value) or id(value) in self.seen:
+                continue
+            self.seen.add(id(value))
+
+            kind = type(value)
+            if kind in self.kinds:
+                self.kinds[kind] += 1
+                owner = self.sites.get(value, owner)
+                self.objects[owner] = self.objects.get(owner, 0) + 1
+                if kind is PyNoxFunction and (value.upvalues or value.receiver is not None):
+                    self.__retain(value)
+            self.sizes[owner] = self.sizes.get(owner, 0) + sys.getsizeof(value)
+            pending.extend((reference, owner) for reference in _references(value))
+
+    def __retain(self, function: PyNoxFunction) -> None:
+        declaration = function.declaration
+        entry = self.retainers.setdefault(id(declaration), (function, [0, 0]))
+        entry[1][0] += 1
+        entry[1][1] += _deep_size((*function.upvalues, function.receiver))
+
+    def site_memory(self) -> Tuple[SiteMemory, ...]:
+        sites = [
+            SiteMemory(line=site[0], function=site[1], objects=self.objects.get(site, 0), size=size)
+            for site, size in self.sizes.items()
+        ]
+        sites.sort(key=lambda site: (-site.size, site.line, site.function))
+        return tuple(sites)
+
+    def closure_memory(self) -> Tuple[ClosureMemory, ...]:
+        retainers = []
+        for function, (closures, size) in self.retainers.values():
+            declaration = function.declaration
+            captures = tuple(f"{scope}.{name}" for scope, name in declaration.captures)
+            if function.receiver is not None:
+                captures += ("this",)
+            retainers.append(ClosureMemory(function=declaration.name.lexeme, line=declaration.name.line,
+                                           closures=closures, captures=captures, size=size))
+        retainers.sort(key=lambda retainer: (-retainer.size, retainer.line))
+        return tuple(retainers)
+
+
+class MemoryProfiler:
+    """
+    Attributes the memory a Lox program retains to the source lines and functions that allocated it.
+
+    The interpreter reports every closure, class, instance, captured variable, array and map literal it
+    creates, with the Lox line creating it, and every frame it pushes and pops. A snapshot walks the
+    heap from the globals and the live frames: reported objects are charged to their allocation
+    site, together with the strings, ropes and lists only they reach, and values held directly by a
+    frame are charged to its function. ``tracemalloc`` supplies the total size of the Python heap.
+
+    While profiling, functions stay in the tree walker instead of tiering up, so every frame is visible.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[int] = None,
+        directory: Optional[str | pathlib.Path] = None,
+        trace: bool = True
+    ) -> None:
+        """
+        :param interval: Take a snapshot every this many Lox calls; None takes them only on request.
+        :param directory: Where every snapshot is dumped as JSON, if given.
+        :param trace: Whether to run ``tracemalloc`` for the Python heap totals while profiling.
+        """
+        self.interval = interval
+        self.directory = pathlib.Path(directory) if directory is not None else None
+        self.trace = trace
+        self.snapshots: List[MemorySnapshot] = []
+        self.__sites: "weakref.WeakKeyDictionary[Any, Site]" = weakref.WeakKeyDictionary()
+        self.__stack: List[Tuple[str, int, List[Any]]] = []
+        self.__globals: Dict[str, Any] = {}
+        self.__calls = 0
+        self.__tracing = False
+
+    def attach(self, globals_: Dict[str, Any]) -> None:
+        """Profile the interpreter owning the given global variables."""
+        self.__globals = globals_
+
+    def start(self) -> None:
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__tracing = True
+
+    def stop(self) -> None:
+        if self.__tracing:
+            tracemalloc.stop()
+            self.__tracing = False
+
+    def enter(self, function: str, line: int, frame: List[Any]) -> None:
+        """
+        Record a frame pushed for a call or a module. Cells already in the frame are its boxed parameters.
+        """
+        for value in frame:
+            if type(value) is Cell:
+                self.__sites[value] = (line, function)
+        self.__stack.append((function, line, frame))
+        self.__calls += 1
+        if self.interval and self.__calls % self.interval == 0:
+            self.snapshot(f"call {self.__calls}")
+
+    def leave(self) -> None:
+        self.__stack.pop()
+
+    def allocated(self, value: Any, line: int) -> None:
+        """Record the site of an object the running function just created at a Lox line."""
+        self.__sites[value] = (line, self.__stack[-1][0] if self.__stack else SCRIPT)
+
+    def mark(self, label: Any) -> None:
+        """The `memorySnapshot(label)` native: take a snapshot at a point chosen by the script."""
+        self.snapshot(str(label))
+        return None
+
+    def snapshot(self, label: str = "") -> MemorySnapshot:
+        """
+        Walk the live heap and record a snapshot, dumping it if the profiler has a directory.
+
+        :param label: A name for the point of the run.
+        :return: The new snapshot, also appended to `snapshots`.
+        """
+        census = _Census(self.__sites)
+        census.charge(self.__globals.values(), GLOBALS_SITE)
+        for function, line, frame in self.__stack:
+            census.charge((frame,), (line, function))
+
+        traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        snapshot = MemorySnapshot(
+            label=label or f"snapshot {len(self.snapshots)}",
+            frames=len(self.__stack),
+            closures=census.kinds[PyNoxFunction],
+            cells=census.kinds[Cell],
+            instances=census.kinds[PyNoxInstance],
+            arrays=census.kinds[PyNoxArray],
+            traced=traced,
+            peak=peak,
+            sites=census.site_memory(),
+            retainers=census.closure_memory(),
+        )
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            snapshot.dump(self.directory / f"snapshot-{len(self.snapshots):04d}.json")
+        self.snapshots.append(snapshot)
+        return snapshot
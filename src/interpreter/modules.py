@@ -0,0 +1,164 @@
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from .statements import Import, Stmt
+from ..exceptions import PyNoxImportError
+from ..lexer import Lexer
+from ..lexer.tokens import Token
+from ..logger import Logger
+from ..parser import Parser
+
+__all__ = ["Module", "ModuleLoader"]
+
+MODULE_SUFFIX = ".lox"
+SEARCH_PATH_VARIABLE = "PYNOX_PATH"
+
+Stamp = Tuple[int, int]
+
+
+class Module:
+    """
+    A Lox source file compiled once per process: its parsed top-level statements and,
+    after the `Resolver` ran over it, the size of its top-level frame and the globals it writes.
+    """
+
+    __slots__ = ("path", "stamp", "statements", "imports", "frame_size", "global_writes", "resolved")
+
+    def __init__(self, path: pathlib.Path, stamp: Stamp, statements: List[Stmt]) -> None:
+        self.path = path
+        self.stamp = stamp
+        self.statements = statements
+        self.imports: Tuple[Import, ...] = tuple(stmt for stmt in statements if isinstance(stmt, Import))
+        self.frame_size = 0
+        self.global_writes: FrozenSet[str] = frozenset()
+        self.resolved = False
+
+    def __repr__(self) -> str:
+        return f"<Module {self.path}>"
+
+
+# Every module compiled by this process, keyed by absolute path and invalidated by its stamp.
+_COMPILED: Dict[pathlib.Path, Module] = {}
+
+
+def _stamp(path: pathlib.Path) -> Stamp:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _front_end(path: pathlib.Path) -> Tuple[Stamp, Optional[List[Stmt]]]:
+    """
+    Lex and parse a module. Runs in a worker process, so it only touches the file it is given.
+    """
+    stamp = _stamp(path)
+    with open(path, "r") as f:
+        source = f.read().strip()
+    tokens = Lexer(source=source).scan_tokens()
+    statements = Parser(tokens=tokens, logger=Logger(name=f"PyNox:{path.name}")).parse()
+    return stamp, statements
+
+
+class ModuleLoader:
+    """
+    Finds the modules a program imports and compiles the ones that changed since this process
+    last saw them.
+
+    Imports are discovered one level at a time; every stale module of a level is lexed and
+    parsed in a pool of worker processes, so a program loads in time proportional to what changed.
+    """
+
+    def __init__(self, search_path: Optional[Sequence[str | pathlib.Path]] = None,
+                 workers: Optional[int] = None) -> None:
+        if search_path is None:
+            search_path = [entry for entry in os.environ.get(SEARCH_PATH_VARIABLE, "").split(os.pathsep) if entry]
+        self.search_path: List[pathlib.Path] = [pathlib.Path(entry) for entry in search_path]
+        self.workers = workers
+
+    def find(self, name: Token, directory: pathlib.Path) -> pathlib.Path:
+        """
+        Locate an imported file, first next to the importing file, then along the search path.
+
+        :param name: The string token naming the module.
+        :param directory: The directory of the importing file.
+        :return: The absolute path of the module.
+        """
+        relative = pathlib.Path(name.literal)
+        candidates = [relative] if relative.suffix else [relative.with_suffix(MODULE_SUFFIX), relative]
+        for root in (directory, *self.search_path):
+            for candidate in candidates:
+                path = root / candidate
+                if path.is_file():
+                    return path.resolve()
+        raise PyNoxImportError(f"Can't find module '{name.literal}' imported at line {name.line}.")
+
+    def load(self, statements: Optional[Sequence[Stmt]], directory: pathlib.Path) -> List[Module]:
+        """
+        Compile every module reachable from a program's imports and link each `Import` to its module.
+
+        :param statements: The program's top-level statements.
+        :param directory: The directory relative imports of the program are looked up from.
+        :return: The reachable modules, each listed after the modules it imports.
+        """
+        targets: Dict[Import, pathlib.Path] = {}
+        roots = self.__find_all([stmt for stmt in statements or () if isinstance(stmt, Import)], directory, targets)
+        seen = set(roots)
+        frontier = list(dict.fromkeys(roots))
+        while frontier:
+            self.__compile([path for path in frontier if not self.__is_fresh(path)])
+            following = []
+            for path in frontier:
+                for dependency in self.__find_all(_COMPILED[path].imports, path.parent, targets):
+                    if dependency not in seen:
+                        seen.add(dependency)
+                        following.append(dependency)
+            frontier = following
+
+        for stmt, path in targets.items():
+            stmt.module = _COMPILED[path]
+        return self.__dependency_order(roots)
+
+    def __find_all(self, imports: Iterable[Import], directory: pathlib.Path,
+                   targets: Dict[Import, pathlib.Path]) -> List[pathlib.Path]:
+        paths = []
+        for stmt in imports:
+            path = self.find(stmt.path, directory)
+            targets[stmt] = path
+            paths.append(path)
+        return paths
+
+    def __is_fresh(self, path: pathlib.Path) -> bool:
+        module = _COMPILED.get(path)
+        return module is not None and module.stamp == _stamp(path)
+
+    def __compile(self, paths: List[pathlib.Path]) -> None:
+        if not paths:
+            return None
+
+        if len(paths) == 1:
+            results = [_front_end(paths[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_front_end, paths))
+
+        for path, (stamp, statements) in zip(paths, results):
+            if statements is None or any(stmt is None for stmt in statements):
+                raise PyNoxImportError(f"Can't compile module '{path}'.")
+            _COMPILED[path] = Module(path, stamp, statements)
+
+    def __dependency_order(self, roots: List[pathlib.Path]) -> List[Module]:
+        ordered: List[Module] = []
+        visited = set()
+
+        def visit(module: Module) -> None:
+            if module.path in visited:
+                return None
+            visited.add(module.path)
+            for stmt in module.imports:
+                visit(stmt.module)
+            ordered.append(module)
+
+        for path in roots:
+            visit(_COMPILED[path])
+        return ordered
@@ -0,0 +1,246 @@
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .expression import Array, Assign, Call, Map, Set, SetIndex, This, Variable
+from .image import dump_heap, load_heap
+from .statements import Class, Function, Print, Var
+from ..environment import Binding
+from ..builtins import BuiltInCallable
+from ..builtins.hashmap import PyNoxMap
+from ..builtins.io import PyNoxFile
+from ..exceptions import PyNoxImageError, PyNoxRuntimeError
+from ..logger import Logger
+from ..utils.callable import PyNoxClass, PyNoxFunction
+from ..utils.instance import PyNoxInstance
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+
+__all__ = ["parallel_map"]
+
+# Inputs per worker below which a parallel map runs in the calling process: shipping the
+# function costs more than it saves.
+MIN_INPUTS_PER_WORKER = 4
+# Chunks handed to each worker, so a slow chunk doesn't leave the other workers idle.
+CHUNKS_PER_WORKER = 4
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+
+# Functions this worker process already rebuilt, keyed by the digest of what was shipped.
+_LOADED: Dict[str, Tuple["Interpreter", PyNoxFunction]] = {}
+MAX_LOADED = 8
+
+# Natives a shipped function may use: they neither write to objects nor reach outside the interpreter.
+PURE_NATIVES = frozenset({"array", "clock", "clockNs", "dot", "get", "has", "hashMap", "keys", "len", "map", "scale",
+                          "size", "slice", "sum"})
+# Pure natives returning a new object, which the function may then write to.
+FRESH_NATIVES = frozenset({"array", "hashMap", "keys", "map", "scale", "slice"})
+
+
+def _nodes(node: Any) -> List[Any]:
+    children = []
+    for value in vars(node).values():
+        if hasattr(value, "accept"):
+            children.append(value)
+        elif isinstance(value, (list, tuple)):
+            children.extend(item for item in value if hasattr(item, "accept"))
+    return children
+
+
+def _owner(functions: List[Function], binding: Binding, slot: int) -> Optional[Tuple[int, int]]:
+    """
+    The variable a local or captured binding of the innermost function refers to, as the id of
+    the function declaring it and its slot there; None if it is declared outside the shipped function.
+    """
+    if binding is Binding.LOCAL or binding is Binding.CELL:
+        return id(functions[-1]), slot
+    if binding is Binding.UPVALUE:
+        for depth in range(len(functions) - 1, -1, -1):
+            is_local, slot = functions[depth].upvalues[slot]
+            if is_local:
+                return (id(functions[depth - 1]), slot) if depth > 0 else None
+    return None
+
+
+def _fresh(expression: Any) -> bool:
+    """Whether an expression always makes a new object."""
+    if isinstance(expression, (Array, Map)):
+        return True
+    return (isinstance(expression, Call) and isinstance(expression.callee, Variable)
+            and expression.callee.binding is Binding.GLOBAL and expression.callee.name.lexeme in FRESH_NATIVES)
+
+
+def _check_pure(declaration: Function, reads: Dict[str, Any], initializer: bool = False) -> None:
+    """
+    Reject a function that prints, assigns variables it doesn't own or writes to objects it didn't
+    create, and collect the globals it reads.
+
+    An object counts as created by the function if it is an array or map literal, comes from a
+    native making a new one, or is ``this`` in an initializer; a local holds one if every value
+    ever stored in it is one.
+
+    :raises PyNoxRuntimeError: If the function has one of those side effects.
+    """
+    name = declaration.name.lexeme
+    # Whether every value stored in each local so far was a new object, by `_owner` key.
+    fresh: Dict[Tuple[int, int], bool] = {(id(declaration), slot): False for slot in range(len(declaration.params))}
+    stores: List[Tuple[Tuple[int, int], Any]] = []
+    pending: List[Tuple[Any, List[Function]]] = [(stmt, [declaration]) for stmt in declaration.body]
+    while pending:
+        node, functions = pending.pop()
+        if isinstance(node, Print):
+            raise PyNoxRuntimeError(f"'pmap' can't run '{name}': it prints.")
+        if isinstance(node, Assign):
+            owner = _owner(functions, node.binding, node.slot)
+            if owner is None:
+                raise PyNoxRuntimeError(
+                    f"'pmap' can't run '{name}': it assigns '{node.name.lexeme}' at line {node.name.line}."
+                )
+            fresh[owner] = fresh.get(owner, True) and _fresh(node.value)
+        if isinstance(node, (Var, Function, Class)) and node.binding is not Binding.GLOBAL:
+            owner = (id(functions[-1]), node.slot)
+            fresh[owner] = fresh.get(owner, True) and isinstance(node, Var) and (
+                node.initializer is None or _fresh(node.initializer))
+        if isinstance(node, (Set, SetIndex)):
+            target, token = node.obj, node.name if isinstance(node, Set) else node.bracket
+            if isinstance(target, Variable) and (owner := _owner(functions, target.binding, target.slot)) is not None:
+                stores.append((owner, token))
+            elif not (isinstance(target, (Array, Map)) or (isinstance(target, This) and initializer
+                                                           and len(functions) == 1)):
+                raise PyNoxRuntimeError(
+                    f"'pmap' can't run '{name}': it writes to an object it didn't create at line {token.line}."
+                )
+        if isinstance(node, Variable) and node.binding is Binding.GLOBAL:
+            reads.setdefault(node.name.lexeme, node.name)
+        if isinstance(node, Function):
+            fresh.update(((id(node), slot), False) for slot in range(len(node.params)))
+            pending.extend((stmt, [*functions, node]) for stmt in node.body)
+        else:
+            pending.extend((child, functions) for child in _nodes(node))
+
+    for owner, token in stores:
+        if not fresh.get(owner, False):
+            raise PyNoxRuntimeError(
+                f"'pmap' can't run '{name}': it writes to an object it didn't create at line {token.line}."
+            )
+
+
+def _ship(interpreter: "Interpreter", function: PyNoxFunction) -> bytes:
+    """
+    Check that a function and everything it reaches through globals and captured variables are
+    pure, and serialize them with the values of the globals they read.
+    """
+    globals_: Dict[str, Any] = {}
+    seen = set()
+    pending: List[Any] = [function]
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, PyNoxInstance):
+            pending.append(value.klass)
+            pending.extend(value.slots)
+            continue
+        if isinstance(value, PyNoxMap):
+            pending.extend((*value.data, *value.data.values()))
+            continue
+        if isinstance(value, PyNoxClass):
+            pending.extend(value.methods.values())
+            if value.superclass is not None:
+                pending.append(value.superclass)
+            continue
+        if isinstance(value, BuiltInCallable) and value.name not in PURE_NATIVES:
+            raise PyNoxRuntimeError(
+                f"'pmap' can't run '{function.declaration.name.lexeme}': it uses '{value.name}', which isn't pure."
+            )
+        if isinstance(value, PyNoxFile):
+            raise PyNoxRuntimeError(
+                f"'pmap' can't run '{function.declaration.name.lexeme}': it uses the open file '{value.path}'."
+            )
+        if not isinstance(value, PyNoxFunction):
+            continue
+
+        reads: Dict[str, Any] = {}
+        _check_pure(value.declaration, reads, value.is_initializer)
+        pending.extend(cell.value for cell in value.upvalues)
+        if value.receiver is not None:
+            pending.append(value.receiver)
+        for name, token in reads.items():
+            if name in globals_:
+                continue
+            try:
+                globals_[name] = interpreter.look_up_variable(token, Binding.GLOBAL, -1)
+            except PyNoxRuntimeError:
+                # Not defined yet: the call reports it if it ever reads the variable.
+                continue
+            pending.append(globals_[name])
+
+    try:
+        return dump_heap((function, globals_))
+    except PyNoxImageError as error:
+        raise PyNoxRuntimeError(f"'pmap' can't ship '{function.declaration.name.lexeme}': {error.message}")
+
+
+def _run_chunk(digest: str, payload: bytes, chunk: List[Any]) -> List[Any]:
+    """Call a shipped function on a chunk of inputs. Runs in a worker process."""
+    loaded = _LOADED.get(digest)
+    if loaded is None:
+        from .interpreter import Interpreter
+
+        interpreter = Interpreter(logger=Logger(name="PyNox:pmap"))
+        try:
+            function, globals_ = load_heap(payload, interpreter.natives)
+        except PyNoxImageError as error:
+            raise PyNoxRuntimeError(f"'pmap' can't load the function in a worker: {error.message}")
+        interpreter._boot(globals_, frozenset(), 0)
+        if len(_LOADED) >= MAX_LOADED:
+            _LOADED.clear()
+        loaded = _LOADED[digest] = (interpreter, function)
+
+    interpreter, function = loaded
+    return [function(interpreter, [value]) for value in chunk]
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_WORKERS
+    if _POOL is None or _POOL_WORKERS != workers:
+        if _POOL is not None:
+            _POOL.shutdown()
+        _POOL, _POOL_WORKERS = ProcessPoolExecutor(max_workers=workers), workers
+    return _POOL
+
+
+def parallel_map(interpreter: "Interpreter", function: PyNoxFunction, inputs: List[Any],
+                 workers: Optional[int] = None) -> List[Any]:
+    """
+    Call a pure Lox function on every input, spreading the calls over a pool of worker processes.
+
+    The function is shipped with the values of the globals it reads and the variables it
+    captures, so workers see them as they were when the map started. Small maps run in the
+    calling process.
+
+    :param interpreter: The interpreter calling the map.
+    :param function: A Lox function of one argument that doesn't print, assign globals, write to
+        objects it didn't create or use impure natives.
+    :param inputs: The arguments, one call each.
+    :param workers: The number of worker processes, defaults to the number of CPUs.
+    :return: The results, in the order of the inputs.
+    """
+    payload = _ship(interpreter, function)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(inputs) < workers * MIN_INPUTS_PER_WORKER:
+        return [function(interpreter, [value]) for value in inputs]
+
+    size = math.ceil(len(inputs) / (workers * CHUNKS_PER_WORKER))
+    chunks = [inputs[start:start + size] for start in range(0, len(inputs), size)]
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    results: List[Any] = []
+    for chunk in _pool(workers).map(partial(_run_chunk, digest, payload), chunks):
+        results.extend(chunk)
+    return results
@@ -0,0 +1,94 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Tuple
+
+from .interpreter import Interpreter
+from .stackless import MAX_DEPTH, mark_suspending
+from ..builtins import Registry
+from ..builtins.hashmap import PyNoxMap
+from ..logger import Logger
+from ..utils.rope import flatten, is_string
+
+__all__ = ["PreparedProgram", "PreparedRun"]
+
+
+@dataclass(kw_only=True, frozen=True)
+class PreparedRun:
+    value: Any
+    output: List[str]
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Capture(Logger):
+    """A logger that keeps what a run prints and the error that stopped it instead of writing them out."""
+
+    def __init__(self) -> None:
+        super().__init__(name="PyNox:prepared")
+        self.output: List[str] = []
+        self.errors: List[str] = []
+
+    def info(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self.output.append(msg)
+
+    def error(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self.errors.append(msg)
+
+
+class PreparedProgram:
+    """
+    A program compiled once by `PyNox.prepare` and run any number of times, each run with its
+    own inputs and from fresh globals.
+
+    Runs skip the lexer, parser and resolver entirely. Every thread runs the program in an
+    interpreter of its own, kept between runs and reset by clearing its globals, so a prepared
+    program can be shared between threads and a run costs little more than the program itself.
+    """
+
+    def __init__(self, statements: List[Any], frame_size: int, natives: Registry, stackless: bool = False,
+                 max_depth: int = MAX_DEPTH) -> None:
+        self.statements = statements
+        self.frame_size = frame_size
+        self.natives = natives
+        self.stackless = stackless
+        self.max_depth = max_depth
+        if stackless:
+            mark_suspending(statements)
+        self.__local = threading.local()
+
+    def __interpreter(self) -> Tuple[Interpreter, _Capture]:
+        state = getattr(self.__local, "state", None)
+        if state is None:
+            capture = _Capture()
+            interpreter = Interpreter(logger=capture, natives=self.natives, stackless=self.stackless,
+                                      max_depth=self.max_depth)
+            interpreter._resolve_script(frame_size=self.frame_size)
+            state = self.__local.state = (interpreter, capture)
+        return state
+
+    def run(self, inputs: Optional[Mapping[str, Any]] = None) -> PreparedRun:
+        """
+        Run the program once.
+
+        :param inputs: Globals defined before the program starts. Dicts, lists and tuples become
+            Lox maps, see `PyNoxMap.from_host`.
+        :return: The value of the program's top-level ``return``, or None without one, what it
+            printed and the runtime error that stopped it, if any.
+        :raises ValueError: If an input is named after a native, which calls to it would bypass.
+        """
+        interpreter, capture = self.__interpreter()
+        globals_ = {}
+        for name, value in (inputs or {}).items():
+            if name in self.natives:
+                raise ValueError(f"Input '{name}' would shadow the native of the same name.")
+            globals_[name] = PyNoxMap.from_host(value)
+        interpreter._reset(globals_)
+
+        capture.output, capture.errors = [], []
+        if not interpreter.interpret(statements=self.statements):
+            return PreparedRun(value=None, output=capture.output, error=capture.errors[-1])
+        value = interpreter.result
+        return PreparedRun(value=flatten(value) if is_string(value) else value, output=capture.output, error=None)
@@ -1,43 +1,274 @@
 import pathlib
+import threading
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Sequence, TextIO, Tuple
 
 
-from .interpreter import Interpreter
+from .image import HeapImage, read_image, split_at_checkpoint, write_image
+from .inlining import CallProfile, InlineDecision, Inliner
+from .interpreter import AllocationCounters, Interpreter
+from .memory import MemoryProfiler
+from .prepared import PreparedProgram
+from .modules import Module, ModuleLoader, Stamp, _stamp
+from .stackless import MAX_DEPTH, mark_suspending
+from .quickening import SiteCounters
 from .resolver import Resolver
+from ..builtins import NativeFunction, Registry
+from ..builtins.hashmap import PyNoxMap
+from ..exceptions import ErrorTypes, PyNoxImageError, PyNoxImportError, PyNoxResolutionError
 from ..parser import Parser
-from ..lexer import Lexer
+from ..lexer import InternReport, Lexer
 from ..logger import Logger
 
 __all__ = ["PyNox",]
 
+MAX_PROGRAMS = 64
+
+
+class _Program:
+    """A main program compiled by a `PyNox` created with ``cache=True``, with what it was resolved against."""
+
+    __slots__ = ("stamp", "statements", "modules", "frame_size")
+
+    def __init__(self, stamp: Optional[Stamp], statements: List[Any], modules: List[Module], frame_size: int) -> None:
+        self.stamp = stamp
+        self.statements = statements
+        self.modules = modules
+        self.frame_size = frame_size
+
+
+# Cached programs, keyed by absolute path or, for programs given as text, by the text itself, with
+# the options they were compiled under, see `PyNox.__cache_key`.
+_PROGRAMS: Dict[Tuple[Any, ...], _Program] = {}
+# Compiling writes to caches and nodes shared by every `PyNox` of the process, so one program compiles at a time.
+_COMPILE_LOCK = threading.Lock()
+
 
 class PyNox:
 
-    def __init__(self, source: str | pathlib.Path = "") -> None:
-        self._file_path = pathlib.Path(source) if source else None
+    def __init__(
+        self,
+        source: str | pathlib.Path = "",
+        natives: Optional[Registry] = None,
+        search_path: Optional[Sequence[str | pathlib.Path]] = None,
+        workers: Optional[int] = None,
+        stackless: bool = False,
+        max_depth: int = MAX_DEPTH,
+        profiler: Optional[MemoryProfiler] = None,
+        image: Optional[str | pathlib.Path] = None,
+        text: Optional[str] = None,
+        arguments: Optional[Sequence[str]] = None,
+        stdout: Optional[TextIO] = None,
+        cache: bool = False,
+        inline: bool | CallProfile = False,
+        call_profile: Optional[CallProfile] = None
+    ) -> None:
+        self._image_path = pathlib.Path(image) if image else None
+        self._file_path = pathlib.Path(source) if source and text is None else None
         self._had_error: bool = False
-        self._source = self.__read_file(path=self._file_path) if self._file_path else ""
-        self.logger = Logger(name="PyNox")
-        self._interpreter = Interpreter(logger=self.logger)
+        self._cache = cache
+        self._inline = inline
+        self._inliner = Inliner(inline if isinstance(inline, CallProfile) else None) if inline else None
+        self._call_profile = call_profile
+        self._stamp = _stamp(self._file_path) if self._file_path and cache else None
+        if text is not None:
+            self._source = text.strip()
+        else:
+            self._source = self.__read_file(path=self._file_path) if self._file_path else ""
+        self.logger = Logger(name="PyNox", stream=stdout)
+        self._interpreter = Interpreter(logger=self.logger, natives=natives, stackless=stackless, max_depth=max_depth,
+                                        profiler=profiler)
+        if arguments is not None:
+            arguments = list(arguments)
+            self.register(lambda: PyNoxMap.of(enumerate(arguments)), name="args", arity=0)
         self._resolver = Resolver(interpreter=self._interpreter)
-        self.lexer = Lexer(source=self._source)
+        self.lexer = Lexer(source=self._source, workers=workers or 1)
+        self.modules = ModuleLoader(search_path=search_path, workers=workers)
 
     def __read_file(self, path: pathlib.Path) -> str:
         with open(path, "r") as f:
             return f.read().strip()
 
-    def run_file(self):
+    def register(
+        self,
+        function: Callable[..., Any],
+        *,
+        name: Optional[str] = None,
+        arity: Optional[int] = None,
+        pass_interpreter: bool = False,
+        suspends: bool = False
+    ) -> NativeFunction:
+        return self._interpreter.register_native(function, name=name, arity=arity, pass_interpreter=pass_interpreter,
+                                                 suspends=suspends)
+
+    def register_module(self, module: ModuleType, prefix: str = "") -> List[str]:
+        return self._interpreter.register_module(module, prefix=prefix)
+
+    def intern_report(self) -> InternReport:
+        """Report how much storage interning lexemes and string literals saved."""
+        return self.lexer.symbols.report()
+
+    def specialization_counters(self) -> List[SiteCounters]:
+        """Report how each binary operator site was specialized while running."""
+        return self._interpreter.specialization_counters()
+
+    def allocation_counters(self) -> AllocationCounters:
+        """Report how many call frames and argument lists were allocated while running."""
+        return self._interpreter.allocation_counters()
+
+    def inlining_report(self) -> List[InlineDecision]:
+        """Report the calls to small functions the program was compiled with, inlined or not, and why."""
+        return list(self._inliner.decisions) if self._inliner is not None else []
+
+    def run_file(self) -> ErrorTypes:
+        """
+        Compile and run the program, or boot it from its image.
+
+        :return: The exit status: ``EX_DATAERR`` if it doesn't compile or boot, ``EX_SOFTWARE``
+            if a runtime error stopped it.
+        """
         if self._had_error:
             exit(65)
 
+        if self._image_path is not None:
+            statements = self.__boot(self._image_path)
+        else:
+            statements, _ = self.__compile()
+        if statements is None:
+            return ErrorTypes.EX_DATAERR
+        counts: Dict[Any, int] = {}
+        if self._call_profile is not None:
+            self._interpreter.record_calls(counts)
+        ran = self._interpreter.interpret(statements=statements)
+        if self._call_profile is not None:
+            self._call_profile.record(counts)
+        if not ran:
+            return ErrorTypes.EX_SOFTWARE
+        self._had_error = False
+        return ErrorTypes.EX_OK
+
+    def prepare(self) -> Optional[PreparedProgram]:
+        """
+        Compile the program once for `PreparedProgram.run` to run it many times with different
+        inputs. Its top-level code may end with a ``return`` of the value the run hands back.
+
+        :return: The prepared program, or None if it doesn't compile.
+        """
+        self._resolver.script_returns = True
+        statements, _ = self.__compile()
+        if statements is None:
+            return None
+        interpreter = self._interpreter
+        return PreparedProgram(statements, interpreter.script_frame_size, interpreter.natives,
+                               stackless=interpreter.stackless, max_depth=interpreter.max_depth)
+
+    def save_image(self, path: str | pathlib.Path) -> bool:
+        """
+        Run the program up to its top-level `checkpoint();` statement, or to its end, and store the
+        resulting heap in an image that `PyNox(image=path)` boots from without parsing or running
+        the prelude again.
+
+        :param path: The image file to write.
+        :return: Whether the prelude ran and the image was written.
+        """
+        statements, modules = self.__compile()
+        if statements is None:
+            return False
+
+        # Mark the whole program for the stackless evaluator, so an image boots in either mode.
+        mark_suspending(statements)
+        for module in modules:
+            mark_suspending(module.statements)
+        prelude, rest = split_at_checkpoint(statements)
+        if not self._interpreter.interpret(statements=prelude):
+            self._had_error = True
+            return False
+        globals_, modules, frame_size = self._interpreter._image_state()
+        try:
+            write_image(path, HeapImage(globals_, modules, frame_size, rest))
+        except PyNoxImageError as error:
+            self.logger.error(str(error))
+            self._had_error = True
+            return False
+        return True
+
+    def __compile(self) -> Tuple[Optional[List[Any]], List[Module]]:
+        directory = self._file_path.parent if self._file_path else pathlib.Path.cwd()
+        with _COMPILE_LOCK:
+            if not self._cache:
+                return self.__front_end(directory)
+
+            key = self.__cache_key()
+            program = _PROGRAMS.get(key)
+            if program is not None and program.stamp == self._stamp:
+                try:
+                    modules = self.modules.load(program.statements, directory)
+                except PyNoxImportError as error:
+                    self.logger.error(str(error))
+                    self._had_error = True
+                    return None, []
+                # The program was resolved against its modules; if one of them changed, compile it again.
+                if modules == program.modules:
+                    self._interpreter._resolve_script(frame_size=program.frame_size)
+                    return program.statements, modules
+
+            statements, modules = self.__front_end(directory)
+            if statements is not None:
+                if len(_PROGRAMS) >= MAX_PROGRAMS:
+                    _PROGRAMS.clear()
+                _PROGRAMS[key] = _Program(self._stamp, statements, modules, self._interpreter.script_frame_size)
+            return statements, modules
+
+    def __cache_key(self) -> Tuple[Any, ...]:
+        """
+        The key of the program in the cache: its path or text, with every option that changes how
+        it compiles, so programs run with different natives, inlining or search path don't share.
+        """
+        natives = self._interpreter.natives
+        signatures = tuple(
+            (name, native.arity, getattr(native, "pass_interpreter", False), getattr(native, "suspends", False))
+            for name, native in ((name, natives.get(name)) for name in natives)
+        )
+        inline = self._inline
+        inline = tuple(sorted(inline.counts.items())) if isinstance(inline, CallProfile) else bool(inline)
+        return (self._file_path.resolve() if self._file_path else self._source, signatures, inline,
+                self._interpreter.stackless, tuple(self.modules.search_path))
+
+    def __front_end(self, directory: pathlib.Path) -> Tuple[Optional[List[Any]], List[Module]]:
         tokens = self.lexer.scan_tokens()
         parser = Parser(tokens=tokens, logger=self.logger)
         statements = parser.parse()
+        if statements is None or any(stmt is None for stmt in statements):
+            # The parser already logged the syntax error.
+            self._had_error = True
         if self._had_error:
-            return
+            return None, []
 
-        self._resolver._resolve(statements=statements)
-        self._interpreter.interpret(statements=statements)
-        self._had_error = False
+        try:
+            modules = self.modules.load(statements, directory)
+            for module in modules:
+                if not module.resolved:
+                    Resolver(interpreter=self._interpreter)._resolve_module(module)
+            self._resolver._resolve(statements=statements)
+        except (PyNoxImportError, PyNoxResolutionError) as error:
+            self.logger.error(str(error))
+            self._had_error = True
+            return None, []
+        if self._inliner is not None:
+            # Only freshly compiled programs: a cached one may be running in another thread.
+            frame_size = self._inliner.run(statements, self._interpreter.script_frame_size)
+            self._interpreter._resolve_script(frame_size=frame_size)
+        return statements, modules
+
+    def __boot(self, path: pathlib.Path) -> Optional[List[Any]]:
+        try:
+            image = read_image(path, self._interpreter.natives)
+        except PyNoxImageError as error:
+            self.logger.error(str(error))
+            self._had_error = True
+            return None
+        self._interpreter._boot(image.globals, image.modules, image.frame_size)
+        return image.statements
 
     def run_prompt(self):
         while True:
@@ -0,0 +1,126 @@
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from ..lexer.tokens import OperatorTokenType, SingleCharTokenType, TOKEN_CODES
+from ..utils.rope import Rope, concat
+
+__all__ = ["Specialization", "SiteCounters", "quicken", "deoptimize", "site_counters"]
+
+# Number of consecutive generic evaluations with the same operand types before a site specializes.
+WARMUP = 8
+# A site whose guard failed this many times stays generic for good.
+MAX_DEOPTS = 4
+
+
+class Specialization:
+    """
+    A type-guarded fast path for one `Binary` site.
+
+    The interpreter checks ``type(left) is left_type and type(right) is right_type`` inline and then
+    calls ``operation``, which for numbers is the C implementation from the ``operator`` module.
+    """
+
+    __slots__ = ("name", "left", "right", "operation")
+
+    def __init__(self, name: str, left: type, right: type, operation: Callable[[Any, Any], Any]) -> None:
+        self.name = name
+        self.left = left
+        self.right = right
+        self.operation = operation
+
+    def __repr__(self) -> str:
+        return f"<Specialization {self.name}>"
+
+
+def _build_table() -> Dict[Tuple[int, type, type], Specialization]:
+    numeric = {
+        SingleCharTokenType.PLUS: operator.add,
+        SingleCharTokenType.MINUS: operator.sub,
+        SingleCharTokenType.STAR: operator.mul,
+        SingleCharTokenType.SLASH: operator.truediv,
+        OperatorTokenType.LESS: operator.lt,
+        OperatorTokenType.LESS_EQUAL: operator.le,
+        OperatorTokenType.GREATER: operator.gt,
+        OperatorTokenType.GREATER_EQUAL: operator.ge,
+        OperatorTokenType.EQUAL_EQUAL: operator.eq,
+        OperatorTokenType.BANG_EQUAL: operator.ne,
+    }
+    table = {}
+    for token_type, operation in numeric.items():
+        for left in (int, float):
+            for right in (int, float):
+                if left is not right and token_type in (OperatorTokenType.EQUAL_EQUAL, OperatorTokenType.BANG_EQUAL):
+                    # Lox equality never holds across int and float; leave those to the generic path.
+                    continue
+                name = f"{left.__name__}-{right.__name__} {token_type}"
+                table[(TOKEN_CODES[token_type], left, right)] = Specialization(name, left, right, operation)
+
+    for left in (str, Rope):
+        for right in (str, Rope):
+            name = f"{left.__name__}-{right.__name__} concat"
+            table[(TOKEN_CODES[SingleCharTokenType.PLUS], left, right)] = Specialization(name, left, right, concat)
+    table[(TOKEN_CODES[OperatorTokenType.EQUAL_EQUAL], str, str)] = Specialization("str-str ==", str, str, operator.eq)
+    table[(TOKEN_CODES[OperatorTokenType.BANG_EQUAL], str, str)] = Specialization("str-str !=", str, str, operator.ne)
+    return table
+
+
+# Keyed by the operator's token code and the operand types.
+SPECIALIZATIONS = _build_table()
+
+
+def quicken(expression: Any, left: Any, right: Any) -> None:
+    """
+    Record the operand types seen by a generic evaluation, specializing the site once they are stable.
+
+    :param expression: The `Binary` site that was just evaluated generically.
+    :param left: The left operand value.
+    :param right: The right operand value.
+    """
+    expression.generic_runs += 1
+    if expression.deopts >= MAX_DEOPTS:
+        return None
+
+    types = (type(left), type(right))
+    if types != expression.observed:
+        expression.observed = types
+        expression.warmup = WARMUP
+        return None
+
+    expression.warmup -= 1
+    if expression.warmup <= 0:
+        expression.specialized = SPECIALIZATIONS.get((expression.operator.code, *types))
+        if expression.specialized is None:
+            # No fast path for these types: stay generic for good rather than look again every run.
+            expression.deopts = MAX_DEOPTS
+
+
+def deoptimize(expression: Any) -> None:
+    """
+    Rewrite a specialized site back to the generic node after its guard failed.
+    """
+    expression.specialized = None
+    expression.deopts += 1
+    expression.observed = None
+
+
+@dataclass(kw_only=True, frozen=True)
+class SiteCounters:
+    line: int
+    operator: str
+    state: str
+    hits: int
+    generic_runs: int
+    deopts: int
+
+
+def site_counters(expression: Any) -> SiteCounters:
+    specialized = expression.specialized
+    if specialized is not None:
+        state = specialized.name
+    elif expression.deopts >= MAX_DEOPTS:
+        state = "megamorphic"
+    else:
+        state = "generic"
+    return SiteCounters(line=expression.operator.line, operator=str(expression.operator.token_type), state=state,
+                        hits=expression.hits, generic_runs=expression.generic_runs, deopts=expression.deopts)
@@ -1,80 +1,292 @@
-from typing import Dict, List, Sequence, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from .statements import Block, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
-from .expression import Assign, Binary, Call, Expr, ExprVisitor, Grouping, Literal, Logical, Unary, Variable 
+from .statements import Block, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+from .expression import (Array, Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Index, Literal, Logical, Map,
+                         Set, SetIndex, Super, This, Unary, Variable)
 from .interpreter import Interpreter
+from ..environment import Binding
 from ..exceptions import PyNoxResolutionError
 from ..lexer.tokens import Token
-from ..utils.callable_types import FunctionType
+from ..builtins import NativeFunction
+from ..utils.callable_types import ClassType, FunctionType
+
+if TYPE_CHECKING:
+    from .modules import Module
+
+
+class Local:
+    """
+    A local variable: the frame slot it occupies and the nodes that reference it.
+    """
+
+    __slots__ = ("slot", "defined", "captured", "sites")
+
+    def __init__(self, slot: int) -> None:
+        self.slot = slot
+        self.defined = False
+        self.captured = False
+        self.sites: List[Tuple[Any, str]] = []
+
+    def capture(self) -> None:
+        """
+        Mark the local as captured by a closure, turning every site that reads it into a cell access.
+        """
+        if not self.captured:
+            self.captured = True
+            for node, attribute in self.sites:
+                setattr(node, attribute, Binding.CELL)
+
+
+class FunctionScope:
+    """
+    Resolution state of one function body, or of the top-level script.
+    """
+
+    def __init__(self, enclosing: Optional["FunctionScope"] = None, name: str = "<script>") -> None:
+        self.enclosing = enclosing
+        self.name = name
+        self.scopes: List[Dict[str, Local]] = []
+        self.upvalues: List[Tuple[bool, int]] = []
+        # The (function, variable) each upvalue was captured from, in upvalue order.
+        self.captures: List[Tuple[str, str]] = []
+        self.next_slot = 0
+        self.frame_size = 0
+
+    def add_local(self, name: str) -> Local:
+        local = Local(self.next_slot)
+        self.scopes[-1][name] = local
+        self.next_slot += 1
+        self.frame_size = max(self.frame_size, self.next_slot)
+        return local
+
+    def find_local(self, name: str) -> Optional[Local]:
+        for scope in reversed(self.scopes):
+            local = scope.get(name)
+            if local is not None:
+                return local
+        return None
+
+    def add_upvalue(self, is_local: bool, index: int, capture: Tuple[str, str]) -> int:
+        upvalue = (is_local, index)
+        if upvalue in self.upvalues:
+            return self.upvalues.index(upvalue)
+        self.upvalues.append(upvalue)
+        self.captures.append(capture)
+        return len(self.upvalues) - 1
+
+
+def _slot_attribute(attribute: str) -> str:
+    return attribute.replace("binding", "slot")
+
+
+def _flatten(statements: Sequence[Stmt]) -> Tuple[Tuple[Stmt, ...], Tuple[int, ...]]:
+    """
+    Splice already resolved nested blocks into one statement list.
+
+    Every local already has its own frame slot, so a nested block needs no scope at run time;
+    its slots are returned so the enclosing block or loop can clear them when it exits.
+
+    :param statements: The statements of a block, loop or function body.
+    :return: The flattened statements and the slots declared by the spliced blocks.
+    """
+    code: List[Stmt] = []
+    slots: List[int] = []
+    for stmt in statements:
+        if isinstance(stmt, Block):
+            code.extend(stmt.code)
+            slots.extend(stmt.slots)
+        else:
+            code.append(stmt)
+    return tuple(code), tuple(slots)
 
 
 class Resolver(ExprVisitor, StmtVisitor):
+    """
+    Resolves every variable to a global, a slot of its function's frame, a cell in that frame
+    (when an inner function captures it) or an upvalue of the running closure.
+    """
 
-    def __init__(self, interpreter: Interpreter) -> None:
+    def __init__(self, interpreter: Interpreter, script_returns: bool = False) -> None:
         self.__interpreter = interpreter
-        self.__scopes: List[Dict[str, bool]] = [] 
+        # Prepared programs hand a value back to the host with a top-level `return`.
+        self.script_returns = script_returns
+        self.__fn: FunctionScope = FunctionScope()
         self.current_fn: FunctionType = FunctionType.NONE 
+        self.current_class: ClassType = ClassType.NONE
+        self.__global_writes: set[str] = set()
+        self.__native_calls: List[Tuple[Call, NativeFunction]] = []
 
     def _begin_scope(self) -> None:
-        self.__scopes.append({})
+        self.__fn.scopes.append({})
 
-    def _declare(self, name: Token) -> None:
-        if not self.__scopes:
+    def _declare(self, name: Token, node: Any = None, attribute: str = "binding") -> Optional[Local]:
+        scopes = self.__fn.scopes
+        if not scopes:
+            self.__global_writes.add(name.lexeme)
             return None
 
-        scope = self.__scopes[-1]
-        if name.lexeme in scope:
+        if name.lexeme in scopes[-1]:
             raise PyNoxResolutionError(
                 self.__interpreter.error(name, f"Variable '{name.lexeme}' already declared in this scope!")
             )
-        scope[name.lexeme] = False
+        local = self.__fn.add_local(name.lexeme)
+        if node is not None:
+            self._bind(node, attribute, local)
+        return local
 
     def _define(self, name: Token) -> None:
-        if not self.__scopes:
+        scopes = self.__fn.scopes
+        if not scopes:
             return None
 
-        self.__scopes[-1][name.lexeme] = True
+        scopes[-1][name.lexeme].defined = True
 
+    def _bind(self, node: Any, attribute: str, local: Local) -> None:
+        setattr(node, attribute, Binding.CELL if local.captured else Binding.LOCAL)
+        setattr(node, _slot_attribute(attribute), local.slot)
+        local.sites.append((node, attribute))
 
-    def _end_scope(self) -> None:
-        self.__scopes.pop()
+    def _end_scope(self) -> Dict[str, Local]:
+        scope = self.__fn.scopes.pop()
+        self.__fn.next_slot -= len(scope)
+        return scope
 
     def _resolve(self, statements: Sequence[Union[Stmt, Expr]]) -> None:
         for stmt in statements:
             self.__resolve(stmt)
+        if self.__fn.enclosing is None and not self.__fn.scopes:
+            self._bind_native_calls()
+            self.__interpreter._resolve_script(frame_size=self.__fn.frame_size)
+
+    def _resolve_module(self, module: "Module") -> None:
+        """
+        Resolve a module's top-level code in its own frame, recording the frame size and the
+        globals it writes so the programs importing it bind their native calls consistently.
+        """
+        for stmt in module.statements:
+            self.__resolve(stmt)
+        self._bind_native_calls()
+        module.frame_size = self.__fn.frame_size
+        module.global_writes = frozenset(self.__global_writes)
+        module.resolved = True
+
+    def _is_global(self, name: Token) -> bool:
+        fn: Optional[FunctionScope] = self.__fn
+        while fn is not None:
+            if fn.find_local(name.lexeme) is not None:
+                return False
+            fn = fn.enclosing
+        return True
+
+    def _bind_native_calls(self) -> None:
+        """
+        Check the arity of calls to natives once, and let the interpreter call them directly.
+
+        Only names the program never declares or assigns at global scope are bound; the
+        interpreter still guards each bound call on the identity of the callee.
+        """
+        for expression, native in self.__native_calls:
+            name = expression.callee.name
+            if name.lexeme in self.__global_writes:
+                continue
+            if len(expression.arguments) != native.arity:
+                raise PyNoxResolutionError(self.__interpreter.error(
+                    name, f"Expected {native.arity} arguments but got {len(expression.arguments)}."
+                ))
+            if not native.pass_interpreter and not native.suspends:
+                expression.native = native
+        self.__native_calls.clear()
 
     def __resolve(self, stmt: Union[Stmt, Expr]) -> None:
         stmt.accept(self)
 
-    def _resolve_local_expr(self, expression: Expr, name: Token) -> None:
-        for i, scope in enumerate(reversed(self.__scopes)):
-            if name.lexeme in scope:
-                self.__interpreter._resolve(expression, i)
-                return None
+    def _resolve_local_expr(self, expression: Expr, name: str, attribute: str = "binding") -> None:
+        local = self.__fn.find_local(name)
+        if local is not None:
+            self._bind(expression, attribute, local)
+            return None
+
+        index = self._resolve_upvalue(self.__fn, name)
+        if index is not None:
+            setattr(expression, attribute, Binding.UPVALUE)
+            setattr(expression, _slot_attribute(attribute), index)
+
+    def _resolve_upvalue(self, fn: FunctionScope, name: str) -> Optional[int]:
+        if fn.enclosing is None:
+            return None
+
+        local = fn.enclosing.find_local(name)
+        if local is not None:
+            local.capture()
+            return fn.add_upvalue(True, local.slot, (fn.enclosing.name, name))
+
+        index = self._resolve_upvalue(fn.enclosing, name)
+        if index is not None:
+            return fn.add_upvalue(False, index, fn.enclosing.captures[index])
+        return None
 
     def _resolve_function(self, function: Function, type: FunctionType) -> None:
         enclosing_fn: FunctionType = self.current_fn
         self.current_fn = type
+        self.__fn = FunctionScope(enclosing=self.__fn, name=function.name.lexeme)
         self._begin_scope()
+
+        params: List[Local] = []
+        if type in (FunctionType.METHOD, FunctionType.INITIALIZER):
+            params.append(self.__fn.add_local("this"))
         for param in function.params:
-            self._declare(name=param)
+            params.append(self._declare(name=param))
             self._define(name=param)
 
         self._resolve(statements=function.body)
         self._end_scope()
-        self.current_fn = enclosing_fn
 
+        function.code, _ = _flatten(function.body)
+        function.frame_size = self.__fn.frame_size
+        function.upvalues = tuple(self.__fn.upvalues)
+        function.captures = tuple(self.__fn.captures)
+        function.boxed_params = tuple(local.slot for local in params if local.captured)
+        self.__fn = self.__fn.enclosing
+        self.current_fn = enclosing_fn
 
     def visit_block_stmt(self, stmt: Block) -> None:
         self._begin_scope()
         self._resolve(statements=stmt.statements)
-        self._end_scope()
+        scope = self._end_scope()
+        stmt.code, nested_slots = _flatten(stmt.statements)
+        stmt.slots = tuple(local.slot for local in scope.values()) + nested_slots
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        enclosing_class: ClassType = self.current_class
+        self.current_class = ClassType.CLASS
+
+        self._declare(name=stmt.name, node=stmt)
+        self._define(name=stmt.name)
+
+        if stmt.superclass is not None:
+            if stmt.superclass.name.lexeme == stmt.name.lexeme:
+                raise PyNoxResolutionError(
+                    self.__interpreter.error(stmt.superclass.name, "A class can't inherit from itself.")
+                )
+            self.current_class = ClassType.SUBCLASS
+            self.__resolve(stmt.superclass)
+            self._begin_scope()
+            self._bind(stmt, "super_binding", self.__fn.add_local("super"))
+
+        for method in stmt.methods:
+            fn_type = FunctionType.INITIALIZER if method.name.lexeme == "init" else FunctionType.METHOD
+            self._resolve_function(function=method, type=fn_type)
+
+        if stmt.superclass is not None:
+            self._end_scope()
+
+        self.current_class = enclosing_class
 
     def visit_expr_stmt(self, stmt: Expression) -> None:
         self.__resolve(stmt.expression)
 
     def visit_function_stmt(self, stmt: Function):
-        self._declare(name=stmt.name)
+        self._declare(name=stmt.name, node=stmt)
         self._define(name=stmt.name)
         self._resolve_function(function=stmt, type=FunctionType.FUNCTION)
 
@@ -84,17 +296,30 @@ class Resolver(ExprVisitor, StmtVisitor):
         if stmt.else_branch is not None:
             self.__resolve(stmt.else_branch)
 
+    def visit_import_stmt(self, stmt: Import) -> None:
+        if self.__fn.enclosing is not None or self.__fn.scopes:
+            raise PyNoxResolutionError(self.__interpreter.error(stmt.keyword, "Can only import at top level."))
+        if stmt.module is None:
+            raise PyNoxResolutionError(
+                self.__interpreter.error(stmt.keyword, f"Module '{stmt.path.literal}' was not loaded.")
+            )
+        self.__global_writes.update(stmt.module.global_writes)
+
     def visit_print_stmt(self, stmt: Print) -> None:
         self.__resolve(stmt.expression)
 
     def visit_return_stmt(self, stmt: Return) -> None:
-        if self.current_fn == FunctionType.NONE:
+        if self.current_fn == FunctionType.NONE and not self.script_returns:
             raise PyNoxResolutionError(self.__interpreter.error(stmt.keyword, "Can't return from top-level code."))
         if stmt.value is not None:
+            if self.current_fn == FunctionType.INITIALIZER:
+                raise PyNoxResolutionError(
+                    self.__interpreter.error(stmt.keyword, "Can't return a value from an initializer.")
+                )
             self.__resolve(stmt.value)
 
     def visit_var_stmt(self, stmt: Var) -> None:
-        self._declare(name=stmt.name)
+        self._declare(name=stmt.name, node=stmt)
         if stmt.initializer is not None:
             self.__resolve(stmt=stmt.initializer)
         self._define(name=stmt.name)
@@ -102,10 +327,13 @@ class Resolver(ExprVisitor, StmtVisitor):
     def visit_while_stmt(self, stmt: While) -> None:
         self.__resolve(stmt.condition)
         self.__resolve(stmt.body)
+        stmt.code, stmt.slots = _flatten([stmt.body])
 
     def visit_assign_expr(self, expression: Assign) -> None:
         self.__resolve(stmt=expression.value)
-        self._resolve_local_expr(expression=expression, name=expression.name)
+        if self._is_global(expression.name):
+            self.__global_writes.add(expression.name.lexeme)
+        self._resolve_local_expr(expression=expression, name=expression.name.lexeme)
 
     def visit_binary(self, expression: Binary) -> None:
         self.__resolve(expression.left)
@@ -114,11 +342,16 @@ class Resolver(ExprVisitor, StmtVisitor):
     def visit_call_expr(self, expression: Call) -> None:
         self.__resolve(expression.callee)
 
+        if isinstance(expression.callee, Variable) and self._is_global(expression.callee.name):
+            native = self.__interpreter.natives.get(expression.callee.name.lexeme)
+            if isinstance(native, NativeFunction):
+                self.__native_calls.append((expression, native))
+
         for arg in expression.arguments:
             self.__resolve(arg)
 
     def visit_grouping(self, expression: Grouping) -> None:
-        self.__resolve(expression)
+        self.__resolve(expression.expression)
 
 
     def visit_literal(self, expression: Literal) -> None:
@@ -132,7 +365,55 @@ class Resolver(ExprVisitor, StmtVisitor):
         self.__resolve(expression.right)
 
     def visit_variable_expr(self, expression: Variable) -> None:
-        if self.__scopes and self.__scopes[-1].get(expression.name.lexeme) is False:
-            self.__interpreter.error(token=expression.name, message="Can't read local variable in its own initializer.")
-        self._resolve_local_expr(expression=expression, name=expression.name)
+        scopes = self.__fn.scopes
+        if scopes:
+            local = scopes[-1].get(expression.name.lexeme)
+            if local is not None and not local.defined:
+                raise PyNoxResolutionError(
+                    self.__interpreter.error(expression.name, "Can't read local variable in its own initializer.")
+                )
+        self._resolve_local_expr(expression=expression, name=expression.name.lexeme)
+
+    def visit_array_expr(self, expression: Array) -> None:
+        for element in expression.elements:
+            self.__resolve(element)
+
+    def visit_map_expr(self, expression: Map) -> None:
+        for key, value in zip(expression.keys, expression.values):
+            self.__resolve(key)
+            self.__resolve(value)
+
+    def visit_index_expr(self, expression: Index) -> None:
+        self.__resolve(expression.obj)
+        self.__resolve(expression.index)
+
+    def visit_set_index_expr(self, expression: SetIndex) -> None:
+        self.__resolve(expression.obj)
+        self.__resolve(expression.index)
+        self.__resolve(expression.value)
+
+    def visit_get_expr(self, expression: Get) -> None:
+        self.__resolve(expression.obj)
+
+    def visit_set_expr(self, expression: Set) -> None:
+        self.__resolve(expression.value)
+        self.__resolve(expression.obj)
+
+    def visit_this_expr(self, expression: This) -> None:
+        if self.current_class == ClassType.NONE:
+            raise PyNoxResolutionError(
+                self.__interpreter.error(expression.keyword, "Can't use 'this' outside of a class.")
+            )
+        self._resolve_local_expr(expression=expression, name="this")
 
+    def visit_super_expr(self, expression: Super) -> None:
+        if self.current_class == ClassType.NONE:
+            raise PyNoxResolutionError(
+                self.__interpreter.error(expression.keyword, "Can't use 'super' outside of a class.")
+            )
+        if self.current_class != ClassType.SUBCLASS:
+            raise PyNoxResolutionError(
+                self.__interpreter.error(expression.keyword, "Can't use 'super' in a class with no superclass.")
+            )
+        self._resolve_local_expr(expression=expression, name="super")
+        self._resolve_local_expr(expression=expression, name="this", attribute="this_binding")
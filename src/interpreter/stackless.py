@@ -0,0 +1,53 @@
+from typing import Any, Iterable
+
+from .expression import Call
+from .statements import Class, Function, Import
+
+__all__ = ["MAX_DEPTH", "mark_suspending"]
+
+# Default limit on nested Lox calls when running stackless.
+MAX_DEPTH = 250_000
+
+
+def _children(node: Any) -> Iterable[Any]:
+    for value in vars(node).values():
+        if hasattr(value, "accept"):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if hasattr(item, "accept"):
+                    yield item
+
+
+def _mark(node: Any) -> bool:
+    suspends = node.__dict__.get("suspends")
+    if suspends is not None:
+        return suspends
+
+    if isinstance(node, Function):
+        # Declaring a function doesn't run its body; the body is marked for when it is called.
+        node.body_suspends = any([_mark(stmt) for stmt in node.body])
+        suspends = False
+    elif isinstance(node, Class):
+        for method in node.methods:
+            _mark(method)
+        suspends = False
+    else:
+        suspends = isinstance(node, (Call, Import))
+        for child in _children(node):
+            suspends = _mark(child) or suspends
+    node.suspends = suspends
+    return suspends
+
+
+def mark_suspending(nodes: Iterable[Any]) -> None:
+    """
+    Flag every node that may call into Lox code while it is evaluated.
+
+    The stackless evaluator runs flagged nodes as generators that can suspend on a call, and
+    hands every other node to the ordinary recursive visitor, which can't grow the call depth.
+
+    :param nodes: Statements or expressions whose whole subtrees get a ``suspends`` attribute.
+    """
+    for node in nodes:
+        _mark(node)
@@ -1,8 +1,12 @@
-from typing import Any, List, Optional, Protocol
+from typing import TYPE_CHECKING, Any, List, Optional, Protocol, Tuple
 
-from .expression import Expr
+from .expression import Expr, Variable
+from ..environment import Binding
 from ..lexer.tokens import Token
 
+if TYPE_CHECKING:
+    from .modules import Module
+
 class StmtVisitor(Protocol):
 
     def visit_expr_stmt(self, stmt):
@@ -29,6 +33,12 @@ class StmtVisitor(Protocol):
     def visit_return_stmt(self, stmt):
         pass
 
+    def visit_class_stmt(self, stmt):
+        pass
+
+    def visit_import_stmt(self, stmt):
+        pass
+
 
 class Stmt(Protocol):
 
@@ -39,6 +49,10 @@ class Block(Stmt):
 
     def __init__(self, stmts: List[Stmt]) -> None:
         self.statements = stmts
+        # Filled in by the `Resolver`: the statements to run with nested blocks spliced in,
+        # and the frame slots of every local they declare, cleared when the block exits.
+        self.code: Tuple[Stmt, ...] = tuple(stmts)
+        self.slots: Tuple[int, ...] = ()
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_block_stmt(self)
@@ -69,6 +83,19 @@ class Function(Stmt):
         self.name = name
         self.params = params
         self.body = body
+        self.binding = Binding.GLOBAL
+        self.slot = -1
+        # Filled in by the `Resolver`: frame layout and the cells captured from enclosing frames.
+        self.frame_size = len(params)
+        self.upvalues: Tuple[Tuple[bool, int], ...] = ()
+        self.captures: Tuple[Tuple[str, str], ...] = ()
+        self.boxed_params: Tuple[int, ...] = ()
+        self.code: Tuple[Stmt, ...] = tuple(body)
+        # Set by `stackless.mark_suspending`: whether running the body may call into Lox code.
+        self.body_suspends = True
+        # Tiered execution: calls so far, and the body compiled to Python (False if it can't be).
+        self.calls = 0
+        self.tier: Any = None
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_function_stmt(self)
@@ -86,6 +113,8 @@ class Var(Stmt):
     def __init__(self, name: Token, initializer: Optional[Expr]) -> None:
         self.initializer = initializer
         self.name = name
+        self.binding = Binding.GLOBAL
+        self.slot = -1
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_var_stmt(self)
@@ -95,6 +124,10 @@ class While(Stmt):
     def __init__(self, condition: Expr, body: Stmt) -> None:
         self.condition = condition
         self.body = body
+        # Filled in by the `Resolver`: the body with nested blocks spliced in. Locals declared in
+        # the body keep their frame slots across iterations and are cleared once the loop exits.
+        self.code: Tuple[Stmt, ...] = (body,)
+        self.slots: Tuple[int, ...] = ()
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_while_stmt(self)
@@ -108,3 +141,30 @@ class Return(Stmt):
 
     def accept(self, visitor: StmtVisitor):
         return visitor.visit_return_stmt(self)
+
+
+class Class(Stmt):
+
+    def __init__(self, name: Token, superclass: Optional[Variable], methods: List[Function]) -> None:
+        self.name = name
+        self.superclass = superclass
+        self.methods = methods
+        self.binding = Binding.GLOBAL
+        self.slot = -1
+        self.super_binding = Binding.GLOBAL
+        self.super_slot = -1
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_class_stmt(self)
+
+
+class Import(Stmt):
+
+    def __init__(self, keyword: Token, path: Token) -> None:
+        self.keyword = keyword
+        self.path = path
+        # Filled in by the `ModuleLoader` once the imported file is found and compiled.
+        self.module: Optional["Module"] = None
+
+    def accept(self, visitor: StmtVisitor):
+        return visitor.visit_import_stmt(self)
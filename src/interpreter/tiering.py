@@ -0,0 +1,337 @@
+import math
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .expression import (Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Index, Inline, Literal, Logical,
+                         SetIndex, This, Unary, Variable)
+from .statements import Block, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
+from ..environment import Binding
+from ..lexer.tokens import KeywordTokens, OperatorTokenType, SingleCharTokenType
+
+__all__ = ["TIER_UP_CALLS", "Tier", "compile_function"]
+
+# Calls a function declaration receives before its body is compiled to Python.
+TIER_UP_CALLS = 64
+
+# Operators whose generic evaluation on two numbers is exactly the Python operator.
+NUMERIC_OPERATORS = {
+    SingleCharTokenType.PLUS: "+",
+    SingleCharTokenType.MINUS: "-",
+    SingleCharTokenType.SLASH: "/",
+    OperatorTokenType.GREATER: ">",
+    OperatorTokenType.GREATER_EQUAL: ">=",
+    OperatorTokenType.LESS: "<",
+    OperatorTokenType.LESS_EQUAL: "<=",
+}
+EQUALITY_OPERATORS = {
+    OperatorTokenType.EQUAL_EQUAL: "==",
+    OperatorTokenType.BANG_EQUAL: "!=",
+}
+
+
+class Tier:
+    """
+    A function body compiled to Python: the code object of a module defining the function,
+    and the AST nodes it hands to the generic fallbacks.
+
+    The code depends only on the resolved declaration, so it is compiled once per process and
+    instantiated per interpreter against that interpreter's runtime helpers.
+    """
+
+    __slots__ = ("name", "code", "constants", "source")
+
+    def __init__(self, name: str, code: Any, constants: Dict[str, Any], source: str) -> None:
+        self.name = name
+        self.code = code
+        self.constants = constants
+        self.source = source
+
+    def instantiate(self, runtime: Dict[str, Any]) -> Callable[..., Any]:
+        namespace = dict(runtime)
+        namespace.update(self.constants)
+        exec(self.code, namespace)
+        return namespace[self.name]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _assigned_slots(node: Any) -> Set[int]:
+    """The local slots an expression assigns."""
+    slots = {node.slot} if isinstance(node, Assign) and node.binding is Binding.LOCAL else set()
+    for value in vars(node).values():
+        for item in value if isinstance(value, (list, tuple)) else (value,):
+            if hasattr(item, "accept"):
+                slots |= _assigned_slots(item)
+    return slots
+
+
+class _Translator(ExprVisitor, StmtVisitor):
+    """
+    Translates a resolved function body to Python source.
+
+    Frame slots become Python locals ``s<slot>`` and upvalue cells are loaded once into ``u<index>``.
+    Arithmetic and comparisons run as Python operators when both operands are numbers, and
+    otherwise fall back to the interpreter's generic implementation, so a failed guard costs
+    one type check and never a recompilation.
+    """
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {}
+        self.temps = 0
+        # Slots of inlined parameters read straight from the caller's argument.
+        self.aliases: Dict[int, str] = {}
+
+    def translate(self, declaration: Function, method: bool) -> Tuple[str, str]:
+        if declaration.boxed_params:
+            raise _Unsupported(declaration)
+        name = f"lox_{declaration.name.lexeme}"
+        arguments = len(declaration.params) + (1 if method else 0)
+        params = ", ".join(["upvalues", *(f"s{slot}" for slot in range(arguments))])
+        self.lines.append(f"def {name}({params}):")
+        for index in range(len(declaration.upvalues)):
+            self.lines.append(f"    u{index} = upvalues[{index}]")
+        self.__block(declaration.code, 1)
+        self.lines.append("    return None")
+        return name, "\n".join(self.lines) + "\n"
+
+    def __constant(self, value: Any) -> str:
+        name = f"k{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def __temp(self) -> str:
+        name = f"t{self.temps}"
+        self.temps += 1
+        return name
+
+    def __emit(self, line: str, depth: int) -> None:
+        self.lines.append("    " * depth + line)
+
+    def __block(self, stmts: Any, depth: int) -> None:
+        emitted = len(self.lines)
+        for stmt in stmts:
+            self.__statement(stmt, depth)
+        if len(self.lines) == emitted:
+            self.__emit("pass", depth)
+
+    def __statement(self, stmt: Stmt, depth: int) -> None:
+        if isinstance(stmt, Expression):
+            self.__emit(self.__expression(stmt.expression), depth)
+        elif isinstance(stmt, Print):
+            self.__emit(f"emit({self.__expression(stmt.expression)})", depth)
+        elif isinstance(stmt, Var):
+            if stmt.binding is not Binding.LOCAL:
+                raise _Unsupported(stmt)
+            value = self.__expression(stmt.initializer) if stmt.initializer is not None else "None"
+            self.__emit(f"s{stmt.slot} = {value}", depth)
+        elif isinstance(stmt, Return):
+            value = self.__expression(stmt.value) if stmt.value is not None else "None"
+            self.__emit(f"return {value}", depth)
+        elif isinstance(stmt, Block):
+            self.__block(stmt.code, depth)
+        elif isinstance(stmt, If):
+            self.__emit(f"if {self.__expression(stmt.condition)}:", depth)
+            self.__block([stmt.then_branch], depth + 1)
+            if stmt.else_branch is not None:
+                self.__emit("else:", depth)
+                self.__block([stmt.else_branch], depth + 1)
+        elif isinstance(stmt, While):
+            self.__emit(f"while {self.__expression(stmt.condition)}:", depth)
+            self.__block(stmt.code, depth + 1)
+        else:
+            raise _Unsupported(stmt)
+
+    def __expression(self, expression: Expr) -> str:
+        return expression.accept(self)
+
+    def __number(self, expression: Expr) -> Optional[type]:
+        if isinstance(expression, Literal) and type(expression.value) in (int, float):
+            return type(expression.value)
+        return None
+
+    def visit_literal(self, expression: Literal) -> str:
+        value = expression.value
+        if type(value) in (int, bool) or value is None or (type(value) is float and math.isfinite(value)):
+            return repr(value)
+        return self.__constant(expression.value)
+
+    def visit_grouping(self, expression: Grouping) -> str:
+        return self.__expression(expression.expression)
+
+    def visit_variable_expr(self, expression: Variable) -> str:
+        return self.__load(expression.name, expression.binding, expression.slot)
+
+    def visit_this_expr(self, expression: This) -> str:
+        return self.__load(expression.keyword, expression.binding, expression.slot)
+
+    def __load(self, name: Any, binding: Binding, slot: int) -> str:
+        if binding is Binding.LOCAL:
+            return self.aliases.get(slot, f"s{slot}")
+        if binding is Binding.UPVALUE:
+            return f"u{slot}.value"
+        if binding is Binding.GLOBAL:
+            key = repr(name.lexeme)
+            return f"(G[{key}] if {key} in G else load_global({self.__constant(name)}))"
+        raise _Unsupported(name)
+
+    def visit_assign_expr(self, expression: Assign) -> str:
+        value = self.__expression(expression.value)
+        if expression.binding is Binding.LOCAL:
+            return f"(s{expression.slot} := {value})"
+        if expression.binding is Binding.UPVALUE:
+            return f"store_cell(u{expression.slot}, {value})"
+        if expression.binding is Binding.GLOBAL:
+            return f"assign_global({self.__constant(expression.name)}, {value})"
+        raise _Unsupported(expression)
+
+    def visit_logical_expr(self, expression: Logical) -> str:
+        operator = "or" if expression.operator.token_type is KeywordTokens.OR else "and"
+        return f"({self.__expression(expression.left)} {operator} {self.__expression(expression.right)})"
+
+    def visit_unary(self, expression: Unary) -> str:
+        right = self.__expression(expression.right)
+        if expression.operator.token_type is OperatorTokenType.BANG:
+            return f"(not {right})"
+        if self.__number(expression.right) is not None:
+            return f"(-{right})"
+        value = self.__temp()
+        return f"(-{value} if type({value} := {right}) in NUM else negate({self.__constant(expression)}, {value}))"
+
+    def visit_binary(self, expression: Binary) -> str:
+        token_type = expression.operator.token_type
+        left, right = self.__expression(expression.left), self.__expression(expression.right)
+        if token_type is SingleCharTokenType.STAR:
+            # The generic evaluation of `*` is the Python operator on any operands.
+            return f"({left} * {right})"
+
+        operator = NUMERIC_OPERATORS.get(token_type) or EQUALITY_OPERATORS.get(token_type)
+        if operator is None:
+            raise _Unsupported(expression)
+
+        node = self.__constant(expression)
+        left_type, right_type = self.__number(expression.left), self.__number(expression.right)
+        if left_type is not None and right_type is not None:
+            return f"binary({node}, {left}, {right})"
+
+        left_value = left if left_type is not None else self.__temp()
+        right_value = right if right_type is not None else self.__temp()
+        left_first = left if left_type is not None else f"({left_value} := {left})"
+        right_first = right if right_type is not None else f"({right_value} := {right})"
+
+        if token_type in EQUALITY_OPERATORS:
+            # Lox equality never holds across types, so only same-typed numbers take the fast path.
+            if left_type is not None:
+                guard = f"type({right_first}) is {left_type.__name__}"
+            elif right_type is not None:
+                guard = f"type({left_first}) is {right_type.__name__}"
+            else:
+                guard = f"type({left_first}) is type({right_first}) and type({left_value}) in NUM"
+        elif left_type is not None:
+            guard = f"type({right_first}) in NUM"
+        elif right_type is not None:
+            guard = f"type({left_first}) in NUM"
+        else:
+            # `&` rather than `and`: both operands must be evaluated whichever way the guard goes.
+            guard = f"(type({left_first}) in NUM) & (type({right_first}) in NUM)"
+
+        return (f"({left_value} {operator} {right_value} if {guard} "
+                f"else binary({node}, {left_value}, {right_value}))")
+
+    def visit_call_expr(self, expression: Call) -> str:
+        callee = self.__expression(expression.callee)
+        arguments = [self.__expression(argument) for argument in expression.arguments]
+        listed = ", ".join(arguments)
+        node = self.__constant(expression)
+        value = self.__temp()
+        fallback = f"call({node}, {value}, [{listed}])"
+
+        if expression.native is not None:
+            native = self.__constant(expression.native)
+            function = self.__constant(expression.native.function)
+            return f"({function}({listed}) if ({value} := {callee}) is {native} else {fallback})"
+
+        entry = self.__temp()
+        direct = ", ".join([f"{value}.upvalues", *arguments])
+        return (f"({entry}({direct}) if type({value} := {callee}) is PyNoxFunction "
+                f"and ({entry} := {value}.entry) is not None and {value}.param_count == {len(arguments)} "
+                f"else {fallback})")
+
+    def visit_inline_expr(self, expression: Inline) -> str:
+        callee = self.__expression(expression.call.callee)
+        value = self.__temp()
+        assigned = _assigned_slots(expression.body)
+        # An argument expression with side effects could write a caller's local after it was passed, so
+        # locals stand in for parameters only when every argument is a plain local or literal.
+        plain = all(isinstance(argument, Literal)
+                    or (isinstance(argument, Variable) and argument.binding is Binding.LOCAL)
+                    for argument in expression.call.arguments)
+        stores, aliases = [], {}
+        for slot, argument in zip(expression.slots, expression.call.arguments):
+            if plain and slot not in assigned:
+                # Nothing can change a caller's local while the body runs, so it stands in for the parameter.
+                aliases[slot] = self.__expression(argument)
+            else:
+                stores.append(f"(s{slot} := {self.__expression(argument)})")
+        self.aliases.update(aliases)
+        inlined = self.__expression(expression.body)
+        for slot in aliases:
+            del self.aliases[slot]
+        if stores:
+            inlined = f"({', '.join(stores)}, {inlined})[-1]"
+        return (f"({inlined} if type({value} := {callee}) is PyNoxFunction "
+                f"and {value}.declaration is {self.__constant(expression.declaration)} "
+                f"else {self.visit_call_expr(expression.call)})")
+
+    def visit_get_expr(self, expression: Get) -> str:
+        obj = self.__expression(expression.obj)
+        node = self.__constant(expression)
+        value, cache = self.__temp(), self.__temp()
+        return (f"({value}.slots[{cache}[1]] if type({value} := {obj}) is PyNoxInstance "
+                f"and ({cache} := {node}.cache) is not None and {cache}[0] is {value}.shape and {cache}[2] is None "
+                f"else get_property({node}, {value}))")
+
+    def visit_index_expr(self, expression: Index) -> str:
+        obj, index = self.__expression(expression.obj), self.__expression(expression.index)
+        return f"index({self.__constant(expression)}, {obj}, {index})"
+
+    def visit_set_index_expr(self, expression: SetIndex) -> str:
+        obj, index = self.__expression(expression.obj), self.__expression(expression.index)
+        value = self.__expression(expression.value)
+        return f"set_index({self.__constant(expression)}, {obj}, {index}, {value})"
+
+    def visit_array_expr(self, expression: Any) -> str:
+        raise _Unsupported(expression)
+
+    def visit_map_expr(self, expression: Any) -> str:
+        raise _Unsupported(expression)
+
+    def visit_set_expr(self, expression: Any) -> str:
+        raise _Unsupported(expression)
+
+    def visit_super_expr(self, expression: Any) -> str:
+        raise _Unsupported(expression)
+
+
+def compile_function(declaration: Function, method: bool) -> Optional[Tier]:
+    """
+    Compile a resolved function body to Python, once per process.
+
+    :param declaration: The function declaration, after resolution.
+    :param method: Whether the function is called with its receiver in slot 0.
+    :return: The compiled tier, or None when the body uses constructs the translator leaves
+             to the tree walker: nested functions and classes, captured locals, field stores,
+             array literals and `super`.
+    """
+    tier = declaration.tier
+    if tier is None:
+        translator = _Translator()
+        try:
+            name, source = translator.translate(declaration, method)
+        except _Unsupported:
+            tier = declaration.tier = False
+        else:
+            code = compile(source, f"<lox {declaration.name.lexeme} line {declaration.name.line}>", "exec")
+            tier = declaration.tier = Tier(name, code, translator.constants, source)
+    return tier or None
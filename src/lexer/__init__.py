@@ -1,3 +1,4 @@
 from .lexer import Lexer
+from .symbols import InternReport, SymbolTable
 
-__all__ = ["Lexer",]
+__all__ = ["Lexer", "InternReport", "SymbolTable"]
@@ -1,23 +1,34 @@
+import os
 from typing import Any, List, Optional
 
 from .tokens import (KeywordTokens, LiteralTokenType, OperatorTokenType, Token, 
-                     EOFTokenType, SingleCharTokenType, TokenType) 
+                     EOFTokenType, SingleCharTokenType, TokenType, TOKEN_CODES) 
+from .symbols import SymbolTable
 from ..exceptions import PyNoxSyntaxError
 
 __all__  = ["Lexer"]
 
+KEYWORDS = {str(keyword): keyword for keyword in KeywordTokens}
+
+# Sources at least this long are lexed in parallel when the lexer has more than one worker.
+PARALLEL_MIN_SOURCE = 1 << 20
+
 class Lexer:
     """
     This class represents a lexer, responsible for tokenizing source code.
     """
 
-    def __init__(self, source: str) -> None:
+    def __init__(self, source: str, symbols: Optional[SymbolTable] = None, workers: Optional[int] = 1) -> None:
         """
         Initialize a new Lexer instance with the given source code.
 
         :param source: The source code to tokenize.
+        :param symbols: The symbol table lexemes and string literals are interned into.
+        :param workers: The processes very large sources are lexed in, None for the number of CPUs.
         """
         self.source: str = source
+        self.symbols: SymbolTable = symbols if symbols is not None else SymbolTable()
+        self.workers: Optional[int] = workers
         self.tokens: List[Token] = list()
         self.start: int = 0
         self.current: int = 0
@@ -29,13 +40,20 @@ class Lexer:
 
         :return: A list of Token objects representing the tokens in the source code.
         """
+        workers = self.workers or os.cpu_count() or 1
+        if workers > 1 and len(self.source) >= PARALLEL_MIN_SOURCE:
+            from .parallel import scan_parallel
+
+            self.tokens = scan_parallel(self.source, self.symbols, workers)
+            return self.tokens
         while not self.is_at_end():
             self.start = self.current
             self.scan_token()
         self.tokens.append(Token(token_type=EOFTokenType.EOF,
                                  lexeme="",
                                  literal=None,
-                                 line=self.line))
+                                 line=self.line,
+                                 code=TOKEN_CODES[EOFTokenType.EOF]))
         return self.tokens
 
     def scan_token(self) -> None:
@@ -52,8 +70,14 @@ class Lexer:
                 self.add_token(token_type=SingleCharTokenType.LEFT_BRACE)
             case '}':
                 self.add_token(token_type=SingleCharTokenType.RIGHT_BRACE)
+            case '[':
+                self.add_token(token_type=SingleCharTokenType.LEFT_BRACKET)
+            case ']':
+                self.add_token(token_type=SingleCharTokenType.RIGHT_BRACKET)
             case ',':
                 self.add_token(token_type=SingleCharTokenType.COMMA)
+            case ':':
+                self.add_token(token_type=SingleCharTokenType.COLON)
             case '.':
                 self.add_token(token_type=SingleCharTokenType.DOT)
             case '-':
@@ -114,9 +138,8 @@ class Lexer:
         while self.peek().isalnum():
             self.advance()
         text: str = self.source[self.start:self.current]
-        if text in list(KeywordTokens):
-            token_type = KeywordTokens(text)
-        else:
+        token_type = KEYWORDS.get(text)
+        if token_type is None:
             token_type = LiteralTokenType.IDENTIFIER
         self.add_token(token_type=token_type)
 
@@ -154,7 +177,7 @@ class Lexer:
 
         self.advance()
 
-        value = self.source[self.start + 1 : self.current - 1]
+        value = self.symbols.intern(self.source[self.start + 1 : self.current - 1])
         self.add_token(token_type=LiteralTokenType.STRING, literal=value)
 
     def advance(self) -> str:
@@ -207,10 +230,15 @@ class Lexer:
         :param literal: The literal value associated with the token.
         """
         text = self.source[self.start:self.current]
+        if token_type is LiteralTokenType.IDENTIFIER:
+            text = self.symbols.intern_identifier(text)
+        else:
+            text = self.symbols.intern(text)
         self.tokens.append(Token(token_type=token_type,
                                  lexeme=text,
                                  literal=literal,
-                                 line=self.line))
+                                 line=self.line,
+                                 code=TOKEN_CODES[token_type]))
 
     def is_at_end(self) -> bool:
         """
@@ -0,0 +1,128 @@
+import argparse
+import bisect
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from .lexer import Lexer
+from .symbols import SymbolTable
+from .tokens import EOFTokenType, LiteralTokenType, Token, TOKEN_CODES, TOKEN_TYPES
+
+__all__ = ["scan_parallel", "split_source"]
+
+# Chunks handed to each worker, so a slow chunk doesn't leave the other workers idle.
+CHUNKS_PER_WORKER = 2
+
+# Strings, which may span lines, and comments, which may hold a quote.
+_STRING_OR_COMMENT = re.compile(r'"[^"]*"?|//[^\n]*')
+
+
+def split_source(source: str, chunks: int) -> List[int]:
+    """
+    Find where to cut a source so every piece lexes on its own: just after newlines that are
+    outside string literals, close to even sizes.
+
+    :param source: The whole source.
+    :param chunks: The number of pieces wanted; fewer come back if there aren't enough newlines.
+    :return: The offsets the pieces start at, the first being 0.
+    """
+    # Newlines inside these spans are part of a string. A newline ending a comment is a safe cut.
+    starts: List[int] = []
+    ends: List[int] = []
+    for match in _STRING_OR_COMMENT.finditer(source):
+        if source[match.start()] == '"' and source.find("\n", match.start(), match.end()) != -1:
+            starts.append(match.start())
+            ends.append(match.end())
+
+    offsets = [0]
+    size = len(source) / chunks
+    for index in range(1, chunks):
+        position = max(int(size * index), offsets[-1])
+        while True:
+            newline = source.find("\n", position)
+            if newline == -1:
+                return offsets
+            span = bisect.bisect_right(starts, newline) - 1
+            if span < 0 or ends[span] <= newline:
+                break
+            position = ends[span]
+        if newline + 1 < len(source):
+            offsets.append(newline + 1)
+    return offsets
+
+
+def _scan_chunk(chunk: str, line: int) -> List[Tuple[int, str, Any, int]]:
+    """Lex one piece of a source, numbering lines from `line`. Runs in a worker process."""
+    lexer = Lexer(source=chunk)
+    lexer.line = line
+    tokens = lexer.scan_tokens()
+    tokens.pop()
+    return [(token.code, token.lexeme, token.literal, token.line) for token in tokens]
+
+
+def scan_parallel(source: str, symbols: Optional[SymbolTable] = None, workers: Optional[int] = None) -> List[Token]:
+    """
+    Tokenize a source in a pool of worker processes, with the same tokens, lines and errors as
+    `Lexer.scan_tokens`.
+
+    The source is cut at newlines outside string literals, the pieces are lexed in the workers
+    and the tokens are stitched back in order. Lexemes and string literals are interned into
+    `symbols` in source order, as the sequential lexer would.
+
+    :param source: The source code to tokenize.
+    :param symbols: The symbol table lexemes and string literals are interned into.
+    :param workers: The number of worker processes, defaults to the number of CPUs.
+    :return: The tokens, ending with EOF.
+    :raises PyNoxSyntaxError: The first error in the source, like the sequential lexer.
+    """
+    symbols = symbols if symbols is not None else SymbolTable()
+    workers = workers or os.cpu_count() or 1
+    offsets = split_source(source, workers * CHUNKS_PER_WORKER) if workers > 1 else [0]
+    if len(offsets) == 1:
+        return Lexer(source=source, symbols=symbols).scan_tokens()
+    chunks = [source[start:end] for start, end in zip(offsets, [*offsets[1:], len(source)])]
+    lines = [source.count("\n", 0, start) + 1 for start in offsets]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        results = list(pool.map(_scan_chunk, chunks, lines))
+
+    tokens: List[Token] = []
+    append = tokens.append
+    intern, intern_identifier = symbols.intern, symbols.intern_identifier
+    string, identifier = TOKEN_CODES[LiteralTokenType.STRING], TOKEN_CODES[LiteralTokenType.IDENTIFIER]
+    for result in results:
+        for code, lexeme, literal, line in result:
+            if code == string:
+                literal = intern(literal)
+            lexeme = intern_identifier(lexeme) if code == identifier else intern(lexeme)
+            append(Token(token_type=TOKEN_TYPES[code], lexeme=lexeme, literal=literal, line=line, code=code))
+    append(Token(token_type=EOFTokenType.EOF, lexeme="", literal=None, line=source.count("\n") + 1,
+                 code=TOKEN_CODES[EOFTokenType.EOF]))
+    return tokens
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parallel lexing of a source against the sequential lexer.")
+    parser.add_argument("source", help="Path of the Lox source to lex.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to time.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count; the best is reported.")
+    options = parser.parse_args()
+    with open(options.source, "r") as f:
+        text = f.read()
+
+    def best(scan: Any) -> Tuple[float, List[Token]]:
+        timings, result = [], []
+        for _ in range(options.repeat):
+            start = time.perf_counter()
+            result = scan()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    baseline, expected = best(lambda: Lexer(source=text).scan_tokens())
+    print(f"{len(text)} characters, {len(expected)} tokens, {os.cpu_count()} CPUs")
+    print(f"sequential  {baseline:8.3f}s")
+    for count in options.workers:
+        elapsed, tokens = best(lambda: scan_parallel(text, workers=count))
+        verdict = "identical" if tokens == expected else "DIFFERENT"
+        print(f"{count:2} workers  {elapsed:8.3f}s  {baseline / elapsed:5.2f}x  {verdict}")
@@ -0,0 +1,68 @@
+import sys
+from dataclasses import dataclass
+from typing import Dict
+
+__all__ = ["InternReport", "SymbolTable"]
+
+
+@dataclass(kw_only=True, frozen=True)
+class InternReport:
+    requested: int
+    unique: int
+    bytes_saved: int
+
+    def __str__(self) -> str:
+        return (f"{self.requested} strings interned into {self.unique} symbols, "
+                f"{self.bytes_saved} bytes saved by deduplication")
+
+
+class SymbolTable:
+    """
+    A per-program table that maps every lexeme and string literal to one shared ``str`` object.
+
+    Identifiers are additionally passed through ``sys.intern`` so they are the very objects used
+    as keys by natives and host code, and dictionary lookups succeed on the identity check.
+    """
+
+    def __init__(self) -> None:
+        self.__symbols: Dict[str, str] = {}
+        self.__requested: int = 0
+        self.__bytes_saved: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__symbols)
+
+    def intern(self, text: str) -> str:
+        """
+        Return the shared copy of a string, registering it on first sight.
+
+        :param text: The string sliced out of the source.
+        :return: The canonical string object for the given text.
+        """
+        self.__requested += 1
+        symbol = self.__symbols.get(text)
+        if symbol is None:
+            self.__symbols[text] = text
+            return text
+        if symbol is not text:
+            self.__bytes_saved += sys.getsizeof(text)
+        return symbol
+
+    def intern_identifier(self, text: str) -> str:
+        """
+        Return the shared copy of an identifier, interned process-wide.
+
+        :param text: The identifier sliced out of the source.
+        :return: The canonical string object for the identifier.
+        """
+        if text not in self.__symbols:
+            text = sys.intern(text)
+        return self.intern(text)
+
+    def report(self) -> InternReport:
+        """
+        Summarize how much storage deduplication saved so far.
+
+        :return: An `InternReport` for this table.
+        """
+        return InternReport(requested=self.__requested, unique=len(self.__symbols), bytes_saved=self.__bytes_saved)
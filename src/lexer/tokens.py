@@ -1,6 +1,6 @@
 import enum
 from dataclasses import dataclass
-from typing import Any, Optional, Dict
+from typing import Any, Dict, List, Tuple
 
 
 class TokenType(enum.StrEnum):
@@ -27,6 +27,7 @@ class SingleCharTokenType(TokenType):
     LEFT_BRACE = "{"
     RIGHT_BRACE = "}"
     COMMA = ","
+    COLON = ":"
     DOT = "."
     MINUS = "-"
     PLUS = "+"
@@ -55,6 +56,7 @@ class KeywordTokens(TokenType):
     FOR = "for"
     FUNCTION = "fun"
     IF = "if"
+    IMPORT = "import"
     NIL = "nil"
     OR = "or"
     PRINT = "print"
@@ -77,10 +79,33 @@ class LiteralTokenType(TokenType):
     STRING = enum.auto()
     IDENTIFIER = enum.auto()
 
+
+# Every token type, in the order of their codes: a token's code is its index here.
+TOKEN_TYPES: Tuple[TokenType, ...] = (*SingleCharTokenType, *OperatorTokenType, *KeywordTokens, *EOFTokenType,
+                                      *LiteralTokenType)
+TOKEN_CODES: Dict[TokenType, int] = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+def code_table(entries: Dict[TokenType, Any], default: Any = None) -> List[Any]:
+    """
+    Build a table indexed by token code, to dispatch on a token without hashing its type.
+
+    :param entries: The value of each token type the table knows.
+    :param default: The value of every other token type.
+    :return: A list with an entry for every token code.
+    """
+    table = [default] * len(TOKEN_TYPES)
+    for token_type, value in entries.items():
+        table[TOKEN_CODES[token_type]] = value
+    return table
+
+
 @dataclass(kw_only=True, frozen=True)
 class Token:
     token_type: TokenType
     lexeme: str
     literal: Any
     line: int 
+    # The small integer standing for `token_type` in `TOKEN_TYPES`, what the parser and interpreter dispatch on.
+    code: int
     
@@ -1,6 +1,7 @@
 import enum
 import logging
 import sys
+from typing import Optional, TextIO
 
 
 class LogLevelColors(enum.StrEnum):
@@ -24,9 +25,9 @@ class Formatter(logging.Formatter):
 
 class Logger(logging.Logger):
 
-    def __init__(self, *, name: str, level: int = logging.INFO) -> None:
+    def __init__(self, *, name: str, level: int = logging.INFO, stream: Optional[TextIO] = None) -> None:
         super().__init__(name, level)
-        self._handler = logging.StreamHandler(stream=sys.stdout)
+        self._handler = logging.StreamHandler(stream=stream if stream is not None else sys.stdout)
         self.__setup()
 
     def __setup(self) -> None:
@@ -1,10 +1,56 @@
-from typing import List, Optional
+import enum
+from typing import Callable, Dict, List, Optional, Tuple
 
 from ..exceptions import PyNoxParserError
-from ..interpreter.expression import Assign, Binary, Call, Expr, Grouping, Literal, Logical, Unary, Variable
-from ..lexer.tokens import EOFTokenType, KeywordTokens, LiteralTokenType, OperatorTokenType, SingleCharTokenType, Token, TokenType
+from ..interpreter.expression import (Array, Assign, Binary, Call, Expr, Get, Grouping, Index, Literal, Logical, Map,
+                                      Set, SetIndex, Super, This, Unary, Variable)
+from ..lexer.tokens import (EOFTokenType, KeywordTokens, LiteralTokenType, OperatorTokenType, SingleCharTokenType,
+                            Token, TokenType, TOKEN_CODES, code_table)
 from ..logger import Logger
-from ..interpreter.statements import Block, Function, If, Print, Return, Stmt, Expression, Var, While
+from ..interpreter.statements import Block, Class, Function, If, Import, Print, Return, Stmt, Expression, Var, While
+
+
+class Precedence(enum.IntEnum):
+    NONE = 0
+    ASSIGNMENT = 1
+    OR = 2
+    AND = 3
+    EQUALITY = 4
+    COMPARISON = 5
+    TERM = 6
+    FACTOR = 7
+    UNARY = 8
+    CALL = 9
+
+
+INFIX_PRECEDENCE: Dict[TokenType, Precedence] = {
+    OperatorTokenType.EQUAL: Precedence.ASSIGNMENT,
+    KeywordTokens.OR: Precedence.OR,
+    KeywordTokens.AND: Precedence.AND,
+    OperatorTokenType.BANG_EQUAL: Precedence.EQUALITY,
+    OperatorTokenType.EQUAL_EQUAL: Precedence.EQUALITY,
+    OperatorTokenType.GREATER: Precedence.COMPARISON,
+    OperatorTokenType.GREATER_EQUAL: Precedence.COMPARISON,
+    OperatorTokenType.LESS: Precedence.COMPARISON,
+    OperatorTokenType.LESS_EQUAL: Precedence.COMPARISON,
+    SingleCharTokenType.MINUS: Precedence.TERM,
+    SingleCharTokenType.PLUS: Precedence.TERM,
+    SingleCharTokenType.SLASH: Precedence.FACTOR,
+    SingleCharTokenType.STAR: Precedence.FACTOR,
+    SingleCharTokenType.LEFT_PAREN: Precedence.CALL,
+    SingleCharTokenType.DOT: Precedence.CALL,
+    SingleCharTokenType.LEFT_BRACKET: Precedence.CALL,
+}
+
+KEYWORD_LITERALS = {KeywordTokens.FALSE: False, KeywordTokens.TRUE: True, KeywordTokens.NIL: None}
+
+# The tables are indexed by token code; these are the codes the parser tests for directly.
+_EOF = TOKEN_CODES[EOFTokenType.EOF]
+_NUMBER = TOKEN_CODES[LiteralTokenType.NUMBER]
+_STRING = TOKEN_CODES[LiteralTokenType.STRING]
+_IDENTIFIER = TOKEN_CODES[LiteralTokenType.IDENTIFIER]
+_PRECEDENCES: List[Optional[Precedence]] = code_table(INFIX_PRECEDENCE)
+_KEYWORD_LITERALS: List[object] = code_table(KEYWORD_LITERALS)
 
 
 class Parser:
@@ -14,6 +60,30 @@ class Parser:
         self.__debug = debug
         self.__logger = logger
         self.current = 0
+        self.__prefix: List[Optional[Callable[[Token], Expr]]] = code_table({
+            KeywordTokens.FALSE: self.__literal,
+            KeywordTokens.TRUE: self.__literal,
+            KeywordTokens.NIL: self.__literal,
+            KeywordTokens.SUPER: self.__super,
+            KeywordTokens.THIS: self.__this,
+            SingleCharTokenType.LEFT_PAREN: self.__grouping,
+            SingleCharTokenType.LEFT_BRACKET: self.__array,
+            SingleCharTokenType.LEFT_BRACE: self.__map,
+            OperatorTokenType.BANG: self.__unary,
+            SingleCharTokenType.MINUS: self.__unary,
+        })
+        infix_handlers: Dict[TokenType, Callable[[Expr, Token], Expr]] = {
+            OperatorTokenType.EQUAL: self.__assignment,
+            KeywordTokens.OR: self.__logical,
+            KeywordTokens.AND: self.__logical,
+            SingleCharTokenType.LEFT_PAREN: self.__finish_call,
+            SingleCharTokenType.DOT: self.__get,
+            SingleCharTokenType.LEFT_BRACKET: self.__index,
+        }
+        self.__infix: List[Optional[Tuple[Precedence, Callable[[Expr, Token], Expr]]]] = code_table({
+            token_type: (precedence, infix_handlers.get(token_type, self.__binary))
+            for token_type, precedence in INFIX_PRECEDENCE.items()
+        })
 
     def parse(self):
         try:
@@ -26,12 +96,17 @@ class Parser:
 
     def __declaration(self) -> Stmt:
         try:
+            if self.__match(KeywordTokens.CLASS):
+                return self.__class_declaration()
             if self.__match(KeywordTokens.FUNCTION):
                 return self.__function_declaration("function")
             if self.__match(KeywordTokens.VAR):
                 return self.__var_declaration()
+            if self.__match(KeywordTokens.IMPORT):
+                return self.__import_declaration()
             return self.__statement()
-        except PyNoxParserError:
+        except PyNoxParserError as error:
+            self.__logger.error(str(error))
             self.__synchronize()
             return None
 
@@ -130,6 +205,29 @@ class Parser:
         self.__consume(SingleCharTokenType.SEMICOLON, "Expected ';' after variable declaration.")
         return Var(name=name, initializer=initializer)
 
+    def __import_declaration(self) -> Stmt:
+        keyword = self.__previous()
+        path = self.__consume(LiteralTokenType.STRING, "Expect module path after 'import'.")
+        self.__consume(SingleCharTokenType.SEMICOLON, "Expect ';' after import.")
+        return Import(keyword=keyword, path=path)
+
+    def __class_declaration(self) -> Stmt:
+        name: Token = self.__consume(LiteralTokenType.IDENTIFIER, "Expect class name.")
+
+        superclass: Optional[Variable] = None
+        if self.__match(OperatorTokenType.LESS):
+            self.__consume(LiteralTokenType.IDENTIFIER, "Expect superclass name.")
+            superclass = Variable(self.__previous())
+
+        self.__consume(SingleCharTokenType.LEFT_BRACE, "Expect '{' before class body.")
+
+        methods: List[Function] = []
+        while not self.__check(SingleCharTokenType.RIGHT_BRACE) and not self.__is_at_end():
+            methods.append(self.__function_declaration("method"))
+
+        self.__consume(SingleCharTokenType.RIGHT_BRACE, "Expect '}' after class body.")
+        return Class(name=name, superclass=superclass, methods=methods)
+
     def __function_declaration(self, kind: str) :
         name: Token = self.__consume(LiteralTokenType.IDENTIFIER, f"Expect {kind} name")
         self.__consume(SingleCharTokenType.LEFT_PAREN, "Expected '(' after 'while'.")
@@ -172,95 +270,110 @@ class Parser:
         self.__consume(SingleCharTokenType.RIGHT_BRACE, "Expected '}' after block.")
         return statements
 
-    def __assignment(self) -> Expr:
-        expression = self.__or()
-
-        if self.__match(OperatorTokenType.EQUAL):
-            equals: Token = self.__previous()
-            value = self.__assignment()
-            if isinstance(expression, Variable):
-                name = expression.name
-                return Assign(name=name, value=value)
-            self.__error(token=equals, message="Invalid assignmnet target.")
-
-        return expression
-
-    def __or(self) -> Expr:
-        expr = self.__and()
-
-        while self.__match(KeywordTokens.OR):
-            operator = self.__previous()
-            right = self.__and()
-            expr = Logical(operator=operator, right=right, left=expr)
-
-        return expr
-
-    def __and(self) -> Expr:
-        expr = self.equality()
+    def expression(self) -> Expr:
+        return self.__parse_precedence(Precedence.ASSIGNMENT)
 
-        while self.__match(KeywordTokens.AND):
-            operator = self.__previous()
-            right = self.equality()
-            expr = Logical(operator=operator, right=right, left=expr)
+    def __parse_precedence(self, precedence: "Precedence") -> Expr:
+        """
+        Parse an expression whose operators bind at least as tightly as `precedence`.
 
-        return expr
+        Literals and identifiers are built inline; every other token dispatches through the
+        prefix and infix tables, indexed by token code, so a primary is reached in one or two
+        calls whatever its depth in the grammar.
+        """
+        tokens = self.tokens
+        token = tokens[self.current]
+        code = token.code
 
-    def expression(self) -> Expr:
-        return self.__assignment()
+        if code == _NUMBER or code == _STRING:
+            self.current += 1
+            left = Literal(token.literal)
+        elif code == _IDENTIFIER:
+            self.current += 1
+            left = Variable(token)
+        else:
+            prefix = self.__prefix[code]
+            if prefix is None:
+                self.__error(token, "Expect expression")
+            self.current += 1
+            left = prefix(token)
 
-    def equality(self) -> Expr:
-        expression = self.comparison()
+        infix = self.__infix
+        while True:
+            token = tokens[self.current]
+            rule = infix[token.code]
+            if rule is None or rule[0] < precedence:
+                return left
+            self.current += 1
+            left = rule[1](left, token)
 
-        while self.__match(OperatorTokenType.BANG_EQUAL, OperatorTokenType.EQUAL_EQUAL):
-            operator = self.__previous()
-            right = self.comparison()
-            expression = Binary(expression, operator, right)
-        return expression
+    def __literal(self, token: Token) -> Expr:
+        return Literal(value=_KEYWORD_LITERALS[token.code])
 
+    def __grouping(self, token: Token) -> Expr:
+        expression = self.expression()
+        self.__consume(SingleCharTokenType.RIGHT_PAREN, 'Expect ) after expression')
+        return Grouping(expression=expression)
 
-    def comparison(self) -> Expr:
-        expression = self.term()
+    def __unary(self, token: Token) -> Expr:
+        right = self.__parse_precedence(Precedence.UNARY)
+        return Unary(operator=token, right=right)
 
-        while self.__match(OperatorTokenType.GREATER, OperatorTokenType.GREATER_EQUAL,
-                           OperatorTokenType.LESS, OperatorTokenType.LESS_EQUAL):
-            operator = self.__previous()
-            right = self.term()
-            expression = Binary(left=expression, operator=operator, right=right)
+    def __this(self, token: Token) -> Expr:
+        return This(token)
 
-        return expression
+    def __super(self, token: Token) -> Expr:
+        self.__consume(SingleCharTokenType.DOT, "Expect '.' after 'super'.")
+        method = self.__consume(LiteralTokenType.IDENTIFIER, "Expect superclass method name.")
+        return Super(keyword=token, method=method)
 
-    def term(self) -> Expr:
-        expression = self.factor()
+    def __array(self, token: Token) -> Expr:
+        elements = []
 
-        while self.__match(SingleCharTokenType.MINUS, SingleCharTokenType.PLUS):
-            operator = self.__previous()
-            right = self.factor()
-            expression = Binary(left=expression,  operator=operator, right=right)
+        if not self.__check(SingleCharTokenType.RIGHT_BRACKET):
+            while True:
+                elements.append(self.expression())
+                if not self.__match(SingleCharTokenType.COMMA):
+                    break
 
-        return expression
+        self.__consume(SingleCharTokenType.RIGHT_BRACKET, "Expect ']' after array elements.")
+        return Array(bracket=token, elements=elements)
 
-    def factor(self) -> Expr:
+    def __map(self, token: Token) -> Expr:
+        keys, values = [], []
 
-        expression = self.unary()
+        if not self.__check(SingleCharTokenType.RIGHT_BRACE):
+            while True:
+                keys.append(self.expression())
+                self.__consume(SingleCharTokenType.COLON, "Expect ':' after map key.")
+                values.append(self.expression())
+                if not self.__match(SingleCharTokenType.COMMA):
+                    break
 
-        while self.__match(SingleCharTokenType.SLASH, SingleCharTokenType.STAR):
-            operator = self.__previous()
-            right = self.unary()
-            expression = Binary(left=expression, operator=operator, right=right)
-        return expression
+        self.__consume(SingleCharTokenType.RIGHT_BRACE, "Expect '}' after map entries.")
+        return Map(brace=token, keys=keys, values=values)
 
-    def unary(self) -> Expr:
+    def __binary(self, left: Expr, operator: Token) -> Expr:
+        right = self.__parse_precedence(_PRECEDENCES[operator.code] + 1)
+        return Binary(left=left, operator=operator, right=right)
 
-        if self.__match(OperatorTokenType.BANG, SingleCharTokenType.MINUS):
-            operator = self.__previous()
-            right = self.unary()
-            return Unary(operator=operator, right=right)
+    def __logical(self, left: Expr, operator: Token) -> Expr:
+        right = self.__parse_precedence(_PRECEDENCES[operator.code] + 1)
+        return Logical(operator=operator, right=right, left=left)
 
-        return self.call() 
+    def __assignment(self, target: Expr, equals: Token) -> Expr:
+        value = self.__parse_precedence(Precedence.ASSIGNMENT)
+        if isinstance(target, Variable):
+            return Assign(name=target.name, value=value)
+        if isinstance(target, Get):
+            return Set(obj=target.obj, name=target.name, value=value)
+        if isinstance(target, Index):
+            return SetIndex(obj=target.obj, bracket=target.bracket, index=target.index, value=value)
+        self.__error(token=equals, message="Invalid assignmnet target.")
 
-    def __finish_call(self, callee: Expr):
+    def __finish_call(self, callee: Expr, token: Token) -> Expr:
         arguments = []
-        
+
         if not self.__check(SingleCharTokenType.RIGHT_PAREN):
             while True:
                 if len(arguments) >= 255:
@@ -273,39 +386,14 @@ class Parser:
 
         return Call(callee=callee, paren=paren, arguments=arguments)
 
-    def call(self) -> Expr:
+    def __get(self, obj: Expr, token: Token) -> Expr:
+        name = self.__consume(LiteralTokenType.IDENTIFIER, "Expect property name after '.'.")
+        return Get(obj=obj, name=name)
 
-        expr = self.primary()
-
-        while True:
-            if self.__match(SingleCharTokenType.LEFT_PAREN):
-                expr = self.__finish_call(callee=expr)
-            else:
-                break
-
-        return expr
-
-    def primary(self) -> Expr:
-
-        if self.__match(KeywordTokens.FALSE):
-            return Literal(value=False)
-        if self.__match(KeywordTokens.TRUE):
-            return Literal(value=True)
-        if self.__match(KeywordTokens.NIL):
-            return Literal(value=None)
-
-        if self.__match(LiteralTokenType.NUMBER, LiteralTokenType.STRING):
-            return Literal(self.__previous().literal)
-
-        if self.__match(LiteralTokenType.IDENTIFIER):
-            return Variable(self.__previous())
-
-        if self.__match(SingleCharTokenType.LEFT_PAREN):
-            expression = self.expression()
-            self.__consume(SingleCharTokenType.RIGHT_PAREN, 'Expect ) after expression')
-            return Grouping(expression=expression)
-
-        self.__error(self.__peek(), "Expect expression")
+    def __index(self, obj: Expr, bracket: Token) -> Expr:
+        index = self.expression()
+        self.__consume(SingleCharTokenType.RIGHT_BRACKET, "Expect ']' after index.")
+        return Index(obj=obj, bracket=bracket, index=index)
 
     def __consume(self, type: TokenType, message: str):
         if self.__check(type=type):
@@ -325,6 +413,7 @@ class Parser:
                 KeywordTokens.CLASS,
                 KeywordTokens.FUNCTION,
                 KeywordTokens.VAR,
+                KeywordTokens.IMPORT,
                 KeywordTokens.FOR,
                 KeywordTokens.IF,
                 KeywordTokens.WHILE,
@@ -335,24 +424,23 @@ class Parser:
             self.__advance()
 
     def __match(self, *types: TokenType) -> bool:
+        token_type = self.tokens[self.current].token_type
         for type in types:
-            if self.__check(type):
+            if token_type is type:
                 self.__advance()
                 return True
         return False
 
     def __check(self, type: TokenType) -> bool:
-        if not self.__is_at_end():
-            return self.__peek().token_type == type
-        return False
+        return self.tokens[self.current].token_type is type
 
     def __advance(self):
-        if not self.__is_at_end():
+        if self.tokens[self.current].code != _EOF:
             self.current += 1
-        return self.__previous()
+        return self.tokens[self.current - 1]
 
     def __is_at_end(self) -> bool:
-        return self.__peek().token_type == EOFTokenType.EOF 
+        return self.tokens[self.current].code == _EOF
 
     def __peek(self) -> Token:
         return self.tokens[self.current]
@@ -1,11 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List, Any
-
-from ..exceptions import PyNoxReturnError
-
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ..interpreter.statements import Function
-from ..environment import Environment
+from ..interpreter.tiering import TIER_UP_CALLS
+from ..environment import Cell
+from .instance import PyNoxInstance, Shape
 
 #TODO: resolve circular import of `interpreter` in PyNoxCallable
 
@@ -27,10 +26,21 @@ class PyNoxCallable(ABC):
 
 class PyNoxFunction(PyNoxCallable):
 
-    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool = False) -> None:
+    def __init__(
+        self,
+        declaration: Function,
+        upvalues: Tuple[Cell, ...] = (),
+        is_initializer: bool = False,
+        receiver: Optional[PyNoxInstance] = None
+    ) -> None:
         self.declaration = declaration
-        self.closure = closure
+        self.upvalues = upvalues
         self.is_initializer = is_initializer
+        self.receiver = receiver
+        self.param_count = len(declaration.params)
+        # The compiled body, once the declaration is hot. Only unbound functions cache it here,
+        # since compiled call sites pass the arguments straight through.
+        self.entry: Optional[Callable[..., Any]] = None
 
     def __str__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
@@ -39,12 +49,88 @@ class PyNoxFunction(PyNoxCallable):
     def arity(self):
         return len(self.declaration.params)
 
+    def bind(self, instance: PyNoxInstance) -> "PyNoxFunction":
+        return PyNoxFunction(declaration=self.declaration, upvalues=self.upvalues,
+                             is_initializer=self.is_initializer, receiver=instance)
+
     def __call__(self, interpreter, arguments: List[Any]) -> Any:
-        env: Environment = Environment(enclosing=self.closure)
-        for param, arg in zip(self.declaration.params, arguments):
-            env.define(name=param, value=arg)
-        try:
-            interpreter._execute_block(stmts=self.declaration.body, env=env)
-        except PyNoxReturnError as return_value:
-            return return_value.value
+        entry = self.entry
+        if entry is not None:
+            return entry(self.upvalues, *arguments)
+
+        frame: List[Any] = interpreter._new_frame(self.declaration.frame_size)
+        if self.receiver is None:
+            frame[:len(arguments)] = arguments
+        else:
+            frame[0] = self.receiver
+            frame[1:len(arguments) + 1] = arguments
+        return self.invoke(interpreter, frame)
+
+    def invoke(self, interpreter, frame: List[Any]) -> Any:
+        """
+        Run the function on a frame that already holds the receiver and the arguments.
+
+        :param interpreter: The interpreter running the call.
+        :param frame: The callee's frame, with the receiver (for methods) and arguments in their slots.
+        :return: The returned value.
+        """
+        declaration = self.declaration
+        declaration.calls += 1
+        if declaration.calls >= TIER_UP_CALLS:
+            entry = interpreter._tier_up(declaration, method=self.receiver is not None)
+            if entry is not None:
+                arguments = frame[:len(declaration.params) + (self.receiver is not None)]
+                if self.receiver is None:
+                    self.entry = entry
+                    return entry(self.upvalues, *arguments)
+                value = entry(self.upvalues, *arguments)
+                return self.receiver if self.is_initializer else value
+
+        for slot in declaration.boxed_params:
+            frame[slot] = Cell(frame[slot])
+
+        profiler = interpreter.profiler
+        if profiler is None:
+            value = interpreter._execute_body(declaration.code, frame, self.upvalues)
+        else:
+            profiler.enter(declaration.name.lexeme, declaration.name.line, frame)
+            try:
+                value = interpreter._execute_body(declaration.code, frame, self.upvalues)
+            finally:
+                profiler.leave()
+        if self.is_initializer:
+            return self.receiver
+        return value
+
+
+class PyNoxClass(PyNoxCallable):
+
+    def __init__(self, name: str, superclass: Optional["PyNoxClass"], methods: Dict[str, PyNoxFunction]) -> None:
+        self.name = name
+        self.superclass = superclass
+        self.methods = methods
+        self.root_shape = Shape(self)
+
+    def __str__(self) -> str:
+        return self.name
+
+    def find_method(self, name: str) -> Optional[PyNoxFunction]:
+        klass: Optional[PyNoxClass] = self
+        while klass is not None:
+            method = klass.methods.get(name)
+            if method is not None:
+                return method
+            klass = klass.superclass
         return None
+
+    @property
+    def arity(self):
+        initializer = self.find_method("init")
+        return initializer.arity if initializer is not None else 0
+
+    def __call__(self, interpreter, arguments: List[Any]) -> Any:
+        instance = PyNoxInstance(self.root_shape)
+        initializer = self.find_method("init")
+        if initializer is not None:
+            initializer.bind(instance)(interpreter, arguments)
+        return instance
@@ -4,3 +4,11 @@ import enum
 class FunctionType(enum.Enum):
     NONE = enum.auto()
     FUNCTION = enum.auto()
+    INITIALIZER = enum.auto()
+    METHOD = enum.auto()
+
+
+class ClassType(enum.Enum):
+    NONE = enum.auto()
+    CLASS = enum.auto()
+    SUBCLASS = enum.auto()
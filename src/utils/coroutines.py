@@ -0,0 +1,206 @@
+import heapq
+import itertools
+import selectors
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Generator, List, Optional, Set, Tuple
+
+from ..exceptions import PyNoxRuntimeError
+
+__all__ = ["Await", "Scheduler", "Sleep", "Task", "WaitIO", "YIELD"]
+
+
+class Task:
+    """
+    A Lox coroutine: a function call run by the stackless evaluator that can suspend and let
+    other tasks run.
+
+    A suspended task is nothing but the generators of its pending Lox calls and the frame it
+    was running in, so thousands fit in an interpreter.
+    """
+
+    __slots__ = ("id", "stack", "frame", "upvalues", "depth", "value", "error", "done", "result", "waiters",
+                 "__weakref__")
+
+    def __init__(self, id_: int, body: Generator[Any, Any, Any], frame: List[Any], upvalues: Tuple[Any, ...]) -> None:
+        self.id = id_
+        self.stack: List[Generator[Any, Any, Any]] = [body]
+        self.frame = frame
+        self.upvalues = upvalues
+        self.depth = 0
+        # What the task is resumed with: the value of the call it suspended on, or an error thrown there.
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self.result: Any = None
+        self.waiters: List["Task"] = []
+
+    def __str__(self) -> str:
+        return f"<task {self.id}{' done' if self.done else ''}>"
+
+    def __repr__(self) -> str:
+        return f"<Task {self.id} done={self.done} at {hex(id(self))}>"
+
+
+class _Request:
+    """What a suspending native asks of the scheduler; the task waits until it is answered."""
+
+    __slots__ = ()
+
+    def park(self, scheduler: "Scheduler", task: Task) -> None:
+        raise NotImplementedError
+
+
+class _Yield(_Request):
+
+    __slots__ = ()
+
+    def park(self, scheduler: "Scheduler", task: Task) -> None:
+        scheduler.wake(task)
+
+
+# Let every other ready task run first.
+YIELD = _Yield()
+
+
+class Sleep(_Request):
+    """Resume the task once `seconds` have passed."""
+
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def park(self, scheduler: "Scheduler", task: Task) -> None:
+        scheduler.at(time.monotonic() + self.seconds, task)
+
+
+class Await(_Request):
+    """Resume the task with the result of another one once it finishes."""
+
+    __slots__ = ("target",)
+
+    def __init__(self, target: Task) -> None:
+        self.target = target
+
+    def park(self, scheduler: "Scheduler", task: Task) -> None:
+        if self.target is task:
+            raise PyNoxRuntimeError("A task can't await itself.")
+        if self.target.done:
+            scheduler.wake(task, self.target.result)
+        else:
+            self.target.waiters.append(task)
+
+
+class WaitIO(_Request):
+    """
+    Resume the task once a host file object is ready, with what `complete` returns then.
+
+    Host natives declared with ``suspends=True`` return one to read a socket or a pipe without
+    blocking the other tasks, for instance
+    ``WaitIO(sock, selectors.EVENT_READ, lambda: sock.recv(4096).decode())``.
+    """
+
+    __slots__ = ("fileobj", "events", "complete")
+
+    def __init__(self, fileobj: Any, events: int, complete: Callable[[], Any]) -> None:
+        self.fileobj = fileobj
+        self.events = events
+        self.complete = complete
+
+    def park(self, scheduler: "Scheduler", task: Task) -> None:
+        scheduler.watch(self, task)
+
+
+class Scheduler:
+    """
+    The run queue of an interpreter's tasks, with the timers and host I/O that wake suspended ones.
+
+    Everything runs on the interpreter's thread: when no task is ready, the scheduler sleeps in
+    a `selectors` call until the next timer is due or a watched file object is ready.
+    """
+
+    def __init__(self) -> None:
+        self.current: Optional[Task] = None
+        self.__ready: Deque[Task] = deque()
+        self.__timers: List[Tuple[float, int, Task]] = []
+        self.__order = itertools.count()
+        self.__ids = itertools.count(1)
+        self.__selector: Optional[selectors.BaseSelector] = None
+        self.__watched = 0
+        self.__live: Set[Task] = set()
+
+    def spawn(self, body: Generator[Any, Any, Any], frame: List[Any], upvalues: Tuple[Any, ...]) -> Task:
+        """Queue a new task running `body` in the given frame."""
+        task = Task(next(self.__ids), body, frame, upvalues)
+        self.__live.add(task)
+        self.__ready.append(task)
+        return task
+
+    def wake(self, task: Task, value: Any = None, error: Optional[BaseException] = None) -> None:
+        task.value, task.error = value, error
+        self.__ready.append(task)
+
+    def at(self, deadline: float, task: Task) -> None:
+        heapq.heappush(self.__timers, (deadline, next(self.__order), task))
+
+    def watch(self, request: WaitIO, task: Task) -> None:
+        if self.__selector is None:
+            self.__selector = selectors.DefaultSelector()
+        try:
+            self.__selector.register(request.fileobj, request.events, (request, task))
+        except (KeyError, ValueError) as error:
+            raise PyNoxRuntimeError(f"Can't wait on {request.fileobj!r}: {error}.")
+        self.__watched += 1
+
+    def finish(self, task: Task, result: Any) -> None:
+        task.done, task.result = True, result
+        task.stack.clear()
+        self.__live.discard(task)
+        for waiter in task.waiters:
+            self.wake(waiter, result)
+        task.waiters.clear()
+
+    def next(self) -> Optional[Task]:
+        """
+        Take the next task to run, waiting for a timer or for host I/O if none is ready.
+
+        :return: The task, or None once every task finished.
+        :raises PyNoxRuntimeError: If tasks are left that nothing can wake.
+        """
+        while not self.__ready:
+            if not self.__live:
+                return None
+            if not self.__timers and not self.__watched:
+                raise PyNoxRuntimeError(f"Deadlock: {len(self.__live)} tasks wait on each other.")
+            timeout = max(self.__timers[0][0] - time.monotonic(), 0) if self.__timers else None
+            if self.__watched:
+                for key, _ in self.__selector.select(timeout):
+                    request, task = key.data
+                    self.__selector.unregister(key.fileobj)
+                    self.__watched -= 1
+                    try:
+                        self.wake(task, request.complete())
+                    except PyNoxRuntimeError as error:
+                        self.wake(task, error=error)
+                    except Exception as error:
+                        self.wake(task, error=PyNoxRuntimeError(f"I/O failed: {error}."))
+            elif timeout:
+                time.sleep(timeout)
+            now = time.monotonic()
+            while self.__timers and self.__timers[0][0] <= now:
+                self.wake(heapq.heappop(self.__timers)[2])
+        return self.__ready.popleft()
+
+    def close(self) -> None:
+        """Abandon the tasks that didn't finish, closing their pending calls innermost first."""
+        for task in self.__live:
+            while task.stack:
+                task.stack.pop().close()
+        self.__live.clear()
+        self.__ready.clear()
+        self.__timers.clear()
+        if self.__selector is not None:
+            self.__selector.close()
+            self.__selector = None
+            self.__watched = 0
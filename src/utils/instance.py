@@ -0,0 +1,64 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .callable import PyNoxClass
+
+__all__ = ["Shape", "PyNoxInstance"]
+
+
+class Shape:
+    """
+    A hidden class: the layout shared by every instance of a class that gained the same fields
+    in the same order.
+
+    Each shape maps field names to indexes in the instance's slot list. Adding a field moves the
+    instance along a cached transition to a child shape, so instances built the same way end up
+    on the very same `Shape` object and inline caches can key on its identity.
+    """
+
+    __slots__ = ("klass", "fields", "transitions", "__weakref__")
+
+    def __init__(self, klass: "PyNoxClass", fields: Optional[Dict[str, int]] = None) -> None:
+        self.klass = klass
+        self.fields: Dict[str, int] = fields if fields is not None else {}
+        self.transitions: Dict[str, "Shape"] = {}
+
+    def with_field(self, name: str) -> "Shape":
+        """
+        Return the shape reached by adding a field, creating the transition on first use.
+
+        :param name: The name of the new field.
+        :return: The child shape holding the field in the next slot.
+        """
+        shape = self.transitions.get(name)
+        if shape is None:
+            fields = dict(self.fields)
+            fields[name] = len(fields)
+            shape = Shape(self.klass, fields)
+            self.transitions[name] = shape
+        return shape
+
+    def __repr__(self) -> str:
+        return f"<Shape {self.klass.name}{{{', '.join(self.fields)}}}>"
+
+
+class PyNoxInstance:
+    """
+    An instance of a Lox class, holding its fields in a slot list laid out by its `Shape`.
+    """
+
+    __slots__ = ("shape", "slots", "__weakref__")
+
+    def __init__(self, shape: Shape) -> None:
+        self.shape = shape
+        self.slots: List[Any] = []
+
+    @property
+    def klass(self) -> "PyNoxClass":
+        return self.shape.klass
+
+    def __str__(self) -> str:
+        return f"{self.shape.klass.name} instance"
+
+    def __repr__(self) -> str:
+        return f"<PyNoxInstance {self.shape.klass.name} at {hex(id(self))}>"
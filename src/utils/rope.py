@@ -0,0 +1,139 @@
+from typing import Any, List, Optional, Union
+
+__all__ = ["Rope", "concat", "is_string", "flatten", "stringify"]
+
+# Concatenations whose result is shorter than this are done eagerly: copying a short
+# string is cheaper than allocating and later flattening a rope.
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """
+    A lazily flattened string built by repeated concatenation.
+
+    A rope stands for the first ``front_count`` pieces of a ``front`` list, in reverse, followed
+    by the first ``count`` pieces of a ``parts`` list; both lists may be shared with the ropes
+    it was grown from. Appending to the rope that owns the tip of ``parts``, or prepending to
+    the one that owns the tip of ``front``, pushes onto the shared list, so building a string
+    piece by piece costs O(1) per concatenation at either end and the pieces are joined once,
+    when the value is printed, compared or hashed.
+    """
+
+    __slots__ = ("_parts", "_count", "_front", "_front_count", "_length", "_flat")
+
+    def __init__(self, parts: List[str], count: int, length: int, front: Optional[List[str]] = None,
+                 front_count: int = 0) -> None:
+        self._parts = parts
+        self._count = count
+        self._front = front if front is not None else []
+        self._front_count = front_count
+        self._length = length
+        self._flat = None
+
+    @classmethod
+    def of(cls, left: str, right: str) -> "Rope":
+        return cls([left, right], 2, len(left) + len(right))
+
+    def append(self, other: Union[str, "Rope"]) -> "Rope":
+        """
+        Concatenate another string to the end of this one.
+
+        :param other: The string or rope to append.
+        :return: A rope standing for the concatenation.
+        """
+        pieces = other._pieces() if type(other) is Rope else (other,)
+        parts = self._parts
+        if len(parts) != self._count:
+            # Someone already grew the shared list past this rope: branch off a copy.
+            parts = parts[:self._count]
+        parts.extend(pieces)
+        return Rope(parts, len(parts), self._length + len(other), self._front, self._front_count)
+
+    def prepend(self, other: str) -> "Rope":
+        """
+        Concatenate a string to the start of this one.
+
+        :param other: The string to prepend.
+        :return: A rope standing for the concatenation.
+        """
+        front = self._front
+        if len(front) != self._front_count:
+            front = front[:self._front_count]
+        front.append(other)
+        return Rope(self._parts, self._count, self._length + len(other), front, len(front))
+
+    def _pieces(self) -> List[str]:
+        pieces = self._front[self._front_count - 1::-1] if self._front_count else []
+        pieces.extend(self._parts[:self._count])
+        return pieces
+
+    def flatten(self) -> str:
+        """
+        Join the pieces into a plain string, caching the result.
+
+        :return: The flattened string.
+        """
+        flat = self._flat
+        if flat is None:
+            flat = "".join(self._pieces())
+            self._flat = flat
+            # Keep only the flat copy; other ropes sharing the lists still hold their pieces.
+            self._parts = [flat]
+            self._count = 1
+            self._front = []
+            self._front_count = 0
+        return flat
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return f"<Rope len={self._length} pieces={self._front_count + self._count} at {hex(id(self))}>"
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is Rope:
+            return self._length == other._length and self.flatten() == other.flatten()
+        if isinstance(other, str):
+            return self._length == len(other) and self.flatten() == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+
+def is_string(value: Any) -> bool:
+    return isinstance(value, (str, Rope))
+
+
+def flatten(value: Any) -> Any:
+    """
+    Return the plain string for a rope, and any other value unchanged.
+    """
+    return value.flatten() if type(value) is Rope else value
+
+
+def stringify(value: Any) -> str:
+    """
+    Return the text Lox shows for a value, as ``print`` writes it.
+    """
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def concat(left: Union[str, Rope], right: Union[str, Rope]) -> Union[str, Rope]:
+    """
+    Concatenate two Lox strings, building a rope once the result is long enough.
+    """
+    if type(left) is Rope:
+        return left.append(right)
+    if type(right) is Rope:
+        return right.prepend(left)
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        return left + right
+    return Rope.of(left, right)